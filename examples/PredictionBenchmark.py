@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Measures the axis motion prediction against captures given on the command line,
+# or against a generated session of sweeping sticks when there are none
+import src.linux_joystick_battisti456.analysis as analysis
+from src.linux_joystick_battisti456.prediction import AxisPredictor
+from src.linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+import io
+import math
+import sys
+import time
+
+# Prediction settings
+lags = (30, 45, 60)
+alpha = 0.9
+beta = 0.4
+
+def generatedSession():
+    capture = io.BytesIO()
+    joystick = VirtualJoystick(capture, buttons = 0, axes = 2)
+    for step in range(20000):
+        # A stick reporting every 4 ms while it sweeps back and forth at varying speeds
+        joystick.advance(4)
+        seconds = step * 0.004
+        joystick.axis(0, math.sin(seconds * 3.0) * math.sin(seconds * 0.21))
+        joystick.axis(1, math.cos(seconds * 1.7))
+    return capture.getvalue()
+
+sessions = sys.argv[1:] or [generatedSession()]
+for session in sessions:
+    capture = analysis.load_capture(session)
+    print('%s: %i events over %.1f s' % (session if isinstance(session, str) else 'generated', len(capture), analysis.duration(capture)))
+    for lag in lags:
+        for index, error in sorted(analysis.prediction_error(capture, lag, alpha, beta).items()):
+            print('  axis %2i, %2i ms ahead: rms %.4f (holding %.4f), max %.4f over %i events' % (
+                index, lag, error.rms, error.holdRms, error.max, error.samples
+            ))
+
+# Time the update done for every axis event
+predictor = AxisPredictor(alpha, beta)
+count = 1000000
+start = time.perf_counter()
+for timestamp in range(count):
+    predictor.update(timestamp, (timestamp & 255) / 255.0)
+elapsed = time.perf_counter() - start
+print('update: %.0f ns per event' % (elapsed / count * 1e9))
@@ -2,9 +2,19 @@ from .Gamepad import Gamepad as BaseGamepad
 
 class PS3(BaseGamepad):
     fullName = 'PlayStation 3 controller'
+    axisDeadzones = {
+        'LEFT-X': 0.05,
+        'LEFT-Y': 0.05,
+        'RIGHT-X': 0.05,
+        'RIGHT-Y': 0.05
+    }
+    stickPairs = {
+        'LEFT': ('LEFT-X', 'LEFT-Y'),
+        'RIGHT': ('RIGHT-X', 'RIGHT-Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LEFT-X',
             1: 'LEFT-Y',
@@ -36,9 +46,19 @@ class PS3(BaseGamepad):
 
 class PS4(BaseGamepad):
     fullName = 'PlayStation 4 controller'
+    axisDeadzones = {
+        'LEFT-X': 0.05,
+        'LEFT-Y': 0.05,
+        'RIGHT-X': 0.05,
+        'RIGHT-Y': 0.05
+    }
+    stickPairs = {
+        'LEFT': ('LEFT-X', 'LEFT-Y'),
+        'RIGHT': ('RIGHT-X', 'RIGHT-Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LEFT-X',
             1: 'LEFT-Y',
@@ -68,9 +88,19 @@ class PS4(BaseGamepad):
 
 class Xbox360(BaseGamepad):
     fullName = 'Xbox 360 controller'
+    axisDeadzones = {
+        'LEFT-X': 0.05,
+        'LEFT-Y': 0.05,
+        'RIGHT-X': 0.05,
+        'RIGHT-Y': 0.05
+    }
+    stickPairs = {
+        'LEFT': ('LEFT-X', 'LEFT-Y'),
+        'RIGHT': ('RIGHT-X', 'RIGHT-Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LEFT-X',
             1: 'LEFT-Y',
@@ -96,9 +126,19 @@ class Xbox360(BaseGamepad):
 
 class XboxONE(BaseGamepad):
     fullName = 'Xbox ONE controller'
+    axisDeadzones = {
+        'LAS -X': 0.05,
+        'LAS -Y': 0.05,
+        'RAS -X': 0.05,
+        'RAS -Y': 0.05
+    }
+    stickPairs = {
+        'LAS': ('LAS -X', 'LAS -Y'),
+        'RAS': ('RAS -X', 'RAS -Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LAS -X', #Left Analog Stick Left/Right
             1: 'LAS -Y', #Left Analog Stick Up/Down
@@ -126,9 +166,16 @@ class XboxONE(BaseGamepad):
         
 class Steam(BaseGamepad):
     fullName = 'Steam controller'
+    axisDeadzones = {
+        'AS -X': 0.05,
+        'AS -Y': 0.05
+    }
+    stickPairs = {
+        'AS': ('AS -X', 'AS -Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'AS -X', #Analog Stick Left/Right
             1: 'AS -Y', #Analog Stick Up/Down
@@ -165,9 +212,19 @@ class Steam(BaseGamepad):
 
 class MMP1251(BaseGamepad):
     fullName = "ModMyPi Raspberry Pi Wireless USB Gamepad"
+    axisDeadzones = {
+        'LEFT-X': 0.05,
+        'LEFT-Y': 0.05,
+        'RIGHT-X': 0.05,
+        'RIGHT-Y': 0.05
+    }
+    stickPairs = {
+        'LEFT': ('LEFT-X', 'LEFT-Y'),
+        'RIGHT': ('RIGHT-X', 'RIGHT-Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LEFT-X',
             1: 'LEFT-Y',
@@ -196,8 +253,8 @@ class MMP1251(BaseGamepad):
 class GameHat(BaseGamepad):
     fullName = "WaveShare rpi GameHat "
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LEFT-X',
             1: 'LEFT-Y'
@@ -216,9 +273,19 @@ class GameHat(BaseGamepad):
 
 class PG9099(BaseGamepad):
     fullName = 'ipega PG-9099 Bluetooth Controller'
+    axisDeadzones = {
+        'LAS -X': 0.05,
+        'LAS -Y': 0.05,
+        'RAS -X': 0.05,
+        'RAS -Y': 0.05
+    }
+    stickPairs = {
+        'LAS': ('LAS -X', 'LAS -Y'),
+        'RAS': ('RAS -X', 'RAS -Y')
+    }
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LAS -X', #Left Analog Stick Left/Right
             1: 'LAS -Y', #Left Analog Stick Up/Down
@@ -253,10 +320,14 @@ class example(BaseGamepad):
     # to your device.
     # self.buttonNames needs the same treatment.
     # Use python Gamepad.py to get the event mappings.
+    # axisDeadzones optionally lists kernel deadzones,
+    # as fractions of the half axis, for noisy sticks.
+    # stickPairs optionally names the (X, Y) axis
+    # pairs which make up each analogue stick.
     fullName = 'Enter the human readable name of the device here'
 
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'AXIS0',
             1: 'AXIS1',
@@ -271,8 +342,18 @@ class example(BaseGamepad):
 
 class CorePlusWiredController(BaseGamepad):
     fullName = 'Core (Plus) Wired Controller'
-    def __init__(self, joystickNumber = 0):
-        BaseGamepad.__init__(self, joystickNumber)
+    axisDeadzones = {
+        'LAS -X': 0.05,
+        'LAS -Y': 0.05,
+        'RAS -X': 0.05,
+        'RAS -Y': 0.05
+    }
+    stickPairs = {
+        'LAS': ('LAS -X', 'LAS -Y'),
+        'RAS': ('RAS -X', 'RAS -Y')
+    }
+    def __init__(self, joystickNumber = 0, source = None):
+        BaseGamepad.__init__(self, joystickNumber, source)
         self.axisNames = {#type:ignore
             0: 'LAS -X',
             1: 'LAS -Y',
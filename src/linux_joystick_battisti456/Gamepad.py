@@ -1,11 +1,32 @@
-from typing import NewType, Literal,Callable
+from typing import NewType, Literal,Callable, IO
 
+import os
 import struct
 import time
 import threading
-import select
+import array
+import termios
+from fcntl import ioctl
+import asyncio
+from collections import OrderedDict
 
 from . import js_path
+from .events import Event, EventKind, StateSnapshot, BUTTON, AXIS
+from .handles import ButtonHandle, AxisHandle
+from .ring import EventRing, RingCursor
+from .sampler import Sampler, SampleCallback
+from .profiler import HandlerProfiler, handler_name
+from .metrics import GamepadMetrics, MetricsServer, format_prometheus, write_prometheus
+from .calibration import AxisCorrection, JoystickIoctl, save_correction, load_correction
+from .sources import Source, ReadyPoll, open_source
+from .clock import EventClock
+from .virtual_controls import VirtualControl, VIRTUAL_BASE
+from .sticks import Stick
+from .triggers import Trigger, TriggerIndex
+from .timerwheel import TimerWheel
+from .gestures import GestureRecognizer
+from .prediction import AxisPredictor, Prediction
+from .history import ControlHistory
 
 ButtonID = NewType('ButtonID',int)
 ButtonName = NewType('ButtonName',str)
@@ -27,9 +48,11 @@ class Gamepad:
     EVENT_BUTTON = 'BUTTON'
     EVENT_AXIS = 'AXIS'
     fullName = 'Generic (numbers only)'
+    axisDeadzones:dict[str,float] = {}
+    stickPairs:dict[str,tuple[str,str]] = {}
     #endregion
     class UpdateThread(threading.Thread):
-        """Thread used to continually run the updateState function on a Gamepad in the background
+        """Thread used to continually process batches of events on a Gamepad in the background
 
         One of these is created by the Gamepad startBackgroundUpdates function and closed by stopBackgroundUpdates"""
         def __init__(self, gamepad):
@@ -45,46 +68,102 @@ class Gamepad:
             try:
                 assert not self.gamepad is None
                 while self.running:
-                    self.gamepad.updateState()
+                    # Whole batches, so stick handlers see both axes of a diagonal move at once
+                    self.gamepad._pump(None)
                 self.gamepad = None
             except:
                 self.running = False
                 self.gamepad = None
                 raise
 
-    def __init__(self, joystickNumber = 0):
+    def __init__(self, joystickNumber = 0, source:Source|None = None):
+        """Opens joystick joystickNumber, or reads the events from source instead when given.
+
+        source may be a path, a file descriptor (closed with the gamepad), a socket, a readable file object
+        or a bytes like buffer of recorded events, see virtual_joystick for writing them.
+        Calibration ioctls only work on real devices."""
         self.joystickNumber = str(joystickNumber)
-        self.joystickPath = js_path(joystickNumber)
-        retryCount = 5
-        while True:
-            try:
-                self.joystickFile = open(self.joystickPath, 'rb')
-                break
-            except IOError as e:
-                retryCount -= 1
-                if retryCount > 0:
-                    time.sleep(0.5)
-                else:
-                    raise IOError('Could not open gamepad %s: %s' % (self.joystickNumber, str(e)))
-        self.joystickPoll = select.poll()
-        self.joystickPoll.register(self.joystickFile,select.POLLIN)        
-        
+        if source is None:
+            source = js_path(joystickNumber)
+        self.joystickPath = source if isinstance(source, (str, os.PathLike)) else None
+        if self.joystickPath is not None:
+            retryCount = 5
+            while True:
+                try:
+                    self.joystickFile, self.joystickPoll = open_source(self.joystickPath)
+                    break
+                except IOError as e:
+                    retryCount -= 1
+                    if retryCount > 0:
+                        time.sleep(0.5)
+                    else:
+                        raise IOError('Could not open gamepad %s: %s' % (self.joystickNumber, str(e)))
+        else:
+            self.joystickFile, self.joystickPoll = open_source(source)
+        self.joystickIoctl = JoystickIoctl(self.joystickFile)
+        self.originalCorrection:list[AxisCorrection]|None = None
+
         self.eventSize = struct.calcsize('IhBB')
+        self.partialEvent = b''
+        self.pendingRawEvents:list[tuple[int,int,EventCode,InpID]] = []
         self.pressedMap:dict[ButtonID,bool] = {}
-        self.wasPressedMap:dict[ButtonID,bool] = {}
-        self.wasReleasedMap:dict[ButtonID,bool] = {}
+        self.edgeMap:dict[ButtonID,tuple[int,int,int]] = {}
+        self.beenPressedCursors:dict[ButtonID,int] = {}
+        self.beenReleasedCursors:dict[ButtonID,int] = {}
         self.axisMap:dict[AxisID,float] = {}
         self.buttonNames:dict[ButtonID,ButtonName] = {}
         self.buttonIndex:dict[ButtonName,ButtonID] = {}
         self.axisNames:dict[AxisID,AxisName] = {}
         self.axisIndex:dict[AxisName,AxisID] = {}
         self.lastTimestamp = 0
+        self.clock = EventClock()
+        self.reuseEvents = False
+        self.reusableEvent = Event()
+        self.captureFile:IO[bytes]|None = None
+        self.profiler:HandlerProfiler|None = None
+        self.metrics = GamepadMetrics()
+        self.metrics.gauges['backlog'] = self.backlog
+        self.eventRing:EventRing|None = None
+        self.stateLock = threading.Lock()
+        self.changeCondition = threading.Condition(self.stateLock)
+        self.changeWaiters = 0
+        # (loop, asyncio.Event) of every wait_for_change_async in progress
+        self.asyncWaiters:list[tuple[asyncio.AbstractEventLoop,asyncio.Event]] = []
+        self.generation = 0
+        # Generation of each control's last change, oldest change first
+        self.changeGenerations:OrderedDict[tuple[EventKind,int],int] = OrderedDict()
+        self.trackingAll = False
+        self.trackedKeys:set[tuple[EventKind,int]] = set()
         self.updateThread = None
         self.connected = True
-        self.pressedEventMap:dict[ButtonID,set[Callable[[],None]]] = {}
-        self.releasedEventMap:dict[ButtonID,set[Callable[[],None]]] = {}
-        self.changedEventMap:dict[ButtonID,set[Callable[[bool],None]]] = {}
-        self.movedEventMap:dict[AxisID,set[Callable[[float],None]]] = {}
+        # Handler tuples are replaced, never mutated, so dispatch can iterate them without locking
+        self.handlerLock = threading.Lock()
+        self.pressedEventMap:dict[ButtonID,tuple[Callable[[],None],...]] = {}
+        self.releasedEventMap:dict[ButtonID,tuple[Callable[[],None],...]] = {}
+        self.changedEventMap:dict[ButtonID,tuple[Callable[[bool],None],...]] = {}
+        self.movedEventMap:dict[AxisID,tuple[Callable[[float],None],...]] = {}
+        # Controls taking the full event path, None for all of them, see watch
+        self.watchCounts:dict[tuple[EventKind,int],int] = {}
+        self.watchAll = 0
+        self.hotButtons:frozenset[ButtonID]|None = frozenset()
+        self.hotAxes:frozenset[AxisID]|None = frozenset()
+        # Virtual controls by (kind, index), and the (control, kind, index, inputs) bindings depending on each input
+        self.virtualControls:dict[tuple[EventKind,int],tuple[VirtualControl,EventKind,int,tuple[tuple[EventKind,int],...]]] = {}
+        self.virtualDependents:dict[tuple[EventKind,int],tuple] = {}
+        self.nextVirtualIndex = VIRTUAL_BASE
+        # Sticks by name, the sticks with handlers by axis and those moved in the current batch
+        self.sticks:dict[str,Stick] = {}
+        self.stickMovedEventMap:dict[str,tuple[Callable[[float,float,float,float],None],...]] = {}
+        self.stickAxes:dict[AxisID,Stick] = {}
+        self.pendingSticks:dict[Stick,None] = {}
+        self.axisTriggers:dict[AxisID,TriggerIndex] = {}
+        self.axisPredictors:dict[AxisID,AxisPredictor] = {}
+        self.buttonHistories:dict[ButtonID,ControlHistory] = {}
+        self.axisHistories:dict[AxisID,ControlHistory] = {}
+        # Gesture timeouts run from the reading methods, in milliseconds of time.monotonic
+        self.timerWheel = TimerWheel(int(time.monotonic() * 1000))
+        self.gestures = GestureRecognizer(self.timerWheel, self._dispatch)
+        self.gestureButtons = self.gestures.buttons
 
     def __del__(self):
         try:
@@ -98,25 +177,77 @@ class Gamepad:
         for index in self.axisNames:
             self.axisIndex[self.axisNames[index]] = index
 
+    def _readRawEvents(self, maxEvents:int, timeout:float|None) -> list[tuple[int,int,EventCode,InpID]]:
+        """Reads up to maxEvents raw events from the gamepad with a single read.
+
+        Waits at most timeout seconds for data to arrive, None waits forever.
+        An empty list is returned if nothing arrived in time.
+        Throws an IOError if the gamepad is disconnected"""
+        if self.pendingRawEvents:
+            rawEvents = self.pendingRawEvents[:maxEvents]
+            del self.pendingRawEvents[:maxEvents]
+            return rawEvents
+        if not self.connected:
+            raise IOError('Gamepad has been disconnected')
+        if self.timerWheel.count:
+            # Gesture timers run between batches and cut the wait short, an empty list lets callers loop
+            self._runTimers()
+            timeout = self._timerTimeout(timeout)
+        if not self.joystickPoll.poll(None if timeout is None else max(timeout * 1000.0, 0.0)):
+            if self.timerWheel.count:
+                self._runTimers()
+            return []
+        self.metrics.readCalls += 1
+        try:
+            rawEvents = self.joystickFile.read(maxEvents * self.eventSize)
+            readTime = time.monotonic()
+        except IOError as e:
+            self.connected = False
+            self.metrics.disconnects += 1
+            raise IOError('Gamepad %s disconnected: %s' % (self.joystickNumber, str(e)))
+        if not rawEvents:
+            self.connected = False
+            self.metrics.disconnects += 1
+            raise IOError('Gamepad %s disconnected' % self.joystickNumber)
+        self.metrics.bytesRead += len(rawEvents)
+        if self.captureFile is not None:
+            self.captureFile.write(rawEvents)
+        if self.partialEvent:
+            rawEvents = self.partialEvent + rawEvents
+        complete = len(rawEvents) - len(rawEvents) % self.eventSize
+        self.partialEvent = rawEvents[complete:]
+        decoded = list(struct.iter_unpack('IhBB', rawEvents[:complete]))
+        if decoded:
+            # The newest event of the batch was read with the least delay
+            self.clock.observe_batch(decoded[0][0], decoded[-1][0], readTime)
+        return decoded#type:ignore
+
+    def _runTimers(self):
+        """Runs every gesture timer which is due."""
+        for timer in self.timerWheel.advance(int(time.monotonic() * 1000)):
+            timer.run()
+
+    def _timerTimeout(self, timeout:float|None) -> float|None:
+        """Returns timeout (seconds, None for forever) shortened to when the next gesture timer is due."""
+        wait = self.timerWheel.next_timeout(int(time.monotonic() * 1000))
+        if wait is None:
+            return timeout
+        if timeout is None:
+            return wait / 1000.0
+        return min(timeout, wait / 1000.0)
+
     def _getNextEventRaw(self) -> tuple[int,int,EventCode,InpID]:
-        """Returns the next raw event from the gamepad.
+        """Returns the next raw event from the gamepad, waiting for one if needed.
 
+        Whatever else arrived with it is kept in pendingRawEvents, so the end of a batch can be told apart.
         The return format is:
             timestamp (ms), value, event type code, axis / button number
         Throws an IOError if the gamepad is disconnected"""
-        if self.connected:
-            try:
-                rawEvent = self.joystickFile.read(self.eventSize)
-            except IOError as e:
-                self.connected = False
-                raise IOError('Gamepad %s disconnected: %s' % (self.joystickNumber, str(e)))
-            if rawEvent is None:
-                self.connected = False
-                raise IOError('Gamepad %s disconnected' % self.joystickNumber)
-            else:
-                return struct.unpack('IhBB', rawEvent)
-        else:
-            raise IOError('Gamepad has been disconnected')
+        rawEvents = self._readRawEvents(64, None)
+        while not rawEvents:
+            rawEvents = self._readRawEvents(64, None)
+        self.pendingRawEvents[:0] = rawEvents[1:]
+        return rawEvents[0]
 
     def _rawEventToDescription(self, event):
         """Decodes the raw event from getNextEventRaw into a formatted string."""
@@ -160,8 +291,198 @@ class Gamepad:
         else:
             return '%010u: Unknown event %u, Index %u, Value %i' % (timestamp, eventType, index, value)
     def isNextEvent(self) -> bool:
-        """returns whether there is something to read form the file"""
-        return bool(self.joystickPoll.poll(0))
+        """returns whether there is an event waiting, either already read with an earlier batch or in the file"""
+        return bool(self.pendingRawEvents) or bool(self.joystickPoll.poll(0))
+    def _markChanged(self, control:tuple[EventKind,int]):
+        """Records a state change for wait_for_change, must be called with stateLock held."""
+        self.generation += 1
+        self.changeGenerations[control] = self.generation
+        self.changeGenerations.move_to_end(control)
+        if self.changeWaiters:
+            self.changeCondition.notify_all()
+        for loop, woken in self.asyncWaiters:
+            if not woken.is_set():
+                loop.call_soon_threadsafe(woken.set)
+
+    def _dispatch(self, callbacks, event:str, index:int, *args):
+        """Calls every handler in callbacks with args, through the profiler when one is enabled."""
+        if not callbacks:
+            return
+        self.metrics.handlerCalls += len(callbacks)
+        try:
+            if self.profiler is None:
+                for callback in callbacks:
+                    callback(*args)
+            else:
+                self.profiler.dispatch(callbacks, event, index, *args)
+        except Exception:
+            self.metrics.handlerErrors += 1
+            raise
+
+    def _processEvent(self, value:int, eventType:int, index:int) -> bool|float|None:
+        """Updates the internal state and calls any registered handlers for one raw event.
+
+        State is updated under stateLock before any handler runs, so handlers and snapshots see the new value.
+        Returns the decoded value, True / False for buttons and -1.0 to +1.0 for axes.
+        Returns None for unknown event types, which are otherwise ignored."""
+        if eventType == self.EVENT_CODE_AXIS:
+            self.metrics.axisEvents += 1
+            aindex:AxisID = index#type:ignore
+            finalValue = value / self.MAX_AXIS
+            hot = self.hotAxes
+            if hot is not None and aindex not in hot:
+                # Nothing watches this axis, keep the raw state only
+                self.axisMap[aindex] = finalValue
+                return finalValue
+            self._applyAxis(aindex, finalValue)
+            return finalValue
+        elif eventType == self.EVENT_CODE_BUTTON:
+            self.metrics.buttonEvents += 1
+            bindex:ButtonID = index#type:ignore
+            finalValue = value != 0
+            hot = self.hotButtons
+            if hot is not None and bindex not in hot:
+                # Nothing watches this button, edges are still counted for beenPressed
+                with self.stateLock:
+                    self._recordEdge(bindex, finalValue)
+                    self.pressedMap[bindex] = finalValue
+                return finalValue
+            self._applyButton(bindex, finalValue)
+            return finalValue
+        elif eventType == self.EVENT_CODE_INIT_BUTTON:
+            self._countInit()
+            bindex:ButtonID = index#type:ignore
+            finalValue = value != 0
+            history = self.buttonHistories.get(bindex)
+            with self.stateLock:
+                if history is not None:
+                    history.append(self.lastTimestamp, 1.0 if finalValue else 0.0)
+                if bindex in self.edgeMap:
+                    # A resync after the driver buffer overflowed, count any edge hidden in the lost events
+                    if finalValue != self.pressedMap.get(bindex, finalValue):
+                        self._recordEdge(bindex, finalValue)
+                else:
+                    self.edgeMap[bindex] = (0, 0, self.lastTimestamp)
+                self.pressedMap[bindex] = finalValue
+                self._markChanged((BUTTON, bindex))
+            dependents = self.virtualDependents.get((BUTTON, bindex))
+            if dependents:
+                self._updateVirtual(dependents)
+            return finalValue
+        elif eventType == self.EVENT_CODE_INIT_AXIS:
+            self._countInit()
+            aindex:AxisID = index#type:ignore
+            finalValue = value / self.MAX_AXIS
+            triggers = self.axisTriggers.get(aindex)
+            predictor = self.axisPredictors.get(aindex)
+            history = self.axisHistories.get(aindex)
+            with self.stateLock:
+                previous = self.axisMap.get(aindex, finalValue)
+                self.axisMap[aindex] = finalValue
+                self._markChanged((AXIS, aindex))
+                if predictor is not None:
+                    predictor.reset(self.lastTimestamp, finalValue)
+                if history is not None:
+                    history.append(self.lastTimestamp, finalValue)
+            if triggers is not None:
+                self._fireTriggers(triggers, aindex, previous, finalValue)
+            dependents = self.virtualDependents.get((AXIS, aindex))
+            if dependents:
+                self._updateVirtual(dependents)
+            return finalValue
+        else:
+            self.metrics.unknownEvents += 1
+            return None
+
+    def _recordEdge(self, bindex:ButtonID, finalValue:bool):
+        """Counts a press or release, must be called with stateLock held."""
+        presses, releases, _ = self.edgeMap.get(bindex, (0, 0, 0))
+        if finalValue:
+            self.edgeMap[bindex] = (presses + 1, releases, self.lastTimestamp)
+        else:
+            self.edgeMap[bindex] = (presses, releases + 1, self.lastTimestamp)
+
+    def _applyAxis(self, aindex:AxisID, finalValue:float):
+        """Sets an axis, records the change and calls its handlers, for real and virtual axes alike."""
+        triggers = self.axisTriggers.get(aindex)
+        predictor = self.axisPredictors.get(aindex)
+        history = self.axisHistories.get(aindex)
+        with self.stateLock:
+            previous = self.axisMap.get(aindex, 0.0)
+            self.axisMap[aindex] = finalValue
+            self._markChanged((AXIS, aindex))
+            if predictor is not None:
+                predictor.update(self.lastTimestamp, finalValue)
+            if history is not None:
+                history.append(self.lastTimestamp, finalValue)
+            if self.eventRing is not None:
+                self.eventRing.append(self.lastTimestamp, AXIS, aindex, finalValue)
+        callbacks = self.movedEventMap.get(aindex)
+        if callbacks:
+            self._dispatch(callbacks, 'moved', aindex, finalValue)
+        if triggers is not None:
+            self._fireTriggers(triggers, aindex, previous, finalValue)
+        stick = self.stickAxes.get(aindex)
+        if stick is not None:
+            # Both axes of a stick usually move together, report them once at the end of the batch
+            self.pendingSticks[stick] = None
+        dependents = self.virtualDependents.get((AXIS, aindex))
+        if dependents:
+            self._updateVirtual(dependents)
+
+    def _applyButton(self, bindex:ButtonID, finalValue:bool):
+        """Sets a button, records the change and calls its handlers, for real and virtual buttons alike."""
+        history = self.buttonHistories.get(bindex)
+        with self.stateLock:
+            self._recordEdge(bindex, finalValue)
+            self.pressedMap[bindex] = finalValue
+            self._markChanged((BUTTON, bindex))
+            if history is not None:
+                history.append(self.lastTimestamp, 1.0 if finalValue else 0.0)
+            if self.eventRing is not None:
+                self.eventRing.append(self.lastTimestamp, BUTTON, bindex, finalValue)
+        if finalValue:
+            callbacks = self.pressedEventMap.get(bindex)
+            if callbacks:
+                self._dispatch(callbacks, 'pressed', bindex)
+        else:
+            callbacks = self.releasedEventMap.get(bindex)
+            if callbacks:
+                self._dispatch(callbacks, 'released', bindex)
+        callbacks = self.changedEventMap.get(bindex)
+        if callbacks:
+            self._dispatch(callbacks, 'changed', bindex, finalValue)
+        gestures = self.gestureButtons.get(bindex)
+        if gestures is not None:
+            self.gestures.edge(gestures, bindex, finalValue, int(time.monotonic() * 1000))
+        dependents = self.virtualDependents.get((BUTTON, bindex))
+        if dependents:
+            self._updateVirtual(dependents)
+
+    def _fireTriggers(self, triggers:TriggerIndex, aindex:AxisID, previous:float, finalValue:float):
+        for trigger in triggers.crossed(previous, finalValue):
+            callback, args = trigger.crossed(previous, finalValue)
+            if callback is not None:
+                self._dispatch((callback,), 'trigger', aindex, *args)
+
+    def _flushSticks(self):
+        """Calls the handlers of every stick moved since the last flush whose position changed after its deadzone."""
+        pending = self.pendingSticks
+        self.pendingSticks = {}
+        for stick in pending:
+            state = stick.state()
+            if state != stick.last:
+                stick.last = state
+                callbacks = self.stickMovedEventMap.get(stick.name)
+                if callbacks:
+                    self._dispatch(callbacks, 'stick', stick.xIndex, *state)
+
+    def _countInit(self):
+        self.metrics.initEvents += 1
+        if self.metrics.buttonEvents or self.metrics.axisEvents:
+            # The driver only re-sends init events mid stream after our buffer overflowed
+            self.metrics.resyncEvents += 1
+
     def getNextEvent(self, skipInit = True, noSkip = False) -> tuple[Literal['BUTTON','AXIS']|None,InpID|AxisName|ButtonName|None,bool|float|None]|None:
         """Returns the next event from the gamepad.
 
@@ -176,135 +497,149 @@ class Gamepad:
 
         After each call the internal state used by getPressed and getAxis is updated.
 
+        See getNextEventObject for a typed alternative.
+
         Throws an IOError if the gamepad is disconnected"""
-        self.lastTimestamp, value, eventType, index = self._getNextEventRaw()
-        skip = False
-        eventName = None
-        entityName = None
-        finalValue = None
-        if eventType == self.EVENT_CODE_BUTTON:
-            bindex:ButtonID = index#type: ignore
-            eventName = self.EVENT_BUTTON
-            if bindex in self.buttonNames:
-                entityName = self.buttonNames[bindex]
-            else:
-                entityName = bindex
-            if value == 0:
-                finalValue = False
-                self.wasReleasedMap[bindex] = True
-                if bindex in self.releasedEventMap:
-                    for callback in self.releasedEventMap[bindex]:
-                        callback()
-            else:
-                finalValue = True
-                self.wasPressedMap[bindex] = True
-                if bindex in self.pressedEventMap:
-                    for callback in self.pressedEventMap[bindex]:
-                        callback()
-            self.pressedMap[bindex] = finalValue
-            if bindex in self.changedEventMap:
-                for callback in self.changedEventMap[bindex]:
-                    callback(finalValue)
-        elif eventType == self.EVENT_CODE_AXIS:
-            aindex:AxisID = index#type:ignore
-            eventName = self.EVENT_AXIS
-            if aindex in self.axisNames:
-                entityName = self.axisNames[aindex]
-            else:
-                entityName = index
-            finalValue = value / self.MAX_AXIS
-            self.axisMap[aindex] = finalValue
-            if aindex in self.movedEventMap:
-                for callback in self.movedEventMap[aindex]:
-                    callback(finalValue)
-        elif eventType == self.EVENT_CODE_INIT_BUTTON:
-            bindex:ButtonID = index#type: ignore
-            eventName = self.EVENT_BUTTON
-            if bindex in self.buttonNames:
-                entityName = self.buttonNames[bindex]
+        while True:
+            timestamp, value, eventType, index = self._getNextEventRaw()
+            self.lastTimestamp = self.clock.unwrap(timestamp)
+            finalValue = self._processEvent(value, eventType, index)
+            if self.pendingSticks and not self.pendingRawEvents:
+                self._flushSticks()
+            if finalValue is None:
+                skip = True
             else:
-                entityName = bindex
-            if value == 0:
-                finalValue = False
+                skip = skipInit and bool(eventType & 0x80)
+            if not skip:
+                break
+            if noSkip:
+                return None
+
+        if eventType & self.EVENT_CODE_BUTTON:
+            return self.EVENT_BUTTON, self.buttonNames.get(index, index), finalValue#type:ignore
+        else:
+            return self.EVENT_AXIS, self.axisNames.get(index, index), finalValue#type:ignore
+
+    def getNextEventObject(self, skipInit = True, event:Event|None = None) -> Event:
+        """Returns the next event from the gamepad as an Event.
+
+        The kind of the event is an EventKind so it can be compared cheaply against BUTTON / AXIS.
+
+        When event is given it is refilled and returned instead of allocating a new Event.
+        Setting reuseEvents to True does the same with an Event owned by the gamepad,
+        in which case the result is only valid until the next call.
+
+        Throws an IOError if the gamepad is disconnected"""
+        while True:
+            timestamp, value, eventType, index = self._getNextEventRaw()
+            self.lastTimestamp = self.clock.unwrap(timestamp)
+            finalValue = self._processEvent(value, eventType, index)
+            if self.pendingSticks and not self.pendingRawEvents:
+                self._flushSticks()
+            if finalValue is None or (skipInit and eventType & 0x80):
+                continue
+            if event is None:
+                if self.reuseEvents:
+                    event = self.reusableEvent
+                else:
+                    event = Event()
+            event.timestamp = self.lastTimestamp
+            event.hostTime = self.clock.host_time(self.lastTimestamp)
+            if eventType & self.EVENT_CODE_BUTTON:
+                event.kind = BUTTON
+                event.name = self.buttonNames.get(index, index)#type:ignore
             else:
-                finalValue = True
-            self.pressedMap[bindex] = finalValue
-            self.wasPressedMap[bindex] = False
-            self.wasReleasedMap[bindex] = False
-            self.pressedEventMap[bindex] = set()
-            self.releasedEventMap[bindex] = set()
-            self.changedEventMap[bindex] = set()
-            skip = skipInit
-        elif eventType == self.EVENT_CODE_INIT_AXIS:
-            aindex:AxisID = index#type:ignore
-            eventName = self.EVENT_AXIS
-            if aindex in self.axisNames:
-                entityName = self.axisNames[aindex]
+                event.kind = AXIS
+                event.name = self.axisNames.get(index, index)#type:ignore
+            event.index = index
+            event.value = finalValue
+            return event
+
+    def getEvents(self, maxEvents:int = 64, timeout:float|None = 0.0, skipInit = True) -> list[Event]:
+        """Returns the events which arrive from the gamepad within timeout seconds, as a list of Events.
+
+        Collects events until maxEvents have been gathered or the timeout has passed.
+        A timeout of 0 only returns events which are already waiting, None waits until there is at least one.
+        Init events update the internal state but are left out of the result when skipInit is True.
+
+        Throws an IOError if the gamepad is disconnected"""
+        events:list[Event] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(events) < maxEvents:
+            if deadline is None:
+                remaining = None if not events else 0.0
             else:
-                entityName = index
-            finalValue = value / self.MAX_AXIS
-            self.axisMap[aindex] = finalValue
-            self.movedEventMap[aindex] = set()
-            skip = skipInit
-        else:
-            skip = True
-        
-        if skip and noSkip:
-            return None
+                remaining = max(deadline - time.monotonic(), 0.0)
+            try:
+                rawEvents = self._readRawEvents(maxEvents - len(events), remaining)
+            except IOError:
+                if not events:
+                    raise
+                # Hand over what arrived before the disconnect, the next call raises
+                break
+            if not rawEvents:
+                if remaining is not None and remaining <= 0.0:
+                    break
+                continue
+            self._applyRawEvents(rawEvents, events, skipInit)
+        return events
 
-        if skip:
-            return self.getNextEvent()
-        else:
-            return eventName, entityName, finalValue
+    def _applyRawEvents(self, rawEvents:list[tuple[int,int,EventCode,InpID]], events:list[Event]|None = None, skipInit = True):
+        """Processes a batch of raw events, appending the decoded ones to events when given.
+
+        If a handler raises, the rest of the batch is kept for the next read rather than lost."""
+        remaining = iter(rawEvents)
+        clock = self.clock
+        try:
+            for timestamp, value, eventType, index in remaining:
+                self.lastTimestamp = timestamp = clock.unwrap(timestamp)
+                finalValue = self._processEvent(value, eventType, index)
+                if events is None or finalValue is None or (skipInit and eventType & 0x80):
+                    continue
+                if eventType & self.EVENT_CODE_BUTTON:
+                    events.append(Event(timestamp, BUTTON, index, None, finalValue, clock.host_time(timestamp), self.buttonNames))#type:ignore
+                else:
+                    events.append(Event(timestamp, AXIS, index, None, finalValue, clock.host_time(timestamp), self.axisNames))#type:ignore
+        except BaseException:
+            self.pendingRawEvents[:0] = remaining
+            raise
+        if self.pendingSticks:
+            self._flushSticks()
 #endregion
 #region updated code
-    def updateState(self):
-        """Updates the internal button and axis states with the next pending event.
+    def updateState(self, timeout:float|None = None, maxEvents:int = 64) -> int:
+        """Updates the internal button and axis states with pending events, returning how many were processed.
 
-        This call waits for a new event if there are not any waiting to be processed."""
-        self.lastTimestamp, value, eventType, index = self._getNextEventRaw()
-        if eventType == self.EVENT_CODE_BUTTON:
-            bindex:ButtonID = index#type:ignore
-            if value == 0:
-                finalValue = False
-                self.wasReleasedMap[bindex] = True
-                if bindex in self.releasedEventMap:
-                    for callback in self.releasedEventMap[bindex]:
-                        callback()
-            else:
-                finalValue = True
-                self.wasPressedMap[bindex] = True
-                if bindex in self.pressedEventMap:
-                    for callback in self.pressedEventMap[bindex]:
-                        callback()
-            self.pressedMap[bindex] = finalValue
-            if bindex in self.changedEventMap:
-                for callback in self.changedEventMap[bindex]:
-                    callback(finalValue)
-        elif eventType == self.EVENT_CODE_AXIS:
-            aindex:AxisID = index#type:ignore
-            finalValue = value / self.MAX_AXIS
-            self.axisMap[aindex] = finalValue
-            if aindex in self.movedEventMap:
-                for callback in self.movedEventMap[aindex]:
-                    callback(finalValue)
-        elif eventType == self.EVENT_CODE_INIT_BUTTON:
-            bindex:ButtonID = index#type:ignore
-            if value == 0:
-                finalValue = False
-            else:
-                finalValue = True
-            self.pressedMap[bindex] = finalValue
-            self.wasPressedMap[bindex] = False
-            self.wasReleasedMap[bindex] = False
-            self.pressedEventMap[bindex] = set()
-            self.releasedEventMap[bindex] = set()
-            self.changedEventMap[bindex] = set()
-        elif eventType == self.EVENT_CODE_INIT_AXIS:
-            aindex:AxisID = index#type:ignore
-            finalValue = value / self.MAX_AXIS
-            self.axisMap[aindex] = finalValue
-            self.movedEventMap[aindex] = set()
+        Without a timeout this call waits for a new event if there are not any waiting to be processed,
+        and processes just that one, stick handlers run once the rest of its batch has been processed too.
+        With a timeout every event arriving within timeout seconds is processed (up to maxEvents),
+        returning 0 if none arrived."""
+        if timeout is None:
+            timestamp, value, eventType, index = self._getNextEventRaw()
+            self.lastTimestamp = self.clock.unwrap(timestamp)
+            self._processEvent(value, eventType, index)
+            if self.pendingSticks and not self.pendingRawEvents:
+                self._flushSticks()
+            return 1
+        processed = 0
+        deadline = time.monotonic() + timeout
+        while processed < maxEvents:
+            remaining = max(deadline - time.monotonic(), 0.0)
+            rawEvents = self._readRawEvents(maxEvents - processed, remaining)
+            self._applyRawEvents(rawEvents)
+            processed += len(rawEvents)
+            if not rawEvents and remaining <= 0.0:
+                break
+        return processed
+
+    def _pump(self, timeout:float|None, maxEvents:int = 256) -> int:
+        """Processes the first batch of events arriving within timeout seconds, returning how many there were."""
+        rawEvents = self._readRawEvents(maxEvents, timeout)
+        self._applyRawEvents(rawEvents)
+        return len(rawEvents)
+
+    def _isUpdatingInBackground(self) -> bool:
+        return self.updateThread is not None and self.updateThread.running
 
     def startBackgroundUpdates(self, waitForReady = True):
         """Starts a background thread which keeps the gamepad state updated automatically.
@@ -369,8 +704,9 @@ class Gamepad:
 
         Throws ValueError if the button name or index cannot be found."""
         buttonIndex = self.getButtonIndex(buttonName)
-        if self.wasPressedMap[buttonIndex]:
-            self.wasPressedMap[buttonIndex] = False
+        presses = self.edgeMap[buttonIndex][0]
+        if presses != self.beenPressedCursors.get(buttonIndex, 0):
+            self.beenPressedCursors[buttonIndex] = presses
             return True
         else:
             return False
@@ -381,11 +717,51 @@ class Gamepad:
 
         Throws ValueError if the button name or index cannot be found."""
         buttonIndex = self.getButtonIndex(buttonName)
-        if self.wasReleasedMap[buttonIndex]:
-            self.wasReleasedMap[buttonIndex] = False
+        releases = self.edgeMap[buttonIndex][1]
+        if releases != self.beenReleasedCursors.get(buttonIndex, 0):
+            self.beenReleasedCursors[buttonIndex] = releases
             return True
         else:
             return False
+
+    def _buttonIndexOf(self, button:ButtonName|ButtonHandle) -> ButtonID:
+        if isinstance(button, ButtonHandle):
+            return button.index
+        return self.getButtonIndex(button)
+
+    def pressCountSince(self, button:ButtonName|ButtonHandle, cursor:int = 0) -> tuple[int,int]:
+        """Returns how many times a button has been pressed since cursor, along with the new cursor.
+
+        The button can be a name, an index or a handle from button.
+        Start with a cursor of 0 (or the cursor of an earlier call) and pass each returned cursor to the next call,
+        every consumer keeps its own cursor so nothing is lost between polls and nothing is shared.
+
+        Throws ValueError if the button name or index cannot be found."""
+        presses = self.edgeMap[self._buttonIndexOf(button)][0]
+        return presses - cursor, presses
+
+    def releaseCountSince(self, button:ButtonName|ButtonHandle, cursor:int = 0) -> tuple[int,int]:
+        """Returns how many times a button has been released since cursor, along with the new cursor.
+
+        Works the same way as pressCountSince.
+
+        Throws ValueError if the button name or index cannot be found."""
+        releases = self.edgeMap[self._buttonIndexOf(button)][1]
+        return releases - cursor, releases
+
+    def lastEdge(self, button:ButtonName|ButtonHandle) -> tuple[int,int,int]:
+        """Returns the press count, release count and timestamp (ms) of the last edge of a button, read atomically.
+
+        Throws ValueError if the button name or index cannot be found."""
+        return self.edgeMap[self._buttonIndexOf(button)]
+
+    def button(self, buttonName:ButtonName) -> ButtonHandle:
+        """Returns a handle for the button specified by name or index.
+
+        The name is resolved once, so reading state through the handle avoids the lookups done by isPressed / beenPressed.
+
+        Throws ValueError if the button name or index cannot be found."""
+        return ButtonHandle(self, self.getButtonIndex(buttonName))
 #endregion
     def getAxisIndex(self, axisName:AxisName) -> AxisID:
         axisIndex:AxisID
@@ -408,6 +784,95 @@ class Gamepad:
         Throws ValueError if the button name or index cannot be found."""
         return self.axisMap[self.getAxisIndex(axisName)]
 
+    def axis_handle(self, axisName:AxisName) -> AxisHandle:
+        """Returns a handle for the axis specified by name or index.
+
+        The name is resolved once, so reading the position through the handle avoids the lookups done by axis.
+
+        Throws ValueError if the axis name or index cannot be found."""
+        return AxisHandle(self, self.getAxisIndex(axisName))
+
+    def enablePrediction(self, axisName:AxisName, alpha:float = 0.9, beta:float = 0.4, stale:float = 50.0) -> AxisPredictor:
+        """Starts tracking the velocity of an axis specified by name or index for predict_axis, returning its predictor.
+
+        See prediction.AxisPredictor for the parameters, and analysis.prediction_error for tuning them on a capture.
+        The predictor is updated from the axis events, so it costs nothing while the axis is still."""
+        aindex = self.getAxisIndex(axisName)
+        with self.handlerLock:
+            predictor = self.axisPredictors.get(aindex)
+            if predictor is None:
+                predictor = AxisPredictor(alpha, beta, stale)
+                with self.stateLock:
+                    predictor.reset(None, self.axisMap.get(aindex, 0.0))
+                self.axisPredictors[aindex] = predictor
+                self._refreshInterest()
+        return predictor
+
+    def disablePrediction(self, axisName:AxisName):
+        """Stops tracking the velocity of an axis specified by name or index."""
+        aindex = self.getAxisIndex(axisName)
+        with self.handlerLock:
+            if self.axisPredictors.pop(aindex, None) is not None:
+                self._refreshInterest()
+
+    def predict_axis(self, axisName:AxisName, aheadMs:float = 0.0) -> Prediction:
+        """Returns the predicted position of an axis specified by name or index aheadMs milliseconds from now,
+        and its velocity in full deflections per second.
+
+        The prediction starts from the time of the newest event on the estimated kernel clock, so time the
+        events spent waiting to be read is made up for as well.
+
+        Throws ValueError if prediction was not enabled for the axis, see enablePrediction."""
+        aindex = self.getAxisIndex(axisName)
+        predictor = self.axisPredictors.get(aindex)
+        if predictor is None:
+            raise ValueError('Prediction is not enabled for axis %s' % axisName)
+        with self.stateLock:
+            if self.clock.offset is None or predictor.timestamp is None:
+                now = predictor.timestamp or 0
+            else:
+                now = self.clock.kernel_time(time.monotonic())
+            return predictor.predict(now, aheadMs)
+
+    def eventTime(self) -> float:
+        """Returns the current time in ms on the clock of event timestamps, as estimated from the events read,
+        for example to query the last 200 ms of a ControlHistory."""
+        if self.clock.offset is None:
+            return float(self.lastTimestamp)
+        return self.clock.kernel_time(time.monotonic())
+
+    def enableHistory(self, control, capacity:int = 1024) -> ControlHistory:
+        """Starts recording the last capacity events of a control (a name, index, handle or
+        virtual_controls.button / axis reference), returning its history for window queries.
+
+        Memory stays at 24 bytes per event of capacity however long the gamepad runs."""
+        kind, index = self._inputKey(control)
+        histories = self.buttonHistories if kind == BUTTON else self.axisHistories
+        with self.handlerLock:
+            history = histories.get(index)
+            if history is None:
+                history = histories[index] = ControlHistory(capacity, self.stateLock)
+                self._refreshInterest()
+        return history
+
+    def disableHistory(self, control):
+        """Stops recording the events of a control, dropping its history."""
+        kind, index = self._inputKey(control)
+        histories = self.buttonHistories if kind == BUTTON else self.axisHistories
+        with self.handlerLock:
+            if histories.pop(index, None) is not None:
+                self._refreshInterest()
+
+    def history(self, control) -> ControlHistory:
+        """Returns the history of a control, see enableHistory.
+
+        Throws ValueError if no history is being recorded for the control."""
+        kind, index = self._inputKey(control)
+        history = (self.buttonHistories if kind == BUTTON else self.axisHistories).get(index)
+        if history is None:
+            raise ValueError('History is not enabled for %s' % self._controlName((kind, index)))
+        return history
+
     def availableButtonNames(self):
         """Returns a list of available button names for this gamepad.
         An empty list means that no button mapping has been provided."""
@@ -418,6 +883,484 @@ class Gamepad:
         An empty list means that no axis mapping has been provided."""
         return self.axisIndex.keys()
 
+    def stick(self, stickName:str) -> Stick:
+        """Returns the stick with a name from stickPairs, reading its pair of axes with a radial deadzone.
+
+        The Stick is shared, so a deadzone set on it applies to every user and to stick handlers."""
+        stick = self.sticks.get(stickName)
+        if stick is None:
+            if stickName not in self.stickPairs:
+                raise ValueError('Stick name %s was not found' % stickName)
+            xName, yName = self.stickPairs[stickName]
+            stick = self.sticks.setdefault(stickName, Stick(stickName, self.getAxisIndex(xName), self.getAxisIndex(yName), self.axisMap))#type:ignore
+        return stick
+
+    def availableStickNames(self):
+        """Returns a list of available stick names for this gamepad."""
+        return self.stickPairs.keys()
+
+    def startCapture(self, captureFile:IO[bytes]):
+        """Starts copying every raw event read from the gamepad into captureFile.
+
+        The capture is a plain sequence of 'IhBB' js_event records which can be examined with the analysis module.
+        For long sessions pass an archive.ArchiveWriter instead, which compresses and indexes the events by time."""
+        self.captureFile = captureFile
+
+    def stopCapture(self):
+        """Stops copying raw events, the capture file is left open for the caller to close."""
+        self.captureFile = None
+
+    def startEventRing(self, capacity:int = 1024) -> EventRing:
+        """Starts keeping the last capacity button and axis events in a ring buffer and returns it.
+
+        Each consumer takes its own cursor from the ring (or eventCursor) and calls drain,
+        so several consumers can see every event without interfering with each other.
+        Calling this again keeps the existing ring."""
+        if self.eventRing is None:
+            self.eventRing = EventRing(capacity)
+            with self.handlerLock:
+                self._refreshInterest()
+        return self.eventRing
+
+    def eventCursor(self, fromStart:bool = False) -> RingCursor:
+        """Returns a new cursor into the event ring, starting it with the default capacity if needed."""
+        return self.startEventRing().cursor(fromStart)
+
+    def drain(self, cursor:RingCursor, maxEvents:int|None = None, until:int|None = None) -> list[Event]:
+        """Returns every event recorded since cursor as named Events and advances the cursor.
+
+        Events the ring overwrote before they were drained are counted in cursor.overruns."""
+        return self.startEventRing().drain(cursor, maxEvents, (self.buttonNames, self.axisNames), until, self.clock)
+
+    def snapshot(self) -> StateSnapshot:
+        """Returns a consistent copy of every button and axis state, safe to take while background updates run."""
+        with self.stateLock:
+            return StateSnapshot(
+                self.lastTimestamp,
+                0 if self.eventRing is None else self.eventRing.sequence,
+                self.pressedMap.copy(),
+                self.axisMap.copy(),
+                self.buttonIndex,
+                self.axisIndex
+            )
+
+    def _controlKeys(self, controls) -> set[tuple[EventKind,int]]:
+        keys:set[tuple[EventKind,int]] = set()
+        for control in controls:
+            if isinstance(control, ButtonHandle):
+                keys.add((BUTTON, control.index))
+            elif isinstance(control, AxisHandle):
+                keys.add((AXIS, control.index))
+            else:
+                found = False
+                if control in self.buttonIndex or isinstance(control, int):
+                    keys.add((BUTTON, self.getButtonIndex(control)))
+                    found = True
+                if control in self.axisIndex or isinstance(control, int):
+                    keys.add((AXIS, self.getAxisIndex(control)))
+                    found = True
+                if not found:
+                    raise ValueError('Control name %s was not found' % control)
+        return keys
+
+    def _controlName(self, control:tuple[EventKind,int]) -> InpName|InpID:
+        kind, index = control
+        if kind == BUTTON:
+            return self.buttonNames.get(index, index)#type:ignore
+        return self.axisNames.get(index, index)#type:ignore
+
+    def _refreshInterest(self):
+        """Recomputes which controls take the full event path, must be called with handlerLock held."""
+        stickAxes:dict[AxisID,Stick] = {}
+        for name in self.stickMovedEventMap:
+            stick = self.sticks[name]
+            stickAxes[stick.xIndex] = stickAxes[stick.yIndex] = stick#type:ignore
+        self.stickAxes = stickAxes
+        if self.watchAll or self.eventRing is not None:
+            self.hotButtons = self.hotAxes = None
+            return
+        buttons = set(self.pressedEventMap) | set(self.releasedEventMap) | set(self.changedEventMap) | set(self.gestureButtons) | set(self.buttonHistories)
+        axes = set(self.movedEventMap) | set(stickAxes) | set(self.axisTriggers) | set(self.axisPredictors) | set(self.axisHistories)
+        for kind, index in self.watchCounts:
+            (buttons if kind == BUTTON else axes).add(index)
+        self.hotButtons = frozenset(buttons)
+        self.hotAxes = frozenset(axes)
+
+    def watch(self, controls = None):
+        """Marks controls (names, indices or handles, None for all) as watched.
+
+        Events for controls without handlers take a fast path which only updates the button / axis state,
+        skipping change tracking for wait_for_change. Watched controls always take the full path.
+        Each watch should be paired with an unwatch of the same controls."""
+        self._watchKeys(None if controls is None else self._controlKeys(controls), 1)
+
+    def unwatch(self, controls = None):
+        """Undoes a watch of the same controls."""
+        self._watchKeys(None if controls is None else self._controlKeys(controls), -1)
+
+    def _watchKeys(self, keys:set[tuple[EventKind,int]]|None, change:int):
+        with self.handlerLock:
+            if keys is None:
+                self.watchAll = max(self.watchAll + change, 0)
+            else:
+                for key in keys:
+                    count = self.watchCounts.get(key, 0) + change
+                    if count > 0:
+                        self.watchCounts[key] = count
+                    else:
+                        self.watchCounts.pop(key, None)
+            self._refreshInterest()
+
+    def wait_for_change(self, controls = None, timeout:float|None = None) -> set[InpName|InpID]:
+        """Waits until a button or axis changes and returns the names of everything which changed.
+
+        controls limits the wait to the given names, indices or handles, None waits for any control.
+        Returns an empty set if timeout seconds pass first, None waits forever.
+        With background updates running this sleeps on a condition signalled by the update thread,
+        otherwise events are read from the gamepad while waiting.
+
+        Throws an IOError if the gamepad is disconnected"""
+        keys = None if controls is None else self._controlKeys(controls)
+        self._watchKeys(keys, 1)
+        try:
+            return self._waitForChange(keys, timeout)
+        finally:
+            self._watchKeys(keys, -1)
+
+    def _waitForChange(self, keys:set[tuple[EventKind,int]]|None, timeout:float|None) -> set[InpName|InpID]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.stateLock:
+            start = self.generation
+        while True:
+            with self.stateLock:
+                seen = self.generation
+                changed = self._changedAfter(start, keys)
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0.0:
+                return set()
+            if not self.connected:
+                raise IOError('Gamepad has been disconnected')
+            if self._isUpdatingInBackground():
+                with self.changeCondition:
+                    if self.generation == seen:
+                        self.changeWaiters += 1
+                        try:
+                            # Wake up now and then in case the update thread stops
+                            self.changeCondition.wait(0.5 if remaining is None else min(remaining, 0.5))
+                        finally:
+                            self.changeWaiters -= 1
+            else:
+                self._pump(remaining)
+
+    def _changedAfter(self, start:int, keys:set[tuple[EventKind,int]]|None) -> set[InpName|InpID]:
+        """Returns the names of the controls in keys (None for all) changed after generation start,
+        must be called with stateLock held."""
+        changed = []
+        if self.generation != start:
+            for control, generation in reversed(self.changeGenerations.items()):
+                if generation <= start:
+                    break
+                if keys is None or control in keys:
+                    changed.append(control)
+        return set(map(self._controlName, changed))
+
+    def _trackChanges(self, keys:set[tuple[EventKind,int]]|None):
+        """Takes controls off the fast path for good so every change to them gets a generation."""
+        if self.trackingAll or (keys is not None and keys <= self.trackedKeys):
+            return
+        if keys is None:
+            self.trackingAll = True
+            self._watchKeys(None, 1)
+        else:
+            keys = keys - self.trackedKeys
+            self.trackedKeys |= keys
+            self._watchKeys(keys, 1)
+        with self.stateLock:
+            # Changes made on the fast path before now were not recorded
+            known = [(BUTTON, index) for index in self.pressedMap] + [(AXIS, index) for index in self.axisMap]
+            for control in known:
+                if control not in self.changeGenerations and (keys is None or control in keys):
+                    self._markChanged(control)
+
+    def changed_since(self, generation:int = 0, controls = None) -> tuple[int,dict[ButtonID,bool],dict[AxisID,float]]:
+        """Returns the current generation and the buttons and axes (by index) which changed after generation, with their values.
+
+        Pass the returned generation to the next call to get only what changed in between, 0 gets every control.
+        controls limits the result to the given names, indices or handles.
+        The controls asked about are tracked from the first call on, which takes them off the fast path (see watch).
+        The work done is proportional to the number of changed controls, not the number of controls."""
+        keys = None if controls is None else self._controlKeys(controls)
+        self._trackChanges(keys)
+        buttons:dict[ButtonID,bool] = {}
+        axes:dict[AxisID,float] = {}
+        with self.stateLock:
+            current = self.generation
+            for control, controlGeneration in reversed(self.changeGenerations.items()):
+                if controlGeneration <= generation:
+                    break
+                if keys is None or control in keys:
+                    kind, index = control
+                    if kind == BUTTON:
+                        buttons[index] = self.pressedMap[index]#type:ignore
+                    else:
+                        axes[index] = self.axisMap[index]#type:ignore
+        return current, buttons, axes
+
+    def version(self, control) -> int:
+        """Returns the generation of the last change to a control specified by name, index or handle, 0 if never seen changing.
+
+        Like changed_since the control is tracked from the first call on, so later changes always move its version."""
+        keys = self._controlKeys([control])
+        self._trackChanges(keys)
+        with self.stateLock:
+            return max(self.changeGenerations.get(key, 0) for key in keys)
+
+    async def wait_for_change_async(self, controls = None, timeout:float|None = None) -> set[InpName|InpID]:
+        """asyncio version of wait_for_change.
+
+        With background updates running the update thread wakes the task through the event loop,
+        otherwise the gamepad is read (and its handlers run) on the event loop whenever it has data.
+        Cancelling the task ends the wait cleanly.
+
+        Throws an IOError if the gamepad is disconnected"""
+        keys = None if controls is None else self._controlKeys(controls)
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+        waiter = (loop, woken)
+        fd = None if isinstance(self.joystickPoll, ReadyPoll) else self.joystickFile.fileno()
+        reading = False
+        self._watchKeys(keys, 1)
+        try:
+            with self.stateLock:
+                start = self.generation
+                self.asyncWaiters = self.asyncWaiters + [waiter]
+            async with asyncio.timeout(timeout):
+                while True:
+                    with self.stateLock:
+                        changed = self._changedAfter(start, keys)
+                    if changed:
+                        return changed
+                    if not self.connected:
+                        raise IOError('Gamepad has been disconnected')
+                    background = self._isUpdatingInBackground()
+                    if not background and (fd is None or self.pendingRawEvents or self.joystickPoll.poll(0)):
+                        self._pump(0.0)
+                        if fd is None:
+                            # Nothing to wait on, give the rest of the loop a turn between reads
+                            await asyncio.sleep(0)
+                        continue
+                    if background == reading and fd is not None:
+                        # Read from the loop only while no update thread does
+                        if reading:
+                            loop.remove_reader(fd)
+                        else:
+                            loop.add_reader(fd, woken.set)
+                        reading = not reading
+                    woken.clear()
+                    if background:
+                        try:
+                            # Wake up now and then in case the update thread stops
+                            await asyncio.wait_for(woken.wait(), 0.5)
+                        except TimeoutError:
+                            pass
+                    else:
+                        await woken.wait()
+        except TimeoutError:
+            return set()
+        finally:
+            if reading:
+                loop.remove_reader(fd)#type:ignore
+            with self.stateLock:
+                self.asyncWaiters = [other for other in self.asyncWaiters if other is not waiter]
+            self._watchKeys(keys, -1)
+
+    def startSampler(self, rate:float, callback:SampleCallback) -> Sampler:
+        """Starts a background thread calling callback(snapshot, events) rate times a second and returns it.
+
+        Ticks follow absolute deadlines so timing errors do not accumulate, events holds every event since
+        the previous tick and the returned Sampler's stats report jitter and missed deadlines.
+        Call stop on the Sampler to end it."""
+        sampler = Sampler(self, rate, callback)
+        sampler.start()
+        return sampler
+
+    def backlog(self) -> int:
+        """Returns how many events are waiting to be processed, or -1 if the device cannot report it.
+
+        This counts events already read with an earlier batch as well as those in the device.
+        joydev does not answer FIONREAD, so a device with data waiting reports -1, an idle one its exact backlog."""
+        if not hasattr(self, 'joystickFile'):
+            return -1
+        held = len(self.pendingRawEvents)
+        pending = array.array('i', [0])
+        try:
+            ioctl(self.joystickFile, termios.FIONREAD, pending)
+        except (OSError, ValueError, TypeError):
+            if self.joystickPoll.poll(0):
+                return -1
+            return held
+        return held + (pending[0] + len(self.partialEvent)) // self.eventSize
+
+    def metricLabels(self) -> dict[str,str]:
+        return {'device' : self.joystickNumber, 'controller' : self.fullName}
+
+    def metricsDict(self) -> dict[str,float]:
+        """Returns the runtime counters (events by type, bytes and reads, resyncs, disconnects, handler calls and errors) and backlog."""
+        return self.metrics.as_dict()
+
+    def metricsText(self) -> str:
+        """Returns the runtime metrics in Prometheus text format."""
+        return format_prometheus([(self.metricLabels(), self.metrics)])
+
+    def writeMetrics(self, path:str):
+        """Atomically writes the runtime metrics in Prometheus text format to path."""
+        write_prometheus(path, [(self.metricLabels(), self.metrics)])
+
+    def serveMetrics(self, socketPath:str) -> MetricsServer:
+        """Starts serving the runtime metrics in Prometheus text format on a Unix socket and returns the server thread."""
+        server = MetricsServer(socketPath, lambda: [(self.metricLabels(), self.metrics)])
+        server.start()
+        return server
+
+#region virtual control code
+    def _inputKey(self, input) -> tuple[EventKind,int]:
+        if isinstance(input, tuple):
+            kind, control = input
+            if kind == BUTTON:
+                return BUTTON, self.getButtonIndex(control)
+            return AXIS, self.getAxisIndex(control)
+        keys = self._controlKeys([input])
+        if len(keys) != 1:
+            raise ValueError('Control %r is both a button and an axis, use virtual_controls.button or axis' % (input,))
+        return next(iter(keys))
+
+    def _inputValues(self, inputs:tuple[tuple[EventKind,int],...]) -> list:
+        return [self.pressedMap.get(index, False) if kind == BUTTON else self.axisMap.get(index, 0.0) for kind, index in inputs]#type:ignore
+
+    def _updateVirtual(self, bindings):
+        """Recomputes virtual controls after an input changed, applying any new value like a real event."""
+        for control, kind, index, inputs in bindings:
+            if kind == BUTTON:
+                previous = self.pressedMap.get(index)
+                value = control.compute(self._inputValues(inputs), previous)
+                if value != previous:
+                    self._applyButton(index, value)
+            else:
+                previous = self.axisMap.get(index)
+                value = control.compute(self._inputValues(inputs), previous)
+                if value != previous:
+                    self._applyAxis(index, value)
+
+    def addVirtualControl(self, control:VirtualControl) -> int:
+        """Adds a virtual button or axis computed from other controls and returns its index.
+
+        The control is only recomputed when one of its inputs changes, after which it can be used by name like
+        any real control: axis / isPressed, handlers, handles, snapshots, the event ring and wait_for_change.
+        Changes to it are not part of the events returned by getEvents. See virtual_controls."""
+        inputs = tuple(self._inputKey(input) for input in control.inputs)
+        if control.name in (self.buttonIndex if control.kind == BUTTON else self.axisIndex):
+            raise ValueError('There is already a control named %s' % control.name)
+        with self.handlerLock:
+            index = self.nextVirtualIndex
+            self.nextVirtualIndex += 1
+        key = (control.kind, index)
+        value = control.compute(self._inputValues(inputs), None)
+        with self.stateLock:
+            if control.kind == BUTTON:
+                self.buttonNames[index] = control.name#type:ignore
+                self.buttonIndex[control.name] = index#type:ignore
+                self.edgeMap[index] = (0, 0, self.lastTimestamp)#type:ignore
+                self.pressedMap[index] = value#type:ignore
+            else:
+                self.axisNames[index] = control.name#type:ignore
+                self.axisIndex[control.name] = index#type:ignore
+                self.axisMap[index] = value#type:ignore
+            self._markChanged(key)
+        binding = (control, control.kind, index, inputs)
+        with self.handlerLock:
+            self.virtualControls[key] = binding
+            for input in set(inputs):
+                self.virtualDependents[input] = self.virtualDependents.get(input, ()) + (binding,)
+        # The inputs have to take the full event path for changes to reach the virtual control
+        self._watchKeys(set(inputs), 1)
+        return index
+
+    def removeVirtualControl(self, name:str):
+        """Removes a virtual control by name, handlers on it are left in place but never called again."""
+        for key, binding in list(self.virtualControls.items()):
+            if binding[0].name == name:
+                break
+        else:
+            raise ValueError('Virtual control %s was not found' % name)
+        kind, index = key
+        inputs = binding[3]
+        with self.handlerLock:
+            del self.virtualControls[key]
+            for input in set(inputs):
+                remaining = tuple(existing for existing in self.virtualDependents.get(input, ()) if existing is not binding)
+                if remaining:
+                    self.virtualDependents[input] = remaining
+                else:
+                    self.virtualDependents.pop(input, None)
+        self._watchKeys(set(inputs), -1)
+        with self.stateLock:
+            if kind == BUTTON:
+                del self.buttonIndex[self.buttonNames.pop(index)]#type:ignore
+                self.pressedMap.pop(index, None)#type:ignore
+                self.edgeMap.pop(index, None)#type:ignore
+            else:
+                del self.axisIndex[self.axisNames.pop(index)]#type:ignore
+                self.axisMap.pop(index, None)#type:ignore
+            self.changeGenerations.pop(key, None)
+#endregion
+#region calibration code
+    def getCorrection(self) -> list[AxisCorrection]:
+        """Returns the kernel correction (deadzone and scaling) currently applied to each axis, by axis index."""
+        return self.joystickIoctl.get_correction()
+
+    def setCorrection(self, corrections:list[AxisCorrection]):
+        """Sets the kernel correction of every axis, by axis index.
+
+        The correction in place before the first change is remembered for restoreCorrection."""
+        if self.originalCorrection is None:
+            self.originalCorrection = self.getCorrection()
+        self.joystickIoctl.set_correction(corrections)
+
+    def setDeadzones(self, deadzones:dict[AxisName,float]):
+        """Sets a kernel deadzone, as a fraction of the half axis, for each axis specified by name or index.
+
+        The driver scales the remaining travel back to the full range and drops any event which
+        does not change the corrected value, so jitter inside the deadzone never reaches this process.
+        Axes not mentioned keep their current correction.
+
+        Throws ValueError if an axis name or index cannot be found or has no broken line correction to adjust."""
+        corrections = self.getCorrection()
+        for axisName, deadzone in deadzones.items():
+            axisIndex = self.getAxisIndex(axisName)
+            if axisIndex >= len(corrections):
+                raise ValueError('Axis %s has no kernel correction' % axisName)
+            corrections[axisIndex] = corrections[axisIndex].with_deadzone(deadzone)
+        self.setCorrection(corrections)
+
+    def applyDefaultDeadzones(self):
+        """Sets the kernel deadzones listed in axisDeadzones for this controller type."""
+        if self.axisDeadzones:
+            self.setDeadzones(self.axisDeadzones)#type:ignore
+
+    def saveCorrection(self, path:str):
+        """Saves the current kernel correction of every axis to a JSON file."""
+        save_correction(path, self.getCorrection())
+
+    def restoreCorrection(self, path:str|None = None):
+        """Restores the kernel correction saved in a file by saveCorrection,
+        or without a path the correction in place before this gamepad first changed it."""
+        if path is not None:
+            self.setCorrection(load_correction(path))
+        elif self.originalCorrection is not None:
+            self.joystickIoctl.set_correction(self.originalCorrection)
+#endregion
     def isConnected(self) -> bool:
         """Returns True until reading from the device fails."""
         return self.connected
@@ -457,29 +1400,155 @@ class Gamepad:
     def removeAxisMovedHandler(self, axisName:AxisName, callback:Callable[[float],None]):
         """Removes a callback for when a specific axis specified by name or index changes."""
         self._interact_handler(self.getAxisIndex(axisName),callback,self.movedEventMap,False)
-    def _interact_handler[Index,CallType](self,index:Index,callback:CallType,event_map:dict[Index,set[CallType]],add:bool):
-        if not index in event_map:
-            event_map[index] = set()
-        if add:
-            event_map[index].add(callback)
-        else:
-            event_map[index].difference_update({callback})
+    def addStickMovedHandler(self, stickName:str, callback:Callable[[float,float,float,float],None]):
+        """Adds a callback for when a stick specified by name moves.
+        This callback gets the x, y, magnitude and angle of the stick (see sticks.StickState) after its deadzone,
+        once per batch of events however many of its axes changed, and only when the result changed."""
+        self.stick(stickName)
+        self._interact_handler(stickName,callback,self.stickMovedEventMap,True)
+
+    def removeStickMovedHandler(self, stickName:str, callback:Callable[[float,float,float,float],None]):
+        """Removes a callback for when a stick specified by name moves."""
+        self._interact_handler(stickName,callback,self.stickMovedEventMap,False)
+
+    def addAxisTrigger(self, axisName:AxisName, trigger:Trigger):
+        """Adds a triggers.Threshold or triggers.Zones to an axis specified by name or index.
+
+        Its callbacks run only when the axis crosses one of its boundaries, found with a bisect over the
+        boundaries of every trigger on the axis rather than by testing each trigger."""
+        aindex = self.getAxisIndex(axisName)
+        with self.handlerLock:
+            existing = self.axisTriggers.get(aindex)
+            triggers = existing.triggers if existing is not None else ()
+            if trigger not in triggers:
+                self.axisTriggers[aindex] = TriggerIndex(triggers + (trigger,))
+            self._refreshInterest()
+
+    def removeAxisTrigger(self, axisName:AxisName, trigger:Trigger):
+        """Removes a trigger from an axis specified by name or index."""
+        aindex = self.getAxisIndex(axisName)
+        with self.handlerLock:
+            existing = self.axisTriggers.get(aindex)
+            if existing is None or trigger not in existing.triggers:
+                return
+            remaining = tuple(other for other in existing.triggers if other is not trigger)
+            if remaining:
+                self.axisTriggers[aindex] = TriggerIndex(remaining)
+            else:
+                del self.axisTriggers[aindex]
+            self._refreshInterest()
+
+    def addLongPressHandler(self, buttonName:ButtonName, callback:Callable[[],None], delay:float = 0.5):
+        """Adds a callback for when a specific button specified by name or index is held for delay seconds.
+
+        Gesture callbacks run from the reading methods (getEvents, updateState or the background thread),
+        which wake up for them, so they are late by at most the time spent between reads."""
+        bindex = self.getButtonIndex(buttonName)
+        with self.handlerLock:
+            self.gestures.add_long_press(bindex, callback, round(delay * 1000))
+            self._refreshInterest()
+
+    def addDoubleTapHandler(self, buttonName:ButtonName, callback:Callable[[],None], window:float = 0.3):
+        """Adds a callback for when a specific button specified by name or index is pressed twice within window seconds."""
+        bindex = self.getButtonIndex(buttonName)
+        with self.handlerLock:
+            self.gestures.add_double_tap(bindex, callback, round(window * 1000))
+            self._refreshInterest()
+
+    def addRepeatHandler(self, buttonName:ButtonName, callback:Callable[[],None], delay:float = 0.5, interval:float = 0.1):
+        """Adds a callback which repeats every interval seconds while a specific button specified by name or index
+        is held, starting delay seconds after it was pressed."""
+        bindex = self.getButtonIndex(buttonName)
+        with self.handlerLock:
+            self.gestures.add_repeat(bindex, callback, round(delay * 1000), round(interval * 1000))
+            self._refreshInterest()
+
+    def removeGestureHandler(self, buttonName:ButtonName, callback:Callable[[],None]):
+        """Removes a long press, double tap or repeat callback from a specific button specified by name or index."""
+        bindex = self.getButtonIndex(buttonName)
+        with self.handlerLock:
+            self.gestures.remove(bindex, callback)
+            self._refreshInterest()
+
+    def _interact_handler[Index,CallType](self,index:Index,callback:CallType,event_map:dict[Index,tuple[CallType,...]],add:bool):
+        """Adds or removes a handler by swapping in a new tuple, handlers run in the order they were added.
+
+        Safe from any thread, including from inside a handler, the change applies from the next event."""
+        with self.handlerLock:
+            callbacks = event_map.get(index, ())
+            if add:
+                if callback not in callbacks:
+                    event_map[index] = callbacks + (callback,)
+            elif callback in callbacks:
+                remaining = tuple(existing for existing in callbacks if existing != callback)
+                if remaining:
+                    event_map[index] = remaining
+                else:
+                    del event_map[index]
+            self._refreshInterest()
+
+    def enableProfiler(self, budget:float = 0.002, warn:bool = True, onSlow = None) -> HandlerProfiler:
+        """Starts timing every event handler call and returns the profiler.
+
+        Handlers taking longer than budget seconds raise a RuntimeWarning when warn is set and are passed to
+        onSlow(event, index, callback, elapsed) when given. See handler_stats for the results.
+        While disabled the only cost is one attribute check per dispatched event."""
+        self.profiler = HandlerProfiler(budget, warn, onSlow)
+        return self.profiler
+
+    def disableProfiler(self):
+        """Stops timing event handlers, the last results stay available from the profiler object."""
+        self.profiler = None
+
+    def handler_stats(self) -> list[dict]:
+        """Returns a report of every profiled handler, slowest total time first.
+
+        Each entry has the event ('pressed', 'released', 'changed', 'moved', 'trigger', 'stick', 'long_press', 'double_tap'
+        or 'repeat'), the control name, the handler name,
+        the number of calls, the total, mean and max time in seconds, the number of slow calls and the time histogram
+        (see profiler.bucket_bounds)."""
+        if self.profiler is None:
+            return []
+        report = []
+        for (event, index, callback), stats in list(self.profiler.stats.items()):
+            if event in ('moved', 'trigger'):
+                control = self.axisNames.get(index, index)#type:ignore
+            elif event == 'stick':
+                control = next((name for name, stick in self.sticks.items() if stick.xIndex == index), index)
+            else:
+                control = self.buttonNames.get(index, index)#type:ignore
+            report.append({
+                'event' : event,
+                'control' : control,
+                'handler' : handler_name(callback),
+                'calls' : stats.calls,
+                'total' : stats.totalTime,
+                'mean' : stats.meanTime(),
+                'max' : stats.maxTime,
+                'slow' : stats.slowCalls,
+                'histogram' : list(stats.histogram)
+            })
+        report.sort(key = lambda entry: entry['total'], reverse = True)
+        return report
 
     def removeAllEventHandlers(self):
         """Removes all event handlers from all axes and buttons."""
-        for index in self.pressedEventMap.keys():
-            self.pressedEventMap[index] = set()
-        for index in self.releasedEventMap.keys():
-            self.releasedEventMap[index] = set()
-        for index in self.changedEventMap.keys():
-            self.changedEventMap[index] = set()
-        for index in self.movedEventMap.keys():
-            self.movedEventMap[index] = set()
+        with self.handlerLock:
+            self.pressedEventMap.clear()
+            self.releasedEventMap.clear()
+            self.changedEventMap.clear()
+            self.movedEventMap.clear()
+            self.stickMovedEventMap.clear()
+            self.axisTriggers.clear()
+            self.gestures.clear()
+            self._refreshInterest()
 #endregion
     def disconnect(self):
         """Cleanly disconnect and remove any threads and event handlers."""
         self.connected = False
         self.removeAllEventHandlers()
         self.stopBackgroundUpdates()
+        # joystickIoctl holds the file as well, so dropping this reference alone would leave it open
+        self.joystickFile.close()
         del self.joystickFile
 
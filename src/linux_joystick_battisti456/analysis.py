@@ -0,0 +1,270 @@
+"""Offline analysis of captured joystick sessions.
+
+A capture is simply a stream of raw 'IhBB' js_event records, as produced by
+Gamepad.startCapture or by copying /dev/input/jsN to a file. The records are
+split into columns with strided memoryview casts, so the heavy lifting happens
+in C rather than in a per-event Python loop."""
+from typing import NamedTuple, Iterable
+from operator import mul, sub
+from bisect import bisect_right
+
+import math
+import struct
+
+from .prediction import AxisPredictor
+
+EVENT_SIZE = struct.calcsize('IhBB')
+EVENT_CODE_BUTTON = 0x01
+EVENT_CODE_AXIS = 0x02
+EVENT_CODE_INIT = 0x80
+MAX_AXIS = 32767.0
+
+type Control = tuple[int,int]
+
+class Capture:
+    """Column decoded capture, one list per js_event field.
+
+    controls holds index << 8 | event code for every event, which is what the per control analyses group by."""
+    __slots__ = ('timestamps', 'values', 'types', 'indices', 'controls', '_groups')
+    def __init__(self, timestamps:list[int], values:list[int], types:list[int], indices:list[int], controls:list[int]):
+        self.timestamps = timestamps
+        self.values = values
+        self.types = types
+        self.indices = indices
+        self.controls = controls
+        self._groups:dict[Control,list[int]]|None = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def groups(self) -> dict[Control,list[int]]:
+        """Returns the positions of the non init events for each (event code, index) control, in capture order."""
+        if self._groups is None:
+            controls = self.controls
+            order = sorted(range(len(controls)), key = controls.__getitem__)
+            sortedControls = list(map(controls.__getitem__, order))
+            groups:dict[Control,list[int]] = {}
+            start = 0
+            while start < len(order):
+                control = sortedControls[start]
+                end = bisect_right(sortedControls, control, start)
+                if control & 0xFF in (EVENT_CODE_BUTTON, EVENT_CODE_AXIS):
+                    groups[(control & 0xFF, control >> 8)] = order[start:end]
+                start = end
+            self._groups = groups
+        return self._groups
+
+class AxisNoise(NamedTuple):
+    samples:int
+    mean:float
+    stddev:float
+    jitter:float
+    peak:float
+
+class ButtonTiming(NamedTuple):
+    presses:int
+    durations:list[int]
+    doublePressIntervals:list[int]
+
+class Gap(NamedTuple):
+    start:int
+    length:int
+    resync:bool
+
+class PredictionError(NamedTuple):
+    samples:int
+    mean:float
+    rms:float
+    max:float
+    holdRms:float
+
+def load_capture(data:bytes|bytearray|memoryview|str) -> Capture:
+    """Decodes a capture given as raw bytes or as the path of a capture file.
+
+    A trailing partial record (for example from a capture cut off mid write) is ignored."""
+    if isinstance(data, str):
+        with open(data, 'rb') as file:
+            data = file.read()
+    view = memoryview(data).cast('B')
+    view = view[:len(view) - len(view) % EVENT_SIZE]
+    return Capture(
+        view.cast('I')[0::2].tolist(),
+        view.cast('h')[2::4].tolist(),
+        view[6::8].tolist(),
+        view[7::8].tolist(),
+        view.cast('H')[3::4].tolist() if struct.pack('=H', 1) == b'\x01\x00' else
+            [i << 8 | t for t, i in zip(view[6::8].tolist(), view[7::8].tolist())]
+    )
+
+def duration(capture:Capture) -> float:
+    """Returns the time covered by the non init events of the capture in seconds."""
+    types = capture.types
+    first = next((position for position, code in enumerate(types) if not code & EVENT_CODE_INIT), None)
+    last = next((position for position in range(len(types) - 1, -1, -1) if not types[position] & EVENT_CODE_INIT), None)
+    if first is None or last is None or first == last:
+        return 0.0
+    return ((capture.timestamps[last] - capture.timestamps[first]) & 0xFFFFFFFF) / 1000.0
+
+def event_rates(capture:Capture) -> dict[Control,float]:
+    """Returns the average number of events per second for each control."""
+    seconds = duration(capture)
+    if seconds <= 0:
+        return {}
+    return {control : len(positions) / seconds for control, positions in capture.groups().items()}
+
+def axis_noise(capture:Capture, restThreshold:float = 0.15) -> dict[int,AxisNoise]:
+    """Measures the noise of each axis while it is at rest.
+
+    An axis is considered at rest whenever its magnitude is below restThreshold (as a fraction of full scale).
+    jitter is the mean absolute change between consecutive resting samples and peak is the largest resting magnitude,
+    all expressed as fractions of full scale."""
+    limit = restThreshold * MAX_AXIS
+    result:dict[int,AxisNoise] = {}
+    for (code, index), positions in capture.groups().items():
+        if code != EVENT_CODE_AXIS:
+            continue
+        values = [v for v in map(capture.values.__getitem__, positions) if -limit < v < limit]
+        count = len(values)
+        if count == 0:
+            result[index] = AxisNoise(0, 0.0, 0.0, 0.0, 0.0)
+            continue
+        mean = sum(values) / count
+        variance = max(sum(map(mul, values, values)) / count - mean * mean, 0.0)
+        if count > 1:
+            jitter = sum(map(abs, map(sub, values[1:], values[:-1]))) / (count - 1)
+        else:
+            jitter = 0.0
+        peak = max(max(values), -min(values))
+        result[index] = AxisNoise(
+            count,
+            mean / MAX_AXIS,
+            math.sqrt(variance) / MAX_AXIS,
+            jitter / MAX_AXIS,
+            peak / MAX_AXIS
+        )
+    return result
+
+def suggest_deadzones(capture:Capture, restThreshold:float = 0.15, margin:float = 1.25, noise:dict[int,AxisNoise]|None = None) -> dict[int,float]:
+    """Suggests a deadzone for each axis which covers its resting noise with some margin.
+
+    A result from axis_noise can be passed in to avoid measuring the noise twice.
+    Axes which never came to rest are left out."""
+    if noise is None:
+        noise = axis_noise(capture, restThreshold)
+    return {
+        index : min(axisNoise.peak * margin, restThreshold)
+        for index, axisNoise in noise.items() if axisNoise.samples > 0
+    }
+
+def button_timing(capture:Capture, doublePressWindow:int = 500) -> dict[int,ButtonTiming]:
+    """Returns the press durations and double press intervals, in ms, of each button.
+
+    A double press interval is the time between two consecutive presses when it is within doublePressWindow."""
+    result:dict[int,ButtonTiming] = {}
+    for (code, index), positions in capture.groups().items():
+        if code != EVENT_CODE_BUTTON:
+            continue
+        timestamps = list(map(capture.timestamps.__getitem__, positions))
+        values = list(map(capture.values.__getitem__, positions))
+        presses = [t for t, v in zip(timestamps, values) if v]
+        durations:list[int] = []
+        pressedAt = None
+        for t, v in zip(timestamps, values):
+            if v:
+                if pressedAt is None:
+                    pressedAt = t
+            elif pressedAt is not None:
+                durations.append((t - pressedAt) & 0xFFFFFFFF)
+                pressedAt = None
+        intervals = [d for d in ((b - a) & 0xFFFFFFFF for a, b in zip(presses, presses[1:])) if d <= doublePressWindow]
+        result[index] = ButtonTiming(len(presses), durations, intervals)
+    return result
+
+def find_gaps(capture:Capture, minGap:int = 100) -> list[Gap]:
+    """Finds suspicious breaks in the event stream.
+
+    The joystick driver re-sends init events when a reader falls far enough behind that its buffer overflows,
+    so any init event after the start of the capture is reported as a resync gap. Plain gaps of at least minGap ms
+    are reported too, they only suggest an overflow when the controller was expected to be busy."""
+    timestamps = capture.timestamps
+    gaps:list[Gap] = []
+    if len(timestamps) < 2:
+        return gaps
+    types = capture.types
+    initPositions = [position for position, code in enumerate(types) if code & EVENT_CODE_INIT]
+    for position in initPositions:
+        if position > 0 and not types[position - 1] & EVENT_CODE_INIT:
+            previous = timestamps[position - 1]
+            gaps.append(Gap(previous, (timestamps[position] - previous) & 0xFFFFFFFF, True))
+    for position, delta in enumerate(map(sub, timestamps[1:], timestamps[:-1])):
+        if delta & 0xFFFFFFFF >= minGap and not types[position + 1] & EVENT_CODE_INIT:
+            gaps.append(Gap(timestamps[position], delta & 0xFFFFFFFF, False))
+    gaps.sort()
+    return gaps
+
+def _unwrapped(timestamps:list[int]) -> list[int]:
+    unwrapped = timestamps[:1]
+    for delta in map(sub, timestamps[1:], timestamps[:-1]):
+        unwrapped.append(unwrapped[-1] + (delta & 0xFFFFFFFF))
+    return unwrapped
+
+def prediction_error(capture:Capture, aheadMs:float = 45.0, alpha:float = 0.9, beta:float = 0.4, stale:float = 50.0) -> dict[int,PredictionError]:
+    """Replays each axis through an AxisPredictor and measures how far its prediction aheadMs after every event
+    was from the position the axis actually reported at that time, as fractions of full scale.
+
+    holdRms is the error of assuming the axis stays where it is, which the prediction should beat.
+    Events whose target time is past the end of the capture are left out."""
+    result:dict[int,PredictionError] = {}
+    for (code, index), positions in capture.groups().items():
+        if code != EVENT_CODE_AXIS:
+            continue
+        timestamps = _unwrapped(list(map(capture.timestamps.__getitem__, positions)))
+        values = [value / MAX_AXIS for value in map(capture.values.__getitem__, positions)]
+        predictor = AxisPredictor(alpha, beta, stale)
+        end = timestamps[-1]
+        errors:list[float] = []
+        holdErrors:list[float] = []
+        for position, (timestamp, value) in enumerate(zip(timestamps, values)):
+            predictor.update(timestamp, value)
+            target = timestamp + aheadMs
+            if target > end:
+                break
+            actual = values[bisect_right(timestamps, target, position) - 1]
+            errors.append(predictor.predict(timestamp, aheadMs).value - actual)
+            holdErrors.append(value - actual)
+        count = len(errors)
+        if count == 0:
+            result[index] = PredictionError(0, 0.0, 0.0, 0.0, 0.0)
+            continue
+        result[index] = PredictionError(
+            count,
+            sum(map(abs, errors)) / count,
+            math.sqrt(sum(map(mul, errors, errors)) / count),
+            max(map(abs, errors)),
+            math.sqrt(sum(map(mul, holdErrors, holdErrors)) / count)
+        )
+    return result
+
+def _named(names:dict|None, items:Iterable[tuple[int,object]]) -> dict:
+    if not names:
+        return dict(items)
+    return {names.get(index, index) : value for index, value in items}
+
+def analyse(capture:Capture|bytes|str, buttonNames:dict|None = None, axisNames:dict|None = None) -> dict:
+    """Runs every analysis over a capture and returns a report keyed by control name where names are known.
+
+    buttonNames and axisNames can be taken from a Gamepad (or Controllers class) instance."""
+    if not isinstance(capture, Capture):
+        capture = load_capture(capture)
+    rates = event_rates(capture)
+    noise = axis_noise(capture)
+    return {
+        'events' : len(capture.timestamps),
+        'duration' : duration(capture),
+        'buttonRates' : _named(buttonNames, ((i, r) for (c, i), r in rates.items() if c == EVENT_CODE_BUTTON)),
+        'axisRates' : _named(axisNames, ((i, r) for (c, i), r in rates.items() if c == EVENT_CODE_AXIS)),
+        'axisNoise' : _named(axisNames, noise.items()),
+        'deadzones' : _named(axisNames, suggest_deadzones(capture, noise = noise).items()),
+        'buttonTiming' : _named(buttonNames, button_timing(capture).items()),
+        'gaps' : find_gaps(capture)
+    }
@@ -0,0 +1,340 @@
+"""An indexed, compressed format for long captures, see ArchiveWriter and ArchiveReader.
+
+Events are stored in chunks of up to chunkEvents events (or chunkMs of time). Each chunk starts with a
+checkpoint of the value of every control seen so far, followed by its events as columns: event types,
+indices, timestamp deltas and per control value deltas, the last two as variable length integers, and the
+whole chunk is zlib compressed. An index of every chunk's time span and file offset is written at the end
+when the archive is closed, and an archive cut short (for example by a crash) is read by walking the chunk
+headers instead, losing only the chunk being written.
+
+The reader memory maps the file and decodes only the chunks a query touches: the state at any time is its
+chunk's checkpoint plus the chunk's events up to that time.
+
+    writer = ArchiveWriter('session.ljsa')
+    gamepad.startCapture(writer)
+    ...
+    gamepad.stopCapture()
+    writer.close()
+    with ArchiveReader('session.ljsa') as reader:
+        state = reader.state_at(incidentTime)
+        gamepad = Gamepad(source = reader.replay(incidentTime - 5000, incidentTime + 5000))
+"""
+from typing import Iterator, Self
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+
+import mmap
+import struct
+import zlib
+
+from .clock import EventClock
+from .events import StateSnapshot
+
+EVENT_STRUCT = struct.Struct('IhBB')
+EVENT_CODE_BUTTON = 0x01
+EVENT_CODE_INIT = 0x80
+MAX_AXIS = 32767.0
+
+FILE_HEADER = struct.Struct('<4sHH')
+CHUNK_HEADER = struct.Struct('<4sqqII')
+INDEX_ENTRY = struct.Struct('<qqQII')
+TRAILER = struct.Struct('<QI4s')
+FILE_MAGIC = b'LJSA'
+CHUNK_MAGIC = b'LJSC'
+INDEX_MAGIC = b'LJSI'
+VERSION = 1
+
+type RawEvent = tuple[int,int,int,int]
+
+class ChunkInfo:
+    """Where a chunk is and the time span and number of events it holds."""
+    __slots__ = ('first', 'last', 'offset', 'count', 'length')
+    def __init__(self, first:int, last:int, offset:int, count:int, length:int):
+        self.first = first
+        self.last = last
+        self.offset = offset
+        self.count = count
+        self.length = length
+
+    def __repr__(self) -> str:
+        return 'ChunkInfo(%i to %i, %i events)' % (self.first, self.last, self.count)
+
+def _zigzag(value:int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+def _unzigzag(value:int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+def _put_varint(out:bytearray, value:int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _get_varints(data:bytes, offset:int, count:int) -> tuple[list[int],int]:
+    values:list[int] = []
+    append = values.append
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        append(value)
+    return values, offset
+
+class ArchiveWriter:
+    """Writes raw js_event records into an archive at path.
+
+    It is a file like object taking the same bytes as a raw capture, so it can be passed to Gamepad.startCapture,
+    or have a raw capture written into it to convert it. Partial records are held until the rest arrives.
+    Close it to write the index, flush ends the current chunk early so it survives a crash."""
+    def __init__(self, path:str, chunkEvents:int = 4096, chunkMs:int = 60000, level:int = 6):
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(FILE_MAGIC, VERSION, 0))
+        self.chunkEvents = chunkEvents
+        self.chunkMs = chunkMs
+        self.level = level
+        self.clock = EventClock()
+        self.partial = b''
+        self.index:list[ChunkInfo] = []
+        # Raw values by (type & 0x7F) << 8 | index, as of the start of the pending chunk and now
+        self.checkpoint:dict[int,int] = {}
+        self.state:dict[int,int] = {}
+        self.pending:list[tuple[int,int,int,int]] = []
+        self.closed = False
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data:bytes) -> int:
+        """Adds the complete 'IhBB' records in data, returning len(data)."""
+        if self.closed:
+            raise ValueError('Write to a closed archive')
+        buffer = self.partial + bytes(data) if self.partial else bytes(data)
+        complete = len(buffer) - len(buffer) % EVENT_STRUCT.size
+        self.partial = buffer[complete:]
+        self.write_events(EVENT_STRUCT.iter_unpack(buffer[:complete]))#type:ignore
+        return len(data)
+
+    def write_events(self, events):
+        """Adds (raw timestamp, value, type, index) events."""
+        pending = self.pending
+        state = self.state
+        for timestamp, value, eventType, index in events:
+            timestamp = self.clock.unwrap(timestamp)
+            if pending and (len(pending) >= self.chunkEvents or timestamp - pending[0][0] >= self.chunkMs):
+                self._writeChunk()
+            pending.append((timestamp, value, eventType, index))
+            state[(eventType & 0x7F) << 8 | index] = value
+
+    def _writeChunk(self):
+        pending = self.pending
+        if not pending:
+            return
+        payload = bytearray()
+        checkpoint = self.checkpoint
+        _put_varint(payload, len(checkpoint))
+        for control, value in checkpoint.items():
+            payload.append(control >> 8)
+            payload.append(control & 0xFF)
+            _put_varint(payload, _zigzag(value))
+        payload.extend(bytes(event[2] for event in pending))
+        payload.extend(bytes(event[3] for event in pending))
+        previous = pending[0][0]
+        for timestamp, _, _, _ in pending:
+            _put_varint(payload, _zigzag(timestamp - previous))
+            previous = timestamp
+        values = dict(checkpoint)
+        for _, value, eventType, index in pending:
+            control = (eventType & 0x7F) << 8 | index
+            _put_varint(payload, _zigzag(value - values.get(control, 0)))
+            values[control] = value
+        data = zlib.compress(payload, self.level)
+        info = ChunkInfo(pending[0][0], pending[-1][0], self.file.tell(), len(pending), len(data))
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, info.first, info.last, info.count, info.length))
+        self.file.write(data)
+        self.index.append(info)
+        self.checkpoint = dict(self.state)
+        pending.clear()
+
+    def flush(self):
+        """Writes out the events so far as a chunk."""
+        if not self.closed:
+            self._writeChunk()
+            self.file.flush()
+
+    def close(self):
+        """Writes the last chunk and the index and closes the file."""
+        if self.closed:
+            return
+        self._writeChunk()
+        indexOffset = self.file.tell()
+        for info in self.index:
+            self.file.write(INDEX_ENTRY.pack(info.first, info.last, info.offset, info.count, info.length))
+        self.file.write(TRAILER.pack(indexOffset, len(self.index), INDEX_MAGIC))
+        self.file.close()
+        self.closed = True
+
+class ArchiveReader:
+    """Random access to an archive by time, timestamps in 64 bit ms as on Event."""
+    def __init__(self, path:str, cacheChunks:int = 4):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, _ = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError('%s is not an input archive' % path)
+        if version > VERSION:
+            raise ValueError('%s is a newer archive version (%i) than supported (%i)' % (path, version, VERSION))
+        self.index = self._readIndex()
+        self.firsts = [info.first for info in self.index]
+        self.cacheChunks = cacheChunks
+        self.cache:OrderedDict[int,tuple] = OrderedDict()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(info.count for info in self.index)
+
+    def close(self):
+        self.cache.clear()
+        self.map.close()
+        self.file.close()
+
+    def _readIndex(self) -> list[ChunkInfo]:
+        data = self.map
+        size = len(data)
+        if size >= FILE_HEADER.size + TRAILER.size:
+            indexOffset, count, magic = TRAILER.unpack_from(data, size - TRAILER.size)
+            if magic == INDEX_MAGIC and indexOffset + count * INDEX_ENTRY.size == size - TRAILER.size:
+                return [ChunkInfo(*entry) for entry in INDEX_ENTRY.iter_unpack(data[indexOffset:size - TRAILER.size])]
+        # No index, the writer never closed: walk the chunks, stopping at any incomplete one
+        index:list[ChunkInfo] = []
+        offset = FILE_HEADER.size
+        while offset + CHUNK_HEADER.size <= size:
+            magic, first, last, count, length = CHUNK_HEADER.unpack_from(data, offset)
+            if magic != CHUNK_MAGIC or offset + CHUNK_HEADER.size + length > size:
+                break
+            index.append(ChunkInfo(first, last, offset, count, length))
+            offset += CHUNK_HEADER.size + length
+        return index
+
+    @property
+    def start(self) -> int|None:
+        return self.index[0].first if self.index else None
+
+    @property
+    def end(self) -> int|None:
+        return self.index[-1].last if self.index else None
+
+    def _chunk(self, number:int) -> tuple[dict[int,int],list[int],list[int],bytes,bytes]:
+        """Returns the checkpoint, timestamps, values, types and indices of a chunk, decoding it if needed."""
+        cached = self.cache.get(number)
+        if cached is not None:
+            self.cache.move_to_end(number)
+            return cached
+        info = self.index[number]
+        start = info.offset + CHUNK_HEADER.size
+        payload = zlib.decompress(self.map[start:start + info.length])
+        count = info.count
+        (controls,), offset = _get_varints(payload, 0, 1)
+        checkpoint:dict[int,int] = {}
+        for _ in range(controls):
+            control = payload[offset] << 8 | payload[offset + 1]
+            (value,), offset = _get_varints(payload, offset + 2, 1)
+            checkpoint[control] = _unzigzag(value)
+        types = payload[offset:offset + count]
+        indices = payload[offset + count:offset + 2 * count]
+        deltas, offset = _get_varints(payload, offset + 2 * count, count)
+        timestamps:list[int] = []
+        timestamp = info.first
+        for delta in deltas:
+            timestamp += _unzigzag(delta)
+            timestamps.append(timestamp)
+        deltas, offset = _get_varints(payload, offset, count)
+        state = dict(checkpoint)
+        values:list[int] = []
+        for eventType, index, delta in zip(types, indices, deltas):
+            control = (eventType & 0x7F) << 8 | index
+            value = state.get(control, 0) + _unzigzag(delta)
+            state[control] = value
+            values.append(value)
+        decoded = (checkpoint, timestamps, values, types, indices)
+        self.cache[number] = decoded
+        if len(self.cache) > self.cacheChunks:
+            self.cache.popitem(last = False)
+        return decoded
+
+    def _chunkAt(self, timestamp:int) -> int:
+        """Returns the last chunk starting at or before timestamp, the one holding the state at timestamp."""
+        return max(bisect_right(self.firsts, timestamp) - 1, 0)
+
+    def _firstChunkFrom(self, timestamp:int) -> int:
+        """Returns the first chunk which can hold events at timestamp or later. Events in the same
+        millisecond (for example both axes of a stick) can be split over the end of one chunk and the
+        start of the next, so this is the last chunk starting before timestamp rather than at it."""
+        return max(bisect_left(self.firsts, timestamp) - 1, 0)
+
+    def events(self, start:int|None = None, end:int|None = None) -> Iterator[RawEvent]:
+        """Yields the (timestamp, value, type, index) events from start to end inclusive, None for either end
+        of the archive."""
+        first = 0 if start is None else self._firstChunkFrom(start)
+        for number in range(first, len(self.index)):
+            if end is not None and self.index[number].first > end:
+                return
+            _, timestamps, values, types, indices = self._chunk(number)
+            position = 0 if start is None else bisect_left(timestamps, start)
+            stop = len(timestamps) if end is None else bisect_right(timestamps, end)
+            yield from zip(timestamps[position:stop], values[position:stop], types[position:stop], indices[position:stop])
+
+    def _rawState(self, timestamp:int) -> dict[int,int]:
+        if not self.index:
+            return {}
+        checkpoint, timestamps, values, types, indices = self._chunk(self._chunkAt(timestamp))
+        state = dict(checkpoint)
+        for position in range(bisect_right(timestamps, timestamp)):
+            state[(types[position] & 0x7F) << 8 | indices[position]] = values[position]
+        return state
+
+    def state_at(self, timestamp:int, buttonIndex:dict|None = None, axisIndex:dict|None = None) -> StateSnapshot:
+        """Returns the state of every control after the events up to timestamp.
+
+        buttonIndex and axisIndex map names to indices for the snapshot's isPressed and axis, they can be taken
+        from a Gamepad (or Controllers class) instance."""
+        buttons:dict[int,bool] = {}
+        axes:dict[int,float] = {}
+        for control, value in self._rawState(timestamp).items():
+            if control >> 8 == EVENT_CODE_BUTTON:
+                buttons[control & 0xFF] = value != 0
+            else:
+                axes[control & 0xFF] = value / MAX_AXIS
+        return StateSnapshot(timestamp, 0, buttons, axes, buttonIndex or {}, axisIndex or {})
+
+    def replay(self, start:int|None = None, end:int|None = None, init:bool = True) -> bytes:
+        """Returns the events from start to end as raw 'IhBB' records, for Gamepad(source = ...) or
+        analysis.load_capture.
+
+        With init the records begin with init events setting every control to its state at start,
+        like the driver sends when a device is opened."""
+        records = bytearray()
+        if init and start is not None:
+            for control, value in sorted(self._rawState(start - 1).items()):
+                records += EVENT_STRUCT.pack(start & 0xFFFFFFFF, value, control >> 8 | EVENT_CODE_INIT, control & 0xFF)
+        pack = EVENT_STRUCT.pack
+        for timestamp, value, eventType, index in self.events(start, end):
+            records += pack(timestamp & 0xFFFFFFFF, value, eventType, index)
+        return bytes(records)
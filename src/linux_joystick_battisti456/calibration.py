@@ -0,0 +1,158 @@
+"""Kernel side axis correction (deadzone and broken line scaling) through JSIOCGCORR / JSIOCSCORR.
+
+The joystick driver applies the correction before events are queued, so once a deadzone is set
+noise inside it never wakes the reader at all. Corrections are expressed in raw device units,
+the helpers here convert from the -1.0 to +1.0 fractions used by Gamepad."""
+from typing import Callable, Any
+
+import array
+import json
+import struct
+
+from fcntl import ioctl as fcntl_ioctl
+
+JS_CORR_NONE = 0x00
+JS_CORR_BROKEN = 0x01
+
+CORR_FORMAT = '8ihH'
+CORR_SIZE = struct.calcsize(CORR_FORMAT)
+
+def _IOC(direction:int, number:int, size:int) -> int:
+    return direction << 30 | size << 16 | ord('j') << 8 | number
+
+JSIOCGAXES = _IOC(2, 0x11, 1)
+JSIOCGBUTTONS = _IOC(2, 0x12, 1)
+JSIOCSCORR = _IOC(1, 0x21, CORR_SIZE)
+JSIOCGCORR = _IOC(2, 0x22, CORR_SIZE)
+
+def JSIOCGNAME(length:int) -> int:
+    return _IOC(2, 0x13, length)
+
+type IoctlFunction = Callable[[Any,int,Any],Any]
+
+class AxisCorrection:
+    """The correction of a single axis, mirroring struct js_corr.
+
+    For JS_CORR_BROKEN, raw values between coef[0] and coef[1] read as 0 and values outside are scaled by
+    coef[2] (below) and coef[3] (above) in 1/16384ths before being clamped to +-32767."""
+    __slots__ = ('type', 'prec', 'coef')
+    def __init__(self, type:int = JS_CORR_NONE, prec:int = 0, coef:list[int]|None = None):
+        self.type = type
+        self.prec = prec
+        self.coef = list(coef) if coef is not None else [0] * 8
+
+    def __repr__(self) -> str:
+        return 'AxisCorrection(%i, %i, %r)' % (self.type, self.prec, self.coef)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, AxisCorrection) and (self.type, self.prec, self.coef) == (other.type, other.prec, other.coef)
+
+    def pack(self) -> bytes:
+        return struct.pack(CORR_FORMAT, *self.coef, self.prec, self.type)
+
+    @classmethod
+    def unpack(cls, fields:tuple[int,...]) -> 'AxisCorrection':
+        """Builds a correction from the fields of a struct.unpack of CORR_FORMAT."""
+        return cls(fields[9], fields[8], list(fields[:8]))
+
+    @classmethod
+    def broken_line(cls, center:float, flat:float, halfRange:float, prec:int = 0) -> 'AxisCorrection':
+        """Returns a correction with a deadzone of flat raw units either side of center on a halfRange wide
+        half axis, scaled the way joydev sets up its defaults from absmin, absmax and absflat: by
+        (1 << 29) / (halfRange - 2 * flat), so the output reaches full scale flat raw units before the end of
+        the axis rather than at it. Using the driver's formula lets raw_range read its defaults back."""
+        span = halfRange - 2 * flat
+        if span <= 0:
+            raise ValueError('Deadzone %r does not leave any range out of %r' % (flat, halfRange))
+        scale = int((1 << 29) / span)
+        return cls(JS_CORR_BROKEN, prec, [int(center - flat), int(center + flat), scale, scale, 0, 0, 0, 0])
+
+    def raw_range(self) -> tuple[float,float,float]:
+        """Returns the (center, flat, halfRange) in raw units described by a broken line correction,
+        the inverse of broken_line and so of the driver's defaults."""
+        if self.type != JS_CORR_BROKEN or self.coef[2] == 0:
+            raise ValueError('Only a broken line correction describes the raw axis range')
+        center = (self.coef[0] + self.coef[1]) / 2
+        flat = (self.coef[1] - self.coef[0]) / 2
+        return center, flat, (1 << 29) / self.coef[2] + 2 * flat
+
+    def deadzone(self) -> float:
+        """Returns the deadzone as a fraction of the half axis, 0.0 for no correction."""
+        if self.type != JS_CORR_BROKEN:
+            return 0.0
+        _, flat, halfRange = self.raw_range()
+        return flat / halfRange
+
+    def with_deadzone(self, deadzone:float) -> 'AxisCorrection':
+        """Returns a copy of this broken line correction with the deadzone changed to a fraction of the half axis."""
+        if not 0.0 <= deadzone < 1.0:
+            raise ValueError('Deadzone must be from 0.0 up to 1.0, not %r' % deadzone)
+        center, _, halfRange = self.raw_range()
+        return AxisCorrection.broken_line(center, deadzone * halfRange, halfRange, self.prec)
+
+    def apply(self, value:int) -> int:
+        """Returns what the driver reports for a raw value, the same calculation as joydev_correct."""
+        if self.type == JS_CORR_BROKEN:
+            coef = self.coef
+            if value > coef[0]:
+                value = 0 if value < coef[1] else (coef[3] * (value - coef[1])) >> 14
+            else:
+                value = (coef[2] * (value - coef[0])) >> 14
+        elif self.type != JS_CORR_NONE:
+            return 0
+        return max(-32767, min(value, 32767))
+
+    def to_dict(self) -> dict:
+        return {'type' : self.type, 'prec' : self.prec, 'coef' : list(self.coef)}
+
+    @classmethod
+    def from_dict(cls, data:dict) -> 'AxisCorrection':
+        return cls(data['type'], data['prec'], data['coef'])
+
+class JoystickIoctl:
+    """The joystick ioctls used by this library, on an open device.
+
+    ioctl defaults to fcntl.ioctl and can be swapped for a fake to exercise the calibration code without hardware."""
+    def __init__(self, device:Any, ioctl:IoctlFunction = fcntl_ioctl):
+        self.device = device
+        self.ioctl = ioctl
+
+    def name(self, length:int = 64) -> str:
+        buf = array.array('B', [0] * length)
+        self.ioctl(self.device, JSIOCGNAME(length), buf)
+        return buf.tobytes().rstrip(b'\x00').decode('utf-8')
+
+    def axes(self) -> int:
+        buf = array.array('B', [0])
+        self.ioctl(self.device, JSIOCGAXES, buf)
+        return buf[0]
+
+    def buttons(self) -> int:
+        buf = array.array('B', [0])
+        self.ioctl(self.device, JSIOCGBUTTONS, buf)
+        return buf[0]
+
+    def get_correction(self) -> list[AxisCorrection]:
+        """Returns the current correction of every axis."""
+        buf = bytearray(CORR_SIZE * self.axes())
+        if buf:
+            self.ioctl(self.device, JSIOCGCORR, buf)
+        return [AxisCorrection.unpack(fields) for fields in struct.iter_unpack(CORR_FORMAT, buf)]
+
+    def set_correction(self, corrections:list[AxisCorrection]):
+        """Sets the correction of every axis, the driver expects one entry per axis."""
+        axes = self.axes()
+        if len(corrections) != axes:
+            raise ValueError('Expected a correction for each of the %i axes, got %i' % (axes, len(corrections)))
+        if axes:
+            # A mutable buffer, fcntl refuses immutable arguments over 1024 bytes
+            self.ioctl(self.device, JSIOCSCORR, bytearray(b''.join(correction.pack() for correction in corrections)))
+
+def save_correction(path:str, corrections:list[AxisCorrection]):
+    """Saves corrections as JSON so they can be restored later with load_correction."""
+    with open(path, 'w') as file:
+        json.dump([correction.to_dict() for correction in corrections], file, indent = 1)
+
+def load_correction(path:str) -> list[AxisCorrection]:
+    with open(path) as file:
+        return [AxisCorrection.from_dict(data) for data in json.load(file)]
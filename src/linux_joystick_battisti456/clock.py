@@ -0,0 +1,85 @@
+"""Unwrapping of the 32 bit js_event timestamps and mapping them onto time.monotonic.
+
+The driver stamps events with a millisecond counter which wraps after about 49.7 days and runs on its own
+clock. EventClock extends it to 64 bits and keeps a running estimate of the offset to the host clock from
+when batches are read: an event can only be read after it happened, so the smallest (read time - event time)
+seen is the best offset estimate. The estimate may rise again by at most maxDrift ms per ms, which follows
+slow drift between the clocks without letting a late read throw it off.
+
+Within a batch a wrap is told apart from an event arriving slightly out of order by which is the smaller
+step. Between batches the host time elapsed since the previous one says which wrap the next batch is in,
+so a stream going quiet for longer than half the wrap range (about 24.8 days) still moves forwards."""
+
+WRAP = 1 << 32
+HALF_WRAP = 1 << 31
+
+class EventClock:
+    """Timestamp unwrapping and host time estimation for one event stream."""
+    __slots__ = ('epoch', 'lastRaw', 'offset', 'lastObserved', 'lastHostTime', 'maxDrift')
+    def __init__(self, maxDrift:float = 0.001):
+        self.epoch = 0
+        self.lastRaw:int|None = None
+        self.offset:float|None = None
+        self.lastObserved = 0
+        self.lastHostTime:float|None = None
+        self.maxDrift = maxDrift
+
+    def resolve(self, raw:int) -> int:
+        """Returns the 64 bit timestamp of a raw timestamp without recording it.
+
+        Timestamps up to half the wrap range behind the last one are taken as slightly out of order rather than wrapped."""
+        last = self.lastRaw
+        if last is None:
+            return raw
+        if raw < last - HALF_WRAP:
+            return self.epoch + WRAP + raw
+        if raw > last + HALF_WRAP and self.epoch:
+            return self.epoch - WRAP + raw
+        return self.epoch + raw
+
+    def unwrap(self, raw:int) -> int:
+        """Returns the 64 bit timestamp of the next raw timestamp in the stream."""
+        last = self.lastRaw
+        if last is not None and raw < last - HALF_WRAP:
+            self.epoch += WRAP
+        elif last is not None and raw > last + HALF_WRAP and self.epoch:
+            # Late event from before the last wrap, keep the epoch
+            return self.epoch - WRAP + raw
+        self.lastRaw = raw
+        return self.epoch + raw
+
+    def observe(self, timestamp:int, hostTime:float):
+        """Records that the event with 64 bit timestamp (ms) had been read by hostTime (time.monotonic seconds)."""
+        sample = hostTime * 1000.0 - timestamp
+        offset = self.offset
+        if offset is None or sample < offset:
+            self.offset = sample
+        else:
+            self.offset = min(sample, offset + (timestamp - self.lastObserved) * self.maxDrift)
+        self.lastObserved = timestamp
+
+    def observe_batch(self, firstRaw:int, lastRaw:int, hostTime:float):
+        """Records that a batch of events with raw timestamps firstRaw to lastRaw had been read by hostTime,
+        before the batch is unwrapped.
+
+        The batch is placed in the wrap closest to where the host time elapsed since the previous batch puts it."""
+        if self.lastRaw is not None and self.lastHostTime is not None:
+            expected = self.epoch + self.lastRaw + (hostTime - self.lastHostTime) * 1000.0
+            self.epoch = max(round((expected - firstRaw) / WRAP), 0) * WRAP
+            self.lastRaw = firstRaw
+        self.lastHostTime = hostTime
+        first = self.resolve(firstRaw)
+        # A batch spans far less than a wrap, so the newest event is just ahead of the first
+        self.observe(first + ((lastRaw - firstRaw) & (WRAP - 1)), hostTime)
+
+    def host_time(self, timestamp:int) -> float:
+        """Returns the estimated time.monotonic seconds of a 64 bit timestamp, 0.0 before anything was observed."""
+        if self.offset is None:
+            return 0.0
+        return (timestamp + self.offset) / 1000.0
+
+    def kernel_time(self, hostTime:float) -> float:
+        """Returns the estimated 64 bit timestamp (ms) at a time.monotonic time, for latency measurement."""
+        if self.offset is None:
+            raise ValueError('No events have been observed yet')
+        return hostTime * 1000.0 - self.offset
@@ -0,0 +1,78 @@
+"""Joystick discovery through sysfs, without opening any device.
+
+Each /sys/class/input/jsN links to its parent input device, whose name, phys, uniq
+and id/{bustype,vendor,product,version} files describe the controller."""
+import os
+
+from . import JS_PRE, js_path
+
+SYSFS_INPUT = '/sys/class/input'
+
+class DeviceInfo:
+    """Description of one joystick device as reported by sysfs.
+
+    vendor, product, bustype and version are USB / bus ids (0 when unknown), phys is the physical path
+    and uniq the unique id (usually a Bluetooth address, often empty)."""
+    __slots__ = ('number', 'name', 'vendor', 'product', 'bustype', 'version', 'phys', 'uniq', 'path')
+    def __init__(self, number:int, name:str = '', vendor:int = 0, product:int = 0, bustype:int = 0, version:int = 0, phys:str = '', uniq:str = ''):
+        self.number = number
+        self.name = name
+        self.vendor = vendor
+        self.product = product
+        self.bustype = bustype
+        self.version = version
+        self.phys = phys
+        self.uniq = uniq
+        self.path = js_path(number)
+
+    def __repr__(self) -> str:
+        return 'DeviceInfo(%i, %r, %04x:%04x, phys=%r, uniq=%r)' % (self.number, self.name, self.vendor, self.product, self.phys, self.uniq)
+
+    @property
+    def id(self) -> tuple[int,int]:
+        """The (vendor, product) pair used to look up known controllers."""
+        return self.vendor, self.product
+
+def _read(path:str) -> str:
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return ''
+
+def _readHex(path:str) -> int:
+    try:
+        return int(_read(path), 16)
+    except ValueError:
+        return 0
+
+def describe(number:int, sysfsRoot:str = SYSFS_INPUT) -> DeviceInfo|None:
+    """Returns the description of joystick number, or None if sysfs does not know it."""
+    device = os.path.join(sysfsRoot, '%s%i' % (JS_PRE, number), 'device')
+    if not os.path.isdir(device):
+        return None
+    return DeviceInfo(
+        number,
+        _read(os.path.join(device, 'name')),
+        _readHex(os.path.join(device, 'id', 'vendor')),
+        _readHex(os.path.join(device, 'id', 'product')),
+        _readHex(os.path.join(device, 'id', 'bustype')),
+        _readHex(os.path.join(device, 'id', 'version')),
+        _read(os.path.join(device, 'phys')),
+        _read(os.path.join(device, 'uniq'))
+    )
+
+def discover(sysfsRoot:str = SYSFS_INPUT) -> list[DeviceInfo]:
+    """Returns a description of every joystick sysfs knows about, by device number."""
+    try:
+        entries = os.listdir(sysfsRoot)
+    except OSError:
+        return []
+    devices:list[DeviceInfo] = []
+    for entry in entries:
+        if entry.startswith(JS_PRE) and entry[len(JS_PRE):].isdigit():
+            info = describe(int(entry[len(JS_PRE):]), sysfsRoot)
+            if info is not None:
+                devices.append(info)
+    devices.sort(key = lambda info: info.number)
+    return devices
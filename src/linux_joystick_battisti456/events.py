@@ -0,0 +1,72 @@
+from enum import IntEnum
+
+class EventKind(IntEnum):
+    """The kind of a decoded event, numerically equal to the js_event type code."""
+    BUTTON = 0x01
+    AXIS = 0x02
+
+BUTTON = EventKind.BUTTON
+AXIS = EventKind.AXIS
+
+class Event:
+    """A single decoded gamepad event.
+
+    timestamp is the kernel event time in ms (unwrapped to 64 bits), hostTime its estimated time.monotonic
+    time in seconds (0.0 when unknown), kind is an EventKind, index is the raw button / axis number,
+    name is the mapped control name (or the index when no name is known) and value is a bool for buttons
+    and a float between -1.0 and +1.0 for axes.
+
+    When built with names (an index to name map) instead of a name, the name is only looked up when first read."""
+    __slots__ = ('timestamp', 'kind', 'index', '_name', 'value', 'hostTime', '_names')
+    def __init__(self, timestamp:int = 0, kind:EventKind = BUTTON, index:int = 0, name:str|int|None = None, value:bool|float = False, hostTime:float = 0.0, names:dict|None = None):
+        self.timestamp = timestamp
+        self.kind = kind
+        self.index = index
+        self._name = name
+        self.value = value
+        self.hostTime = hostTime
+        self._names = names
+
+    @property
+    def name(self) -> str|int|None:
+        name = self._name
+        if name is None and self._names is not None:
+            name = self._name = self._names.get(self.index, self.index)
+        return name
+
+    @name.setter
+    def name(self, name:str|int|None):
+        self._name = name
+        self._names = None
+
+    def __repr__(self) -> str:
+        return 'Event(%u, %s, %i, %r, %r)' % (self.timestamp, self.kind.name, self.index, self.name, self.value)
+
+    def copy(self) -> 'Event':
+        """Returns an independent copy, useful for keeping an event which is going to be refilled."""
+        return Event(self.timestamp, self.kind, self.index, self._name, self.value, self.hostTime, self._names)
+
+class StateSnapshot:
+    """A consistent copy of the gamepad state, see Gamepad.snapshot.
+
+    buttons and axes map raw indices to values, sequence is the event ring sequence the copy corresponds to
+    (0 when no ring is running) and timestamp is the kernel time in ms of the last event applied."""
+    __slots__ = ('timestamp', 'sequence', 'buttons', 'axes', '_buttonIndex', '_axisIndex')
+    def __init__(self, timestamp:int, sequence:int, buttons:dict[int,bool], axes:dict[int,float], buttonIndex:dict, axisIndex:dict):
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.buttons = buttons
+        self.axes = axes
+        self._buttonIndex = buttonIndex
+        self._axisIndex = axisIndex
+
+    def __repr__(self) -> str:
+        return 'StateSnapshot(%u, %i, %r, %r)' % (self.timestamp, self.sequence, self.buttons, self.axes)
+
+    def isPressed(self, buttonName:str|int) -> bool:
+        """Returns the state of a button specified by name or index at the time of the snapshot."""
+        return self.buttons[self._buttonIndex.get(buttonName, buttonName)]
+
+    def axis(self, axisName:str|int) -> float:
+        """Returns the position of an axis specified by name or index at the time of the snapshot."""
+        return self.axes[self._axisIndex.get(axisName, axisName)]
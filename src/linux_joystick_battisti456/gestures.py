@@ -0,0 +1,108 @@
+"""Long press, double tap and hold to repeat (turbo) gestures on button edges, see Gamepad.addLongPressHandler.
+
+Every pending timeout lives on the gamepad's TimerWheel, which the reading methods advance, so gestures need
+no threads of their own and only fire while the gamepad is being read (or updated in the background).
+Times are integer milliseconds of time.monotonic."""
+from typing import Callable
+
+from .timerwheel import TimerWheel, Timer
+
+type Dispatch = Callable[...,None]
+
+class ButtonGestures:
+    """The gesture handlers of one button and its timing state.
+
+    Handler tuples are replaced rather than changed, the timing state is only touched by the reader."""
+    __slots__ = ('longPress', 'doubleTap', 'repeat', 'timers', 'lastPress')
+    def __init__(self):
+        self.longPress:tuple[tuple[int,Callable[[],None]],...] = ()
+        self.doubleTap:tuple[tuple[int,Callable[[],None]],...] = ()
+        self.repeat:tuple[tuple[int,int,Callable[[],None]],...] = ()
+        self.timers:dict[tuple,Timer] = {}
+        self.lastPress:int|None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.longPress or self.doubleTap or self.repeat)
+
+class GestureRecognizer:
+    """Turns the edges of buttons into gesture callbacks, called through dispatch(callbacks, event, index)."""
+    def __init__(self, wheel:TimerWheel, dispatch:Dispatch):
+        self.wheel = wheel
+        self.dispatch = dispatch
+        self.buttons:dict[int,ButtonGestures] = {}
+
+    def _gestures(self, index:int) -> ButtonGestures:
+        gestures = self.buttons.get(index)
+        if gestures is None:
+            gestures = self.buttons[index] = ButtonGestures()
+        return gestures
+
+    def add_long_press(self, index:int, callback:Callable[[],None], delay:int):
+        gestures = self._gestures(index)
+        gestures.longPress += ((delay, callback),)
+
+    def add_double_tap(self, index:int, callback:Callable[[],None], window:int):
+        gestures = self._gestures(index)
+        gestures.doubleTap += ((window, callback),)
+
+    def add_repeat(self, index:int, callback:Callable[[],None], delay:int, interval:int):
+        if interval <= 0:
+            raise ValueError('Repeat interval must be positive, not %r' % interval)
+        gestures = self._gestures(index)
+        gestures.repeat += ((delay, interval, callback),)
+
+    def remove(self, index:int, callback:Callable):
+        """Removes callback from every gesture of a button.
+
+        Safe from any thread, timers already pending for it find it gone when they fire."""
+        gestures = self.buttons.get(index)
+        if gestures is None:
+            return
+        gestures.longPress = tuple(entry for entry in gestures.longPress if entry[-1] != callback)
+        gestures.doubleTap = tuple(entry for entry in gestures.doubleTap if entry[-1] != callback)
+        gestures.repeat = tuple(entry for entry in gestures.repeat if entry[-1] != callback)
+        if not gestures:
+            del self.buttons[index]
+
+    def clear(self):
+        for gestures in list(self.buttons.values()):
+            gestures.longPress = gestures.doubleTap = gestures.repeat = ()
+        self.buttons.clear()
+
+    def _cancel(self, gestures:ButtonGestures):
+        for timer in gestures.timers.values():
+            self.wheel.cancel(timer)
+        gestures.timers.clear()
+
+    def edge(self, gestures:ButtonGestures, index:int, pressed:bool, now:int):
+        """Handles a press or release of a button with gestures at time now."""
+        if not pressed:
+            self._cancel(gestures)
+            return
+        for delay, callback in gestures.longPress:
+            gestures.timers[('long', callback)] = self.wheel.schedule(now + delay, self._longPress, gestures, index, callback)
+        for delay, interval, callback in gestures.repeat:
+            gestures.timers[('repeat', callback)] = self.wheel.schedule(now + delay, self._repeat, gestures, index, interval, callback)
+        if gestures.doubleTap:
+            last = gestures.lastPress
+            tapped = tuple(callback for window, callback in gestures.doubleTap if last is not None and now - last <= window)
+            # A third quick press starts a new double tap rather than completing another one
+            gestures.lastPress = None if tapped else now
+            if tapped:
+                self.dispatch(tapped, 'double_tap', index)
+
+    def _longPress(self, timer:Timer, gestures:ButtonGestures, index:int, callback:Callable[[],None]):
+        gestures.timers.pop(('long', callback), None)
+        if any(entry[-1] == callback for entry in gestures.longPress):
+            self.dispatch((callback,), 'long_press', index)
+
+    def _repeat(self, timer:Timer, gestures:ButtonGestures, index:int, interval:int, callback:Callable[[],None]):
+        if not any(entry[-1] == callback for entry in gestures.repeat):
+            gestures.timers.pop(('repeat', callback), None)
+            return
+        # Keep to the original rhythm, skipping repeats missed while the reader was busy rather than bunching them up
+        deadline = timer.deadline + interval
+        if deadline <= self.wheel.current:
+            deadline = self.wheel.current + interval
+        gestures.timers[('repeat', callback)] = self.wheel.schedule(deadline, self._repeat, gestures, index, interval, callback)
+        self.dispatch((callback,), 'repeat', index)
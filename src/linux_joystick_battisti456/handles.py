@@ -0,0 +1,69 @@
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .Gamepad import Gamepad, ButtonID, ButtonName, AxisID, AxisName
+
+class ButtonHandle:
+    """A button resolved once by name or index, see Gamepad.button.
+
+    Reads go straight to the gamepad state maps without any name lookups.
+    Each handle keeps its own beenPressed / beenReleased cursors, starting from the edges seen when it was created."""
+    __slots__ = ('index', 'name', '_pressedMap', '_edgeMap', '_pressCursor', '_releaseCursor')
+    def __init__(self, gamepad:'Gamepad', index:'ButtonID'):
+        self.index = index
+        self.name:'ButtonName|ButtonID' = gamepad.buttonNames.get(index, index)
+        self._pressedMap = gamepad.pressedMap
+        self._edgeMap = gamepad.edgeMap
+        self._pressCursor, self._releaseCursor, _ = self._edgeMap.get(index, (0, 0, 0))
+
+    def __repr__(self) -> str:
+        return 'ButtonHandle(%i, %r)' % (self.index, self.name)
+
+    def isPressed(self) -> bool:
+        """Returns the last observed state of the button, True if pressed."""
+        return self._pressedMap[self.index]
+
+    def beenPressed(self) -> bool:
+        """Returns True if the button has been pressed since the last beenPressed call on this handle."""
+        return self.pressCount() > 0
+
+    def beenReleased(self) -> bool:
+        """Returns True if the button has been released since the last beenReleased call on this handle."""
+        return self.releaseCount() > 0
+
+    def pressCount(self) -> int:
+        """Returns how many times the button has been pressed since the last pressCount / beenPressed call on this handle."""
+        presses = self._edgeMap.get(self.index, (0, 0, 0))[0]
+        count = presses - self._pressCursor
+        self._pressCursor = presses
+        return count
+
+    def releaseCount(self) -> int:
+        """Returns how many times the button has been released since the last releaseCount / beenReleased call on this handle."""
+        releases = self._edgeMap.get(self.index, (0, 0, 0))[1]
+        count = releases - self._releaseCursor
+        self._releaseCursor = releases
+        return count
+
+    def lastEdge(self) -> tuple[int,int,int]:
+        """Returns the press count, release count and timestamp (ms) of the last edge of the button."""
+        return self._edgeMap[self.index]
+
+class AxisHandle:
+    """An axis resolved once by name or index, see Gamepad.axis_handle.
+
+    Reads go straight to the gamepad state maps without any name lookups."""
+    __slots__ = ('index', 'name', '_axisMap')
+    def __init__(self, gamepad:'Gamepad', index:'AxisID'):
+        self.index = index
+        self.name:'AxisName|AxisID' = gamepad.axisNames.get(index, index)
+        self._axisMap = gamepad.axisMap
+
+    def __repr__(self) -> str:
+        return 'AxisHandle(%i, %r)' % (self.index, self.name)
+
+    def value(self) -> float:
+        """Returns the last observed position of the axis, between -1.0 and +1.0."""
+        return self._axisMap[self.index]
+
+    def __float__(self) -> float:
+        return self._axisMap[self.index]
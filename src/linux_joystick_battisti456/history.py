@@ -0,0 +1,153 @@
+"""Fixed size histories of the (timestamp, value) of a control's events, see Gamepad.enableHistory.
+
+Each history is a ring of three preallocated arrays: the event timestamps (64 bit ms, as on Event), the
+values (axes -1.0 to +1.0, buttons 1.0 / 0.0) and the running integral of the value up to each event.
+A control holds its value until its next event, so a window query bisects for the events bounding the
+window and then works on at most two array slices: min and max run over them in C, and the integral and
+time weighted mean are a difference of two running integrals, so no query loops over events in Python.
+Once full the oldest events are overwritten, queries reaching further back only see what is left."""
+from array import array
+from bisect import bisect_right
+
+import threading
+
+class ControlHistory:
+    """The last capacity events of one control.
+
+    Queries take timestamps in ms on the event clock, see Gamepad.eventTime for the current one, and lock
+    against the reader with lock, which a Gamepad sets to its stateLock."""
+    __slots__ = ('capacity', 'timestamps', 'values', 'areas', 'start', 'count', 'lock')
+    def __init__(self, capacity:int = 1024, lock:'threading.Lock|None' = None):
+        if capacity < 1:
+            raise ValueError('History capacity must be at least 1, not %r' % capacity)
+        self.capacity = capacity
+        self.timestamps = array('q', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        # The integral of the value from the first event ever recorded, in value milliseconds
+        self.areas = array('d', bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+        self.lock = threading.Lock() if lock is None else lock
+
+    def __repr__(self) -> str:
+        return 'ControlHistory(%i of %i)' % (self.count, self.capacity)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp:int, value:float):
+        """Records an event, the caller holds lock."""
+        capacity = self.capacity
+        if self.count:
+            last = (self.start + self.count - 1) % capacity
+            area = self.areas[last] + self.values[last] * (timestamp - self.timestamps[last])
+        else:
+            area = 0.0
+        position = (self.start + self.count) % capacity
+        if self.count == capacity:
+            self.start = (self.start + 1) % capacity
+        else:
+            self.count += 1
+        self.timestamps[position] = timestamp
+        self.values[position] = value
+        self.areas[position] = area
+
+    def clear(self):
+        with self.lock:
+            self.start = self.count = 0
+
+    def _find(self, timestamp:float) -> int:
+        """Returns the physical position of the newest event at or before timestamp, -1 if there is none."""
+        timestamps = self.timestamps
+        start = self.start
+        end = start + self.count
+        if end > self.capacity:
+            # Wrapped, the events from 0 up to the start are the newer ones
+            wrapped = end - self.capacity
+            if timestamp >= timestamps[0]:
+                return bisect_right(timestamps, timestamp, 0, wrapped) - 1
+            end = self.capacity
+        position = bisect_right(timestamps, timestamp, start, end) - 1
+        return position if position >= start else -1
+
+    def _slices(self, first:int, last:int) -> list[array]:
+        """Returns the values from physical position first to last inclusive, as one or two slices."""
+        if first <= last:
+            return [self.values[first:last + 1]]
+        return [self.values[first:], self.values[:last + 1]]
+
+    def _window(self, start:float, end:float) -> tuple[int,int]|None:
+        """Returns the physical positions of the events setting the value over start to end, None when the
+        whole window is before the history."""
+        last = self._find(end)
+        if last < 0 or end < start:
+            return None
+        first = self._find(start)
+        return (self.start if first < 0 else first), last
+
+    def _area(self, timestamp:float) -> float:
+        position = self._find(timestamp)
+        if position < 0:
+            return self.areas[self.start]
+        return self.areas[position] + self.values[position] * (timestamp - self.timestamps[position])
+
+    def oldest(self) -> int|None:
+        """Returns the timestamp of the oldest event kept, None while empty."""
+        with self.lock:
+            return self.timestamps[self.start] if self.count else None
+
+    def newest(self) -> int|None:
+        with self.lock:
+            return self.timestamps[(self.start + self.count - 1) % self.capacity] if self.count else None
+
+    def value_at(self, timestamp:float) -> float|None:
+        """Returns the value the control had at timestamp, None before the oldest event kept."""
+        with self.lock:
+            position = self._find(timestamp)
+            return self.values[position] if position >= 0 else None
+
+    def min(self, start:float, end:float) -> float|None:
+        """Returns the lowest value from start to end, None when the window is before the history."""
+        with self.lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return min(min(part) for part in self._slices(*window))
+
+    def max(self, start:float, end:float) -> float|None:
+        """Returns the highest value from start to end, None when the window is before the history."""
+        with self.lock:
+            window = self._window(start, end)
+            if window is None:
+                return None
+            return max(max(part) for part in self._slices(*window))
+
+    def integral(self, start:float, end:float) -> float:
+        """Returns the integral of the value from start to end in value seconds, counting the time before the
+        oldest event kept as 0."""
+        with self.lock:
+            if not self.count or end <= start:
+                return 0.0
+            return (self._area(end) - self._area(max(start, self.timestamps[self.start]))) / 1000.0
+
+    def mean(self, start:float, end:float) -> float|None:
+        """Returns the time weighted mean value from start to end, over the part of the window the history
+        covers, None when it covers none of it."""
+        with self.lock:
+            if not self.count:
+                return None
+            start = max(start, self.timestamps[self.start])
+            if end <= start:
+                position = self._find(end)
+                return self.values[position] if position >= 0 else None
+            return (self._area(end) - self._area(start)) / (end - start)
+
+    def rate(self, start:float, end:float) -> float|None:
+        """Returns the average rate of change from start to end in values per second, for example a stick's
+        velocity, None when the history does not reach back to start."""
+        with self.lock:
+            first = self._find(start)
+            last = self._find(end)
+            if first < 0 or last < 0 or end <= start:
+                return None
+            return (self.values[last] - self.values[first]) * 1000.0 / (end - start)
@@ -1,17 +1,28 @@
 from .Controllers import *
 from . import *
 
-import array
-
-from fcntl import ioctl#type:ignore
-from typing import TYPE_CHECKING, IO
-if TYPE_CHECKING:
-    global iotcl
-    def ioctl(fd:IO[bytes],request:int,arg:int|bytes|bytearray|array.array[int]=0,mutate_flag=True):
-        ...
+from .calibration import JoystickIoctl
+from .discovery import DeviceInfo, describe, SYSFS_INPUT
 
 known_controller_names:dict[str,type[BaseGamepad]] = {
-    "Core (Plus) Wired Controller" : CorePlusWiredController
+    "Core (Plus) Wired Controller" : CorePlusWiredController,
+    "Sony PLAYSTATION(R)3 Controller" : PS3,
+    "Microsoft X-Box 360 pad" : Xbox360,
+    "Microsoft X-Box One pad" : XboxONE
+}
+
+# (vendor, product) as reported in sysfs, checked before the name
+known_controller_ids:dict[tuple[int,int],type[BaseGamepad]] = {
+    (0x054c, 0x0268) : PS3,
+    (0x054c, 0x05c4) : PS4,
+    (0x054c, 0x09cc) : PS4,
+    (0x045e, 0x028e) : Xbox360,
+    (0x045e, 0x02d1) : XboxONE,
+    (0x045e, 0x02dd) : XboxONE,
+    (0x045e, 0x02ea) : XboxONE,
+    (0x28de, 0x1102) : Steam,
+    (0x28de, 0x1142) : Steam,
+    (0x20d6, 0xa711) : CorePlusWiredController
 }
 
 def get_name(num:int):
@@ -21,9 +32,7 @@ def get_name(num:int):
     based on code I found here: https://gist.github.com/rdb/8864666
     """
     with open(js_path(num),'rb') as dev:
-        buf = array.array('B', [0] * 64)
-        ioctl(dev, 0x80006a13 + (0x10000 * len(buf)), buf) # JSIOCGNAME(len)
-        name:str = buf.tobytes().rstrip(b'\x00').decode('utf-8')
+        name:str = JoystickIoctl(dev).name(64) # JSIOCGNAME(len)
     return name
 
 def get_gamepad_type(name:str) -> type[BaseGamepad]:
@@ -33,10 +42,20 @@ def get_gamepad_type(name:str) -> type[BaseGamepad]:
         print(f"WARNING: Gamepad with name '{name}' not known!")
         return BaseGamepad
 
-def load_controller(num:int) -> BaseGamepad|None:
+def get_device_type(info:DeviceInfo) -> type[BaseGamepad]:
+    """Returns the gamepad type for a sysfs device description, by vendor and product id and then by name."""
+    gtype = known_controller_ids.get(info.id)
+    if gtype is not None:
+        return gtype
+    return get_gamepad_type(info.name)
+
+def load_controller(num:int, sysfsRoot:str = SYSFS_INPUT) -> BaseGamepad|None:
     if not js_available(num):
         return None
-    name:str = get_name(num)
-    gtype = get_gamepad_type(name)
+    info = describe(num, sysfsRoot)
+    if info is not None:
+        gtype = get_device_type(info)
+    else:
+        # No sysfs, ask the device itself
+        gtype = get_gamepad_type(get_name(num))
     return gtype(num)
-    
\ No newline at end of file
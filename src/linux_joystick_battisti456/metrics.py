@@ -0,0 +1,163 @@
+"""Cheap runtime counters for gamepad I/O and dispatch, with Prometheus text export.
+
+Counters are plain attributes bumped by the reader thread, exporting only reads them,
+so there is no locking and a scrape may be a few events behind."""
+from typing import Callable, Iterable
+
+import os
+import socket
+import stat
+import threading
+
+type Labels = dict[str,str]
+type MetricSource = Callable[[],Iterable[tuple[Labels,'GamepadMetrics']]]
+
+PREFIX = 'linux_joystick_'
+
+# name, type, help, [(field, extra labels)]
+METRICS:list[tuple[str,str,str,list[tuple[str,Labels]]]] = [
+    ('events_total', 'counter', 'Events read from the device by type.', [
+        ('buttonEvents', {'type' : 'button'}),
+        ('axisEvents', {'type' : 'axis'}),
+        ('initEvents', {'type' : 'init'}),
+        ('unknownEvents', {'type' : 'unknown'})
+    ]),
+    ('resync_events_total', 'counter', 'Init events re-sent by the driver after its buffer overflowed.', [('resyncEvents', {})]),
+    ('read_bytes_total', 'counter', 'Bytes read from the device.', [('bytesRead', {})]),
+    ('read_calls_total', 'counter', 'Read system calls made on the device.', [('readCalls', {})]),
+    ('disconnects_total', 'counter', 'Times the device was found disconnected.', [('disconnects', {})]),
+    ('handler_calls_total', 'counter', 'Event handler invocations.', [('handlerCalls', {})]),
+    ('handler_errors_total', 'counter', 'Event handler invocations which raised.', [('handlerErrors', {})]),
+    ('backlog_events', 'gauge', 'Events waiting to be processed, -1 when the device cannot report it.', [('backlog', {})])
+]
+
+class GamepadMetrics:
+    """Counters for one gamepad (or other reader).
+
+    gauges maps extra field names to functions evaluated when the metrics are exported."""
+    __slots__ = (
+        'buttonEvents', 'axisEvents', 'initEvents', 'unknownEvents', 'resyncEvents',
+        'bytesRead', 'readCalls', 'disconnects', 'handlerCalls', 'handlerErrors', 'gauges'
+    )
+    def __init__(self):
+        self.buttonEvents = 0
+        self.axisEvents = 0
+        self.initEvents = 0
+        self.unknownEvents = 0
+        self.resyncEvents = 0
+        self.bytesRead = 0
+        self.readCalls = 0
+        self.disconnects = 0
+        self.handlerCalls = 0
+        self.handlerErrors = 0
+        self.gauges:dict[str,Callable[[],float]] = {}
+
+    def as_dict(self) -> dict[str,float]:
+        """Returns every counter and gauge by field name."""
+        result:dict[str,float] = {field : getattr(self, field) for field in self.__slots__ if field != 'gauges'}
+        for field, gauge in self.gauges.items():
+            result[field] = gauge()
+        return result
+
+    def add(self, other:'GamepadMetrics'):
+        """Adds the counters of other into this one, for totals across several readers."""
+        for field in self.__slots__:
+            if field != 'gauges':
+                setattr(self, field, getattr(self, field) + getattr(other, field))
+
+def _labels(labels:Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        '%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{%s}' % ','.join(escaped)
+
+def format_prometheus(sources:Iterable[tuple[Labels,GamepadMetrics]]) -> str:
+    """Formats the metrics of one or more readers in the Prometheus text exposition format.
+
+    Each source is a (labels, metrics) pair, for example ({'device' : '0'}, gamepad.metrics)."""
+    values = [(labels, metrics.as_dict()) for labels, metrics in sources]
+    lines:list[str] = []
+    for name, metricType, helpText, fields in METRICS:
+        lines.append('# HELP %s%s %s' % (PREFIX, name, helpText))
+        lines.append('# TYPE %s%s %s' % (PREFIX, name, metricType))
+        for labels, valueMap in values:
+            for field, extra in fields:
+                if field in valueMap:
+                    lines.append('%s%s%s %s' % (PREFIX, name, _labels(labels | extra), repr(valueMap[field])))
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path:str, sources:Iterable[tuple[Labels,GamepadMetrics]]):
+    """Atomically writes the metrics to a file, for example for the node exporter textfile collector."""
+    temporary = '%s.%i.tmp' % (path, os.getpid())
+    with open(temporary, 'w') as file:
+        file.write(format_prometheus(sources))
+    os.replace(temporary, path)
+
+def _isStale(path:str) -> bool:
+    """Returns True if nothing is listening on the Unix socket at path any more."""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return True
+    finally:
+        probe.close()
+    return False
+
+class MetricsServer(threading.Thread):
+    """Thread serving the metrics in Prometheus text format to every client connecting to a Unix socket.
+
+    source is called for each connection and returns the (labels, metrics) pairs to export.
+    Call stop to close the socket."""
+    def __init__(self, path:str, source:MetricSource):
+        threading.Thread.__init__(self, daemon = True)
+        self.path = path
+        self.source = source
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            # Only replace a socket left behind by an earlier server, never anything else
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError('%s exists and is not a socket' % path)
+            if not _isStale(path):
+                raise FileExistsError('%s is in use by another server' % path)
+            os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                break
+            with connection:
+                try:
+                    text = format_prometheus(self.source())
+                except Exception as e:
+                    # A broken source should not take the server down with it
+                    text = '# Collecting metrics failed: %s\n' % str(e).replace('\n', ' ')
+                try:
+                    connection.sendall(text.encode('utf-8'))
+                except OSError:
+                    pass
+
+    def stop(self):
+        self.running = False
+        try:
+            # Wakes up the accept call blocked in run
+            self.server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.server.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
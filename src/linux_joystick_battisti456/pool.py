@@ -0,0 +1,193 @@
+from typing import Callable, Iterable, Iterator
+
+import os
+import time
+import heapq
+import select
+
+from . import all_js_nums
+from .Gamepad import Gamepad
+from .clock import EventClock, WRAP
+from .discovery import DeviceInfo, describe, discover, SYSFS_INPUT
+from .events import Event, StateSnapshot
+from .known_controller_names import load_controller
+from .metrics import format_prometheus, write_prometheus
+
+type DeviceEvent = tuple[int,Event]
+
+def _kernelTime(keyed:tuple[int,DeviceEvent]) -> int:
+    return keyed[0]
+
+class ControllerPool:
+    """Every connected joystick, opened with its Controllers type and read through one poll loop.
+
+    Events from all devices come out of getEvents as (device number, Event) pairs merged into time order,
+    so a single consumer loop can serve any number of players. joydev stamps the events of every device from
+    the same kernel clock, so they are merged on their timestamps, unwrapped by one clock shared by the pool.
+    Devices which disconnect are dropped and listed in disconnected, refresh picks up new ones.
+    deviceInfo holds the sysfs description of each device, so players can be told apart by phys or uniq.
+    Devices are found and identified through sysfsRoot, loader is called as loader(device, sysfsRoot)."""
+    def __init__(self, devices:Iterable[int]|None = None, loader:Callable[[int,str],Gamepad|None] = load_controller, sysfsRoot:str = SYSFS_INPUT):
+        self.loader = loader
+        self.sysfsRoot = sysfsRoot
+        self.gamepads:dict[int,Gamepad] = {}
+        self.deviceInfo:dict[int,DeviceInfo] = {}
+        self.disconnected:list[int] = []
+        self.poller = select.poll()
+        self.fdDevices:dict[int,int] = {}
+        self.clock = EventClock()
+        for device in sorted(self._deviceNumbers() if devices is None else devices):
+            self.add(device)
+
+    def _deviceNumbers(self) -> set[int]:
+        """Returns the number of every joystick sysfs knows about, falling back to /dev/input without sysfs."""
+        if not os.path.isdir(self.sysfsRoot):
+            return all_js_nums()
+        return {info.number for info in discover(self.sysfsRoot)}
+
+    def __len__(self) -> int:
+        return len(self.gamepads)
+
+    def __getitem__(self, device:int) -> Gamepad:
+        return self.gamepads[device]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self.gamepads))
+
+    def add(self, device:int) -> Gamepad|None:
+        """Opens a device and adds it to the pool, returning None if it is not available."""
+        if device in self.gamepads:
+            return self.gamepads[device]
+        gamepad = self.loader(device, self.sysfsRoot)
+        if gamepad is None:
+            return None
+        return self.addGamepad(device, gamepad)
+
+    def addGamepad(self, device:int, gamepad:Gamepad) -> Gamepad:
+        """Adds an already open gamepad to the pool under a device number."""
+        self.gamepads[device] = gamepad
+        info = describe(device, self.sysfsRoot)
+        if info is not None:
+            self.deviceInfo[device] = info
+        fd = gamepad.joystickFile.fileno()
+        self.fdDevices[fd] = device
+        self.poller.register(fd, select.POLLIN)
+        return gamepad
+
+    def remove(self, device:int):
+        """Removes a device from the pool and disconnects it."""
+        gamepad = self.gamepads.pop(device, None)
+        self.deviceInfo.pop(device, None)
+        if gamepad is None:
+            return
+        for fd, fdDevice in list(self.fdDevices.items()):
+            if fdDevice == device:
+                del self.fdDevices[fd]
+                self.poller.unregister(fd)
+        gamepad.disconnect()
+
+    def refresh(self) -> list[int]:
+        """Adds any newly connected devices and returns their numbers."""
+        return [device for device in sorted(self._deviceNumbers() - set(self.gamepads)) if self.add(device) is not None]
+
+    def _readDevice(self, device:int, maxEvents:int, skipInit:bool) -> list[DeviceEvent]:
+        gamepad = self.gamepads[device]
+        try:
+            events = gamepad.getEvents(maxEvents, 0.0, skipInit)
+        except IOError:
+            self.remove(device)
+            self.disconnected.append(device)
+            return []
+        return [(device, event) for event in events]
+
+    def getEvents(self, maxEvents:int = 256, timeout:float|None = 0.0, skipInit = True) -> list[DeviceEvent]:
+        """Returns the events available from every device as (device number, Event) pairs in time order.
+
+        Waits up to timeout seconds for any device to have events, None waits forever.
+        Each device contributes at most maxEvents per call."""
+        if not self.gamepads:
+            if timeout:
+                time.sleep(timeout)
+            return []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Devices still holding events from an earlier interrupted batch have nothing new to poll
+            held = [fd for fd, device in self.fdDevices.items() if self.gamepads[device].pendingRawEvents]
+            if held:
+                wait = 0.0
+            else:
+                wait = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            for gamepad in self.gamepads.values():
+                if gamepad.timerWheel.count:
+                    # Nobody else reads an idle device, so its gesture timers run from here
+                    gamepad._runTimers()
+                    wait = gamepad._timerTimeout(wait)
+            ready = [fd for fd, _ in self.poller.poll(None if wait is None else max(wait * 1000.0, 0.0))]
+            ready.extend(fd for fd in held if fd not in ready)
+            if ready or (deadline is not None and time.monotonic() >= deadline):
+                break
+        readTime = time.monotonic()
+        perDevice = [self._readDevice(self.fdDevices[fd], maxEvents, skipInit) for fd in ready if fd in self.fdDevices]
+        perDevice = [deviceEvents for deviceEvents in perDevice if deviceEvents]
+        if not perDevice:
+            return []
+        return self._merge(perDevice, readTime)
+
+    def _merge(self, perDevice:list[list[DeviceEvent]], readTime:float) -> list[DeviceEvent]:
+        """Merges the time ordered events of several devices on their raw kernel timestamps."""
+        clock = self.clock
+        firstRaw = perDevice[0][0][1].timestamp % WRAP
+        clock.observe_batch(firstRaw, firstRaw, readTime)
+        keyed = [[(clock.resolve(event.timestamp % WRAP), (device, event)) for device, event in deviceEvents] for deviceEvents in perDevice]
+        clock.unwrap(max(deviceKeyed[-1][0] for deviceKeyed in keyed) % WRAP)
+        if len(keyed) == 1:
+            return perDevice[0]
+        return [deviceEvent for _, deviceEvent in heapq.merge(*keyed, key = _kernelTime)]
+
+    def events(self, timeout:float|None = None) -> Iterator[DeviceEvent]:
+        """Yields (device number, Event) pairs forever, or until timeout seconds pass without any."""
+        while True:
+            batch = self.getEvents(timeout = timeout)
+            if not batch and timeout is not None:
+                return
+            yield from batch
+
+    def state(self) -> dict[int,StateSnapshot]:
+        """Returns a snapshot of every device by device number."""
+        return {device : gamepad.snapshot() for device, gamepad in sorted(self.gamepads.items())}
+
+    def axes(self, axisName) -> dict[int,float]:
+        """Returns the position of an axis specified by name or index on every device which has it."""
+        result:dict[int,float] = {}
+        for device, gamepad in sorted(self.gamepads.items()):
+            try:
+                result[device] = gamepad.axis(axisName)
+            except (ValueError, KeyError):
+                pass
+        return result
+
+    def pressed(self, buttonName) -> dict[int,bool]:
+        """Returns the state of a button specified by name or index on every device which has it."""
+        result:dict[int,bool] = {}
+        for device, gamepad in sorted(self.gamepads.items()):
+            try:
+                result[device] = gamepad.isPressed(buttonName)
+            except (ValueError, KeyError):
+                pass
+        return result
+
+    def _metricSources(self):
+        return [(gamepad.metricLabels(), gamepad.metrics) for _, gamepad in sorted(self.gamepads.items())]
+
+    def metricsText(self) -> str:
+        """Returns the runtime metrics of every device in Prometheus text format."""
+        return format_prometheus(self._metricSources())
+
+    def writeMetrics(self, path:str):
+        """Atomically writes the runtime metrics of every device in Prometheus text format to path."""
+        write_prometheus(path, self._metricSources())
+
+    def close(self):
+        """Disconnects every device."""
+        for device in list(self.gamepads):
+            self.remove(device)
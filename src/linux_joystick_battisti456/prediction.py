@@ -0,0 +1,67 @@
+"""Motion prediction for axes, to make up for a known lag between reading a stick and acting on it.
+
+Each predicted axis runs an alpha-beta filter over its events and their kernel timestamps: every event
+corrects the tracked position and velocity by a fixed fraction of how far the last prediction was off, so an
+update is a handful of arithmetic operations whatever the event rate. The prediction extrapolates that
+velocity from the newest event, and an axis which has sent nothing for longer than stale milliseconds is
+taken to be at rest, since the driver only reports changes. See Gamepad.enablePrediction and
+analysis.prediction_error for measuring the error against a capture."""
+from typing import NamedTuple
+
+class Prediction(NamedTuple):
+    """A predicted axis position (-1.0 to +1.0) and its velocity in full deflections per second."""
+    value:float
+    velocity:float
+
+class AxisPredictor:
+    """An alpha-beta filter over one axis, timestamps in milliseconds.
+
+    alpha is how much of the position error each event corrects and beta how much of it goes into the velocity,
+    higher values follow quick changes sooner and lower ones smooth out noise."""
+    __slots__ = ('alpha', 'beta', 'stale', 'timestamp', 'value', 'velocity', 'last')
+    def __init__(self, alpha:float = 0.9, beta:float = 0.4, stale:float = 50.0):
+        if not 0.0 < alpha <= 1.0 or not 0.0 <= beta <= 2.0:
+            raise ValueError('alpha must be in (0, 1] and beta in [0, 2], not %r and %r' % (alpha, beta))
+        self.alpha = alpha
+        self.beta = beta
+        self.stale = stale
+        self.timestamp:int|None = None
+        self.value = 0.0
+        # Per millisecond
+        self.velocity = 0.0
+        # The newest position reported, where the axis stays once it is at rest
+        self.last = 0.0
+
+    def __repr__(self) -> str:
+        return 'AxisPredictor(alpha=%r, beta=%r, stale=%r)' % (self.alpha, self.beta, self.stale)
+
+    def reset(self, timestamp:int|None, value:float):
+        """Restarts the filter at rest at value."""
+        self.timestamp = timestamp
+        self.value = self.last = value
+        self.velocity = 0.0
+
+    def update(self, timestamp:int, value:float):
+        """Corrects the filter with an event."""
+        if self.timestamp is None or timestamp - self.timestamp > self.stale:
+            # The axis was at rest since the last event, do not spread this move over the whole pause
+            self.reset(timestamp, value)
+            return
+        self.last = value
+        elapsed = timestamp - self.timestamp
+        if elapsed <= 0:
+            # Events within the same millisecond carry no timing, take the newest position
+            self.value = value
+            return
+        predicted = self.value + self.velocity * elapsed
+        error = value - predicted
+        self.value = predicted + self.alpha * error
+        self.velocity += self.beta * error / elapsed
+        self.timestamp = timestamp
+
+    def predict(self, now:float, ahead:float = 0.0) -> Prediction:
+        """Returns the predicted position and velocity ahead milliseconds after now (ms, may be fractional)."""
+        if self.timestamp is None or now - self.timestamp > self.stale:
+            return Prediction(self.last, 0.0)
+        value = self.value + self.velocity * (max(now - self.timestamp, 0.0) + ahead)
+        return Prediction(max(-1.0, min(value, 1.0)), self.velocity * 1000.0)
@@ -0,0 +1,78 @@
+from typing import Callable, Iterable
+
+import time
+import warnings
+
+HISTOGRAM_BUCKETS = 22
+
+type HandlerKey = tuple[str,int,Callable]
+
+def bucket_bounds(bucket:int) -> tuple[float,float]:
+    """Returns the (low, high) call time in seconds covered by a histogram bucket.
+
+    Bucket 0 holds calls under 1 us, bucket n holds calls from 2**(n-1) us up to 2**n us and the last bucket is open ended."""
+    low = 0.0 if bucket == 0 else 2 ** (bucket - 1) / 1e6
+    high = float('inf') if bucket == HISTOGRAM_BUCKETS - 1 else 2 ** bucket / 1e6
+    return low, high
+
+class HandlerStats:
+    """Timing of one handler on one event map entry, times in seconds."""
+    __slots__ = ('calls', 'totalTime', 'maxTime', 'slowCalls', 'histogram')
+    def __init__(self):
+        self.calls = 0
+        self.totalTime = 0.0
+        self.maxTime = 0.0
+        self.slowCalls = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def meanTime(self) -> float:
+        return self.totalTime / self.calls if self.calls else 0.0
+
+class HandlerProfiler:
+    """Records how long each event handler takes, see Gamepad.enableProfiler.
+
+    Any call longer than budget seconds counts as slow, raising a RuntimeWarning when warn is set
+    and calling onSlow(event, index, callback, elapsed) when given."""
+    def __init__(self, budget:float = 0.002, warn:bool = True, onSlow:Callable[[str,int,Callable,float],None]|None = None):
+        self.budget = budget
+        self.warn = warn
+        self.onSlow = onSlow
+        self.stats:dict[HandlerKey,HandlerStats] = {}
+
+    def dispatch(self, callbacks:Iterable[Callable], event:str, index:int, *args):
+        """Calls every callback with args, timing each one."""
+        for callback in callbacks:
+            start = time.perf_counter()
+            try:
+                callback(*args)
+            finally:
+                self.record(event, index, callback, time.perf_counter() - start)
+
+    def record(self, event:str, index:int, callback:Callable, elapsed:float):
+        key = (event, index, callback)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = HandlerStats()
+        stats.calls += 1
+        stats.totalTime += elapsed
+        if elapsed > stats.maxTime:
+            stats.maxTime = elapsed
+        stats.histogram[min(int(elapsed * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        if elapsed > self.budget:
+            stats.slowCalls += 1
+            if self.warn:
+                warnings.warn(
+                    '%s handler %s for %i took %.3f ms, over the %.3f ms budget' % (event, handler_name(callback), index, elapsed * 1e3, self.budget * 1e3),
+                    RuntimeWarning,
+                    stacklevel = 2
+                )
+            if self.onSlow is not None:
+                self.onSlow(event, index, callback, elapsed)
+
+    def reset(self):
+        self.stats.clear()
+
+def handler_name(callback:Callable) -> str:
+    module = getattr(callback, '__module__', None)
+    name = getattr(callback, '__qualname__', None) or repr(callback)
+    return name if module is None else '%s.%s' % (module, name)
@@ -0,0 +1,116 @@
+import array
+
+from .events import Event, EventKind
+from .clock import EventClock
+
+class RingCursor:
+    """A consumer position in an EventRing.
+
+    position is the sequence number of the next event to drain and overruns counts the events
+    this consumer lost because the ring wrapped past it."""
+    __slots__ = ('position', 'overruns')
+    def __init__(self, position:int = 0):
+        self.position = position
+        self.overruns = 0
+
+    def __repr__(self) -> str:
+        return 'RingCursor(%i, overruns=%i)' % (self.position, self.overruns)
+
+class EventRing:
+    """Bounded ring of decoded events written by one reader and drained by any number of consumers.
+
+    Every event gets a monotonically increasing sequence number. The reader fills a slot and only then
+    publishes it by advancing sequence, consumers copy the slots they want and check afterwards that the
+    reader has not lapped them, so neither side takes a lock.
+    Fields are kept in parallel arrays rather than as one object per event."""
+    def __init__(self, capacity:int = 1024):
+        if capacity <= 0:
+            raise ValueError('EventRing capacity must be positive, not %i' % capacity)
+        self.capacity = capacity
+        self.sequence = 0
+        self.overruns = 0
+        # One spare slot, so the slot the reader is filling never holds one of the last capacity events
+        size = capacity + 1
+        self.size = size
+        self.timestamps = array.array('q', bytes(8 * size))
+        self.kinds = array.array('B', bytes(size))
+        self.indices = array.array('i', bytes(4 * size))
+        self.values = array.array('d', bytes(8 * size))
+
+    def __len__(self) -> int:
+        return min(self.sequence, self.capacity)
+
+    def append(self, timestamp:int, kind:int, index:int, value:float):
+        """Adds an event, overwriting the oldest one when full. Only the reader should call this."""
+        sequence = self.sequence
+        slot = sequence % self.size
+        self.timestamps[slot] = timestamp
+        self.kinds[slot] = kind
+        self.indices[slot] = index
+        self.values[slot] = value
+        self.sequence = sequence + 1
+
+    def cursor(self, fromStart:bool = False) -> RingCursor:
+        """Returns a new consumer cursor, positioned after the newest event unless fromStart is True."""
+        if fromStart:
+            return RingCursor(max(self.sequence - self.capacity, 0))
+        return RingCursor(self.sequence)
+
+    def drainRaw(self, cursor:RingCursor, maxEvents:int|None = None, until:int|None = None) -> list[tuple[int,int,int,float]]:
+        """Returns the (timestamp, kind, index, value) of every event since cursor and advances it.
+
+        maxEvents limits how many events are returned and until stops at that sequence number.
+
+        If the reader overwrote events before they were drained they are skipped,
+        counted in cursor.overruns and in the ring wide overruns."""
+        capacity = self.capacity
+        sequence = self.sequence if until is None else min(self.sequence, until)
+        start = cursor.position
+        lost = max(sequence - capacity - start, 0)
+        start += lost
+        end = sequence if maxEvents is None else min(sequence, start + maxEvents)
+        drained:list[tuple[int,int,int,float]] = []
+        if start < end:
+            first = start % self.size
+            last = first + end - start
+            if last <= self.size:
+                drained = list(zip(self.timestamps[first:last], self.kinds[first:last], self.indices[first:last], self.values[first:last]))
+            else:
+                last -= self.size
+                drained = list(zip(
+                    self.timestamps[first:] + self.timestamps[:last],
+                    self.kinds[first:] + self.kinds[:last],
+                    self.indices[first:] + self.indices[:last],
+                    self.values[first:] + self.values[:last]
+                ))
+            # Drop any slots the reader overwrote while they were being copied
+            lapped = self.sequence - capacity - start
+            if lapped > 0:
+                drained = drained[lapped:]
+                lost += lapped
+                end = max(end, start + lapped)
+        if lost > 0:
+            cursor.overruns += lost
+            self.overruns += lost
+        cursor.position = end
+        return drained
+
+    def drain(self, cursor:RingCursor, maxEvents:int|None = None, names:tuple[dict,dict]|None = None, until:int|None = None, clock:EventClock|None = None) -> list[Event]:
+        """Returns every event since cursor as Events and advances it, see drainRaw.
+
+        names can be a (buttonNames, axisNames) pair used to fill in Event.name, otherwise the index is used.
+        clock fills in Event.hostTime when given."""
+        events:list[Event] = []
+        for timestamp, kind, index, value in self.drainRaw(cursor, maxEvents, until):
+            hostTime = clock.host_time(timestamp) if clock is not None else 0.0
+            if kind == EventKind.BUTTON:
+                if names:
+                    events.append(Event(timestamp, EventKind.BUTTON, index, None, value != 0.0, hostTime, names[0]))
+                else:
+                    events.append(Event(timestamp, EventKind.BUTTON, index, index, value != 0.0, hostTime))
+            else:
+                if names:
+                    events.append(Event(timestamp, EventKind.AXIS, index, None, value, hostTime, names[1]))
+                else:
+                    events.append(Event(timestamp, EventKind.AXIS, index, index, value, hostTime))
+        return events
@@ -0,0 +1,104 @@
+from typing import Callable, TYPE_CHECKING
+
+import os
+import sys
+import time
+import threading
+
+from .events import Event, StateSnapshot
+if TYPE_CHECKING:
+    from .Gamepad import Gamepad
+
+type SampleCallback = Callable[[StateSnapshot,list[Event]],None]
+
+class SamplerStats:
+    """Timing statistics of a Sampler, all times in seconds.
+
+    jitter is how late each tick woke up compared to its ideal deadline,
+    missed counts the deadlines which passed without a tick because the previous one overran."""
+    __slots__ = ('ticks', 'missed', 'totalJitter', 'maxJitter')
+    def __init__(self):
+        self.ticks = 0
+        self.missed = 0
+        self.totalJitter = 0.0
+        self.maxJitter = 0.0
+
+    def meanJitter(self) -> float:
+        return self.totalJitter / self.ticks if self.ticks else 0.0
+
+    def __repr__(self) -> str:
+        return 'SamplerStats(ticks=%i, missed=%i, meanJitter=%.6f, maxJitter=%.6f)' % (self.ticks, self.missed, self.meanJitter(), self.maxJitter)
+
+class Sampler(threading.Thread):
+    """Thread which calls a function at a fixed rate with a snapshot of the gamepad state and the events since the last tick.
+
+    Ticks are scheduled on absolute deadlines, using a timerfd where the platform provides one
+    (os.timerfd_create, Python 3.13+) and deadline based sleeps otherwise, so loop time and sleep
+    overshoot do not accumulate. If no background update thread is running the sampler reads
+    pending events itself before each tick.
+
+    One of these is created by the Gamepad startSampler function and closed by stop.
+    run may also be called directly to sample on the current thread."""
+    def __init__(self, gamepad:'Gamepad', rate:float, callback:SampleCallback, useTimerfd:bool = True):
+        threading.Thread.__init__(self)
+        if rate <= 0:
+            raise ValueError('Sampler rate must be positive, not %r' % rate)
+        self.gamepad = gamepad
+        self.period = 1.0 / rate
+        self.callback = callback
+        self.useTimerfd = useTimerfd and hasattr(os, 'timerfd_create')
+        self.stats = SamplerStats()
+        self.running = True
+
+    def stop(self):
+        """Stops sampling after the current tick."""
+        self.running = False
+
+    def _catchUp(self):
+        gamepad = self.gamepad
+        if not gamepad._isUpdatingInBackground():
+            while gamepad._pump(0.0) == 256:
+                pass
+
+    def _tick(self, cursor, deadline:float, expirations:int):
+        stats = self.stats
+        lateness = time.monotonic() - deadline
+        stats.ticks += 1
+        stats.missed += expirations - 1
+        stats.totalJitter += lateness
+        if lateness > stats.maxJitter:
+            stats.maxJitter = lateness
+        self._catchUp()
+        snapshot = self.gamepad.snapshot()
+        events = self.gamepad.drain(cursor, until = snapshot.sequence)
+        self.callback(snapshot, events)
+
+    def run(self):
+        cursor = self.gamepad.eventCursor()
+        period = self.period
+        start = time.monotonic()
+        if self.useTimerfd:
+            timer = os.timerfd_create(time.CLOCK_MONOTONIC)
+            try:
+                os.timerfd_settime(timer, initial = period, interval = period)
+                ticks = 0
+                while self.running and self.gamepad.isConnected():
+                    expirations = int.from_bytes(os.read(timer, 8), sys.byteorder)
+                    ticks += expirations
+                    self._tick(cursor, start + ticks * period, expirations)
+            finally:
+                os.close(timer)
+        else:
+            ticks = 1
+            while self.running and self.gamepad.isConnected():
+                deadline = start + ticks * period
+                now = time.monotonic()
+                if now < deadline:
+                    time.sleep(deadline - now)
+                    expirations = 1
+                else:
+                    expirations = int((now - deadline) / period) + 1
+                    deadline += (expirations - 1) * period
+                    ticks += expirations - 1
+                self._tick(cursor, deadline, expirations)
+                ticks += 1
@@ -0,0 +1,66 @@
+"""Opening the event source a Gamepad reads from.
+
+Besides a device path, a gamepad can read js_event records from an already open file descriptor (a pipe end
+or socket), a socket object, any readable file object or an in-memory buffer. Sources without a file descriptor
+cannot be polled, they always count as readable and an empty read means the end of the data.
+
+Reads ask for as many bytes as a batch can hold and have to return whatever is available, so buffered file
+objects are read through their unbuffered raw stream. Anything the caller already read into their buffer is
+not seen, pass them before reading from them."""
+from typing import Any
+
+import io
+import os
+import select
+import socket
+
+type Source = str|os.PathLike|int|socket.socket|bytes|bytearray|memoryview|io.RawIOBase|io.BufferedIOBase
+
+class ReadyPoll:
+    """Stands in for select.poll on a source without a file descriptor."""
+    def poll(self, timeout:float|None = None) -> list[tuple[int,int]]:
+        return [(-1, select.POLLIN)]
+
+class RawStream:
+    """Reads a buffered file object through its raw stream, keeping the buffered object (which closes
+    the file when collected) alive alongside it."""
+    def __init__(self, buffered:io.BufferedIOBase):
+        self.buffered = buffered
+        self.raw = buffered.raw#type:ignore
+
+    def read(self, size:int = -1) -> bytes|None:
+        return self.raw.read(size)
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def close(self):
+        self.buffered.close()
+
+def open_source(source:Source) -> tuple[Any,Any]:
+    """Returns a readable file object for source and a poll object to wait on it with.
+
+    Paths are opened, file descriptors are taken over and closed with the file, sockets are wrapped
+    and bytes like buffers are read from memory."""
+    if isinstance(source, (str, os.PathLike)):
+        file = open(source, 'rb', buffering = 0)
+    elif isinstance(source, int):
+        file = open(source, 'rb', buffering = 0)
+    elif isinstance(source, socket.socket):
+        file = source.makefile('rb', buffering = 0)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        file = io.BytesIO(source)
+    elif isinstance(source, io.BufferedIOBase) and hasattr(source, 'raw'):
+        # A buffered read blocks until it has every byte asked for
+        file = RawStream(source)
+    elif hasattr(source, 'read'):
+        file = source
+    else:
+        raise TypeError('Cannot read joystick events from %r' % (source,))
+    try:
+        fd = file.fileno()
+    except (AttributeError, OSError, ValueError):
+        return file, ReadyPoll()
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    return file, poller
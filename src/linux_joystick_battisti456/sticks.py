@@ -0,0 +1,60 @@
+"""Analogue sticks as 2D controls made of an X and a Y axis, see Gamepad.stick.
+
+A radial deadzone treats the stick as a whole: positions within deadzone of the center read as (0, 0) and
+the rest of the circle is rescaled so the output still reaches 1.0, without the cross shaped dead bands a
+square (per axis) deadzone leaves along the axes."""
+from typing import NamedTuple
+
+import math
+
+class StickState(NamedTuple):
+    """A stick position, x and y from -1.0 to +1.0, magnitude from 0.0 to 1.0 and angle as atan2(y, x) in radians."""
+    x:float
+    y:float
+    magnitude:float
+    angle:float
+
+CENTERED = StickState(0.0, 0.0, 0.0, 0.0)
+
+def radial_deadzone(x:float, y:float, deadzone:float) -> StickState:
+    """Returns the state of a stick at raw position (x, y) after a radial deadzone (a fraction of full deflection)."""
+    magnitude = math.hypot(x, y)
+    if magnitude <= deadzone:
+        return CENTERED
+    scaled = (min(magnitude, 1.0) - deadzone) / (1.0 - deadzone)
+    x *= scaled / magnitude
+    y *= scaled / magnitude
+    return StickState(x, y, scaled, math.atan2(y, x))
+
+class Stick:
+    """One stick of a gamepad, reading its axes on demand.
+
+    Changing deadzone takes effect from the next read or update."""
+    __slots__ = ('name', 'xIndex', 'yIndex', 'deadzone', '_axisMap', 'last')
+    def __init__(self, name:str, xIndex:int, yIndex:int, axisMap:dict, deadzone:float = 0.0):
+        if not 0.0 <= deadzone < 1.0:
+            raise ValueError('Deadzone must be from 0.0 up to 1.0, not %r' % deadzone)
+        self.name = name
+        self.xIndex = xIndex
+        self.yIndex = yIndex
+        self.deadzone = deadzone
+        self._axisMap = axisMap
+        # The state last passed to stick handlers
+        self.last = CENTERED
+
+    def __repr__(self) -> str:
+        return 'Stick(%r, %i, %i, deadzone=%r)' % (self.name, self.xIndex, self.yIndex, self.deadzone)
+
+    def state(self) -> StickState:
+        axisMap = self._axisMap
+        return radial_deadzone(axisMap.get(self.xIndex, 0.0), axisMap.get(self.yIndex, 0.0), self.deadzone)
+
+    def position(self) -> tuple[float,float]:
+        state = self.state()
+        return state.x, state.y
+
+    def magnitude(self) -> float:
+        return self.state().magnitude
+
+    def angle(self) -> float:
+        return self.state().angle
@@ -0,0 +1,131 @@
+"""A hierarchical timer wheel with millisecond ticks, used to time gestures without any threads.
+
+Level 0 has one slot per millisecond of the current 64 ms rotation, each level above covers 64 times the span
+of the one below and timers further out than the top level wait in an overflow bucket. A timer goes in the
+lowest level whose rotation contains its deadline and moves down a level (cascades) when the wheel reaches its
+slot, so inserting and cancelling are O(1) and advancing only visits slots holding timers.
+
+The wheel does not read a clock, its owner advances it, see Gamepad._runTimers."""
+from typing import Callable
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+
+class Timer:
+    """A scheduled callback, run as callback(timer, *args). Cancel it through the wheel which scheduled it."""
+    __slots__ = ('deadline', 'callback', 'args', 'bucket')
+    def __init__(self, deadline:int, callback:Callable, args:tuple):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.bucket:dict|None = None
+
+    def __repr__(self) -> str:
+        return 'Timer(%i, %r)' % (self.deadline, self.callback)
+
+    def active(self) -> bool:
+        return self.bucket is not None
+
+    def run(self):
+        self.callback(self, *self.args)
+
+class TimerWheel:
+    """Timers with deadlines in integer milliseconds on the owner's clock, starting at now."""
+    def __init__(self, now:int, levels:int = 4):
+        self.current = now
+        self.levels = levels
+        self.wheels:list[list[dict[Timer,None]]] = [[{} for _ in range(SLOTS)] for _ in range(levels)]
+        self.overflow:dict[Timer,None] = {}
+        self.expired:dict[Timer,None] = {}
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, deadline:int, callback:Callable, *args) -> Timer:
+        """Schedules callback(*args) for deadline (ms), it runs from the first advance reaching it."""
+        timer = Timer(deadline, callback, args)
+        self._insert(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer:Timer):
+        """Cancels a timer, doing nothing if it already ran or was cancelled."""
+        if timer.bucket is not None:
+            del timer.bucket[timer]
+            timer.bucket = None
+            self.count -= 1
+
+    def _insert(self, timer:Timer):
+        deadline = timer.deadline
+        if deadline <= self.current:
+            bucket = self.expired
+        else:
+            differing = deadline ^ self.current
+            for level in range(self.levels):
+                if differing >> (SLOT_BITS * (level + 1)) == 0:
+                    bucket = self.wheels[level][(deadline >> (SLOT_BITS * level)) & SLOT_MASK]
+                    break
+            else:
+                bucket = self.overflow
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def _nextTick(self) -> int:
+        """Returns the next tick where a timer is due or has to cascade."""
+        current = self.current
+        for level in range(self.levels):
+            shift = SLOT_BITS * level
+            wheel = self.wheels[level]
+            for slot in range(((current >> shift) & SLOT_MASK) + 1, SLOTS):
+                if wheel[slot]:
+                    return ((current >> (shift + SLOT_BITS)) << (shift + SLOT_BITS)) | (slot << shift)
+        # Nothing left in any rotation, only the overflow bucket which is revisited at the end of the top one
+        top = SLOT_BITS * self.levels
+        return ((current >> top) + 1) << top
+
+    def next_timeout(self, now:int) -> int|None:
+        """Returns the milliseconds from now until the wheel next needs advancing, None when it has no timers."""
+        if self.expired:
+            return 0
+        if not self.count:
+            return None
+        return max(self._nextTick() - now, 0)
+
+    def advance(self, now:int) -> list[Timer]:
+        """Moves the wheel on to now and returns the timers which became due, in deadline order, without running them."""
+        due = list(self.expired)
+        self.expired.clear()
+        while self.count > len(due) and self.current < now:
+            tick = self._nextTick()
+            if tick > now:
+                break
+            self.current = tick
+            # Cascade every level whose rotation this tick starts, highest first
+            top = SLOT_BITS * self.levels
+            if tick & ((1 << top) - 1) == 0 and self.overflow:
+                cascade = list(self.overflow)
+                self.overflow.clear()
+                for timer in cascade:
+                    self._insert(timer)
+            for level in range(self.levels - 1, 0, -1):
+                shift = SLOT_BITS * level
+                if tick & ((1 << shift) - 1) == 0:
+                    bucket = self.wheels[level][(tick >> shift) & SLOT_MASK]
+                    if bucket:
+                        cascade = list(bucket)
+                        bucket.clear()
+                        for timer in cascade:
+                            self._insert(timer)
+            bucket = self.wheels[0][tick & SLOT_MASK]
+            if bucket:
+                due.extend(bucket)
+                bucket.clear()
+            due.extend(self.expired)
+            self.expired.clear()
+        self.current = max(self.current, now)
+        for timer in due:
+            timer.bucket = None
+        self.count -= len(due)
+        return due
@@ -0,0 +1,87 @@
+"""Axis thresholds and zones, see Gamepad.addAxisTrigger.
+
+All the boundaries of every trigger on an axis are kept in one sorted TriggerIndex, so an axis event costs two
+bisects however many triggers there are, and only the triggers whose boundaries were crossed are called.
+A value exactly on a boundary counts as above it."""
+from typing import Callable, Iterable
+
+from bisect import bisect_right
+
+class Threshold:
+    """Calls onEnter when the axis reaches value (or drops below it when above is False) and onLeave when it goes back."""
+    def __init__(self, value:float, onEnter:Callable[[],None]|None = None, onLeave:Callable[[],None]|None = None, above:bool = True):
+        self.value = value
+        self.onEnter = onEnter
+        self.onLeave = onLeave
+        self.above = above
+        self.boundaries = (value,)
+
+    def __repr__(self) -> str:
+        return 'Threshold(%r, above=%r)' % (self.value, self.above)
+
+    def inside(self, value:float) -> bool:
+        return value >= self.value if self.above else value < self.value
+
+    def crossed(self, previous:float, value:float) -> tuple[Callable|None,tuple]:
+        """Returns the callback and arguments for a move from previous to value across the threshold."""
+        return (self.onEnter if self.inside(value) else self.onLeave), ()
+
+class Zones:
+    """Splits an axis into len(boundaries) + 1 zones numbered from the low end and calls onChange(zone, previousZone)
+    whenever the axis moves into another zone, once per event however many zones it skipped."""
+    def __init__(self, boundaries:Iterable[float], onChange:Callable[[int,int],None]):
+        self.boundaries = tuple(sorted(boundaries))
+        self.onChange = onChange
+
+    def __repr__(self) -> str:
+        return 'Zones(%r)' % (self.boundaries,)
+
+    @classmethod
+    def even(cls, count:int, onChange:Callable[[int,int],None], low:float = -1.0, high:float = 1.0) -> 'Zones':
+        """Returns count zones of equal width between low and high."""
+        return cls([low + (high - low) * zone / count for zone in range(1, count)], onChange)
+
+    def zone(self, value:float) -> int:
+        return bisect_right(self.boundaries, value)
+
+    def crossed(self, previous:float, value:float) -> tuple[Callable|None,tuple]:
+        zone = self.zone(value)
+        previousZone = self.zone(previous)
+        if zone == previousZone:
+            return None, ()
+        return self.onChange, (zone, previousZone)
+
+type Trigger = Threshold|Zones
+
+class TriggerIndex:
+    """The triggers of one axis with their boundaries merged into one sorted list, rebuilt rather than changed."""
+    __slots__ = ('triggers', 'bounds', 'owners')
+    def __init__(self, triggers:tuple[Trigger,...]):
+        self.triggers = triggers
+        merged:dict[float,list[Trigger]] = {}
+        for trigger in triggers:
+            for boundary in trigger.boundaries:
+                owners = merged.setdefault(boundary, [])
+                if trigger not in owners:
+                    owners.append(trigger)
+        self.bounds = sorted(merged)
+        self.owners = [tuple(merged[boundary]) for boundary in self.bounds]
+
+    def crossed(self, previous:float, value:float) -> list[Trigger]:
+        """Returns the triggers with a boundary between previous and value, in the order the axis passed them."""
+        low = bisect_right(self.bounds, previous)
+        high = bisect_right(self.bounds, value)
+        if low == high:
+            return []
+        if low < high:
+            crossed = self.owners[low:high]
+        else:
+            crossed = self.owners[high:low][::-1]
+        if len(crossed) == 1:
+            return list(crossed[0])
+        triggers:list[Trigger] = []
+        for owners in crossed:
+            for trigger in owners:
+                if trigger not in triggers:
+                    triggers.append(trigger)
+        return triggers
@@ -0,0 +1,87 @@
+"""Virtual buttons and axes computed from other controls, see Gamepad.addVirtualControl.
+
+A virtual control is recomputed only when one of its inputs changes and then behaves like a real control:
+it has a name and an index (from VIRTUAL_BASE up, above any raw js_event index), can be read with axis /
+isPressed, gets handlers, shows up in snapshots, the event ring and wait_for_change, and can itself be an
+input of another virtual control.
+
+Inputs are control names, handles, or axis(...) / button(...) for names or indices which would otherwise be
+ambiguous, for example PS3 controllers have both an 'L2' button and an 'L2' axis."""
+from typing import Any, Callable
+
+import math
+
+from .events import EventKind, BUTTON, AXIS
+
+VIRTUAL_BASE = 256
+
+type Input = Any
+
+def axis(control:str|int) -> tuple[EventKind,str|int]:
+    """Refers to the axis with a name or index as an input."""
+    return AXIS, control
+
+def button(control:str|int) -> tuple[EventKind,str|int]:
+    """Refers to the button with a name or index as an input."""
+    return BUTTON, control
+
+class VirtualControl:
+    """A control whose value is function(*input values), buttons pass True / False and axes -1.0 to +1.0."""
+    kind:EventKind = AXIS
+    def __init__(self, name:str, inputs:list[Input], function:Callable[...,Any]):
+        self.name = name
+        self.inputs = list(inputs)
+        self.function = function
+
+    def __repr__(self) -> str:
+        return '%s(%r, %r)' % (type(self).__name__, self.name, self.inputs)
+
+    def compute(self, values:list[Any], previous:Any) -> Any:
+        """Returns the new value from the input values, previous is the current value (None at first)."""
+        return self.function(*values)
+
+class VirtualAxis(VirtualControl):
+    kind = AXIS
+    def compute(self, values:list[Any], previous:Any) -> float:
+        return float(self.function(*values))
+
+class VirtualButton(VirtualControl):
+    kind = BUTTON
+    def compute(self, values:list[Any], previous:Any) -> bool:
+        return bool(self.function(*values))
+
+class HysteresisButton(VirtualButton):
+    """A button pressed when an axis reaches press and released when it falls back to release,
+    so an analogue trigger resting near one threshold does not chatter. Use negative values for the low end."""
+    def __init__(self, name:str, input:Input, press:float = 0.6, release:float = 0.4):
+        if abs(release) > abs(press):
+            raise ValueError('The release point %r must be nearer the center than the press point %r' % (release, press))
+        VirtualButton.__init__(self, name, [input], float)
+        self.press = press
+        self.release = release
+
+    def compute(self, values:list[Any], previous:Any) -> bool:
+        value = values[0] if self.press >= 0 else -values[0]
+        if previous:
+            return value > abs(self.release)
+        return value >= abs(self.press)
+
+def axis_buttons(input:Input, negativeName:str, positiveName:str, threshold:float = 0.5) -> list[VirtualButton]:
+    """Returns a pair of buttons pressed while an axis (for example a D-pad axis) is past -threshold / +threshold."""
+    return [
+        VirtualButton(negativeName, [input], lambda value: value <= -threshold),
+        VirtualButton(positiveName, [input], lambda value: value >= threshold)
+    ]
+
+def difference(name:str, positive:Input, negative:Input) -> VirtualAxis:
+    """Returns an axis of positive - negative clamped to -1.0 to +1.0, for example throttle = RT - LT."""
+    return VirtualAxis(name, [positive, negative], lambda plus, minus: max(-1.0, min(plus - minus, 1.0)))
+
+def magnitude(name:str, x:Input, y:Input) -> VirtualAxis:
+    """Returns an axis of how far a stick is from its center, 0.0 to 1.0."""
+    return VirtualAxis(name, [x, y], lambda xValue, yValue: min(math.hypot(xValue, yValue), 1.0))
+
+def angle(name:str, x:Input, y:Input) -> VirtualAxis:
+    """Returns an axis of the stick direction as atan2(y, x) / pi, -1.0 to +1.0 with 0.0 along +x.
+    Most drivers report y as positive downwards."""
+    return VirtualAxis(name, [x, y], lambda xValue, yValue: math.atan2(yValue, xValue) / math.pi)
@@ -0,0 +1,142 @@
+"""A virtual joystick writing js_event records, for driving a Gamepad without hardware.
+
+Events go to a file descriptor (the write end of a pipe or a socket), a socket object or any object with a
+write method,
+for example a BytesIO whose contents are later passed to Gamepad as its source:
+
+    joystick, readFd = VirtualJoystick.pipe(buttons = 4, axes = 2)
+    gamepad = Gamepad(source = readFd)
+    joystick.init_burst()
+    joystick.button(0, True)
+"""
+from typing import Any, Iterable
+
+import os
+import random
+import struct
+import time
+
+JS_EVENT_BUTTON = 0x01
+JS_EVENT_AXIS = 0x02
+JS_EVENT_INIT = 0x80
+
+EVENT_STRUCT = struct.Struct('IhBB')
+
+type RawEvent = tuple[int,int,int,int]
+
+class VirtualJoystick:
+    """Emits the events a joystick with the given number of buttons and axes would, keeping its state.
+
+    Timestamps come from time, a millisecond clock which only moves when advanced (or set), so the output is
+    deterministic. They wrap at 32 bits like the driver's."""
+    def __init__(self, sink:Any, buttons:int = 12, axes:int = 6):
+        self.sink = sink
+        self.buttons = [False] * buttons
+        self.axes = [0] * axes
+        self.time = 0
+        self.eventsWritten = 0
+
+    @classmethod
+    def pipe(cls, buttons:int = 12, axes:int = 6) -> tuple['VirtualJoystick',int]:
+        """Returns a virtual joystick writing into a new pipe and the read end for the Gamepad.
+
+        A pipe only holds 64 KiB, so the gamepad has to be read from another thread when writing more than that."""
+        readFd, writeFd = os.pipe()
+        return cls(writeFd, buttons, axes), readFd
+
+    def advance(self, milliseconds:int):
+        self.time = (self.time + milliseconds) & 0xFFFFFFFF
+
+    def write(self, data:bytes, chunkSize:int|None = None, delay:float = 0.0):
+        """Writes raw bytes, in chunks of chunkSize bytes with delay seconds between them when given.
+
+        Chunks which are not a multiple of 8 bytes split events across reads."""
+        if chunkSize is None:
+            chunks:Iterable[bytes] = (data,)
+        else:
+            chunks = (data[start:start + chunkSize] for start in range(0, len(data), chunkSize))
+        for count, chunk in enumerate(chunks):
+            if count and delay:
+                time.sleep(delay)
+            if isinstance(self.sink, int):
+                view = memoryview(chunk)
+                while view:
+                    view = view[os.write(self.sink, view):]
+            elif hasattr(self.sink, 'sendall'):
+                self.sink.sendall(chunk)
+            else:
+                self.sink.write(chunk)
+
+    def write_events(self, events:Iterable[RawEvent], chunkSize:int|None = None, delay:float = 0.0):
+        """Writes (timestamp, value, type, index) events as they are, without touching the state."""
+        data = b''.join(EVENT_STRUCT.pack(*event) for event in events)
+        self.eventsWritten += len(data) // EVENT_STRUCT.size
+        self.write(data, chunkSize, delay)
+
+    def button(self, index:int, pressed:bool):
+        self.buttons[index] = bool(pressed)
+        self.write_events(((self.time, int(pressed), JS_EVENT_BUTTON, index),))
+
+    def axis(self, index:int, value:float):
+        """Moves an axis to a position from -1.0 to +1.0."""
+        self.axis_raw(index, round(max(-1.0, min(value, 1.0)) * 32767))
+
+    def axis_raw(self, index:int, value:int):
+        """Moves an axis to a raw position from -32767 to +32767."""
+        self.axes[index] = value
+        self.write_events(((self.time, value, JS_EVENT_AXIS, index),))
+
+    def init_events(self) -> list[RawEvent]:
+        """Returns the init events the driver sends for the current state, on open and after a buffer overflow."""
+        events = [(self.time, int(pressed), JS_EVENT_BUTTON | JS_EVENT_INIT, index) for index, pressed in enumerate(self.buttons)]
+        events.extend((self.time, value, JS_EVENT_AXIS | JS_EVENT_INIT, index) for index, value in enumerate(self.axes))
+        return events
+
+    def init_burst(self):
+        """Writes the init events for the current state."""
+        self.write_events(self.init_events())
+
+    def random_events(self, count:int, interval:int = 1, buttonShare:float = 0.1, seed:int|None = None) -> list[RawEvent]:
+        """Returns count random events interval milliseconds apart, updating the state as if they were written.
+
+        About buttonShare of them toggle buttons, the rest move axes."""
+        generator = random.Random(seed)
+        events:list[RawEvent] = []
+        append = events.append
+        buttons, axes = self.buttons, self.axes
+        for _ in range(count):
+            if buttons and (not axes or generator.random() < buttonShare):
+                index = generator.randrange(len(buttons))
+                buttons[index] = not buttons[index]
+                append((self.time, int(buttons[index]), JS_EVENT_BUTTON, index))
+            else:
+                index = generator.randrange(len(axes))
+                axes[index] = generator.randint(-32767, 32767)
+                append((self.time, axes[index], JS_EVENT_AXIS, index))
+            self.time = (self.time + interval) & 0xFFFFFFFF
+        return events
+
+    def stream(self, count:int, rate:float|None = None, batch:int = 1024, seed:int|None = None) -> float:
+        """Writes count random events at up to rate events per second (as fast as possible when None),
+        batch events per write. Returns the achieved rate."""
+        start = time.perf_counter()
+        written = 0
+        while written < count:
+            size = min(batch, count - written)
+            data = b''.join(EVENT_STRUCT.pack(*event) for event in self.random_events(size, seed = None if seed is None else seed + written))
+            if rate is not None:
+                delay = start + written / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.write(data)
+            self.eventsWritten += size
+            written += size
+        elapsed = time.perf_counter() - start
+        return written / elapsed if elapsed > 0 else float('inf')
+
+    def disconnect(self):
+        """Closes the sink, which the reading Gamepad sees as the device disconnecting."""
+        if isinstance(self.sink, int):
+            os.close(self.sink)
+        elif hasattr(self.sink, 'close'):
+            self.sink.close()
@@ -0,0 +1,42 @@
+import signal
+
+import pytest
+
+from linux_joystick_battisti456.Controllers import PS4
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+@pytest.fixture(autouse = True)
+def watchdog():
+    """Fails a test which blocks in a read instead of hanging the run."""
+    def expire(signum, frame):
+        raise TimeoutError('Read blocked')
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.alarm(10)
+    yield
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, previous)
+
+@pytest.fixture
+def pad():
+    """A PS4 gamepad reading from a virtual joystick over a pipe, returned as (joystick, gamepad)."""
+    joystick, readFd = VirtualJoystick.pipe(buttons = 13, axes = 8)
+    gamepad = PS4(source = readFd)
+    joystick.init_burst()
+    gamepad.updateState(0.05)
+    yield joystick, gamepad
+    thread = gamepad.updateThread
+    if thread is not None and thread.is_alive():
+        # The thread only sees the stop request once it wakes up for an event
+        gamepad.stopBackgroundUpdates()
+        joystick.button(0, joystick.buttons[0])
+        thread.join()
+    if hasattr(gamepad, 'joystickFile'):
+        gamepad.disconnect()
+    joystick.disconnect()
+
+def settle(gamepad) -> int:
+    """Processes every event already written to the gamepad, returning how many there were."""
+    processed = 0
+    while count := gamepad.updateState(0.02, 256):
+        processed += count
+    return processed
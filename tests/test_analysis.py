@@ -0,0 +1,85 @@
+import struct
+
+import pytest
+
+from linux_joystick_battisti456.analysis import (
+    EVENT_CODE_AXIS, EVENT_CODE_BUTTON, EVENT_CODE_INIT, Gap,
+    analyse, axis_noise, button_timing, duration, event_rates, find_gaps, load_capture, suggest_deadzones
+)
+
+EVENT_STRUCT = struct.Struct('IhBB')
+
+def pack(events:list[tuple[int,int,int,int]]) -> bytes:
+    return b''.join(EVENT_STRUCT.pack(*event) for event in events)
+
+INIT = [
+    (1000, 0, EVENT_CODE_BUTTON | EVENT_CODE_INIT, 0),
+    (1000, 0, EVENT_CODE_AXIS | EVENT_CODE_INIT, 0),
+]
+EVENTS = INIT + [
+    (1100, 1, EVENT_CODE_BUTTON, 0),
+    (1150, 0, EVENT_CODE_BUTTON, 0),
+    (1300, 1, EVENT_CODE_BUTTON, 0),
+    (1400, 0, EVENT_CODE_BUTTON, 0),
+    (1500, 300, EVENT_CODE_AXIS, 0),
+    (1510, -300, EVENT_CODE_AXIS, 0),
+    (1520, 32767, EVENT_CODE_AXIS, 0),
+    (2100, 100, EVENT_CODE_AXIS, 0),
+]
+
+def test_load_capture_columns_and_partial_record(tmp_path):
+    data = pack(EVENTS)
+    capture = load_capture(data + data[:5])
+    assert len(capture) == len(EVENTS)
+    assert capture.timestamps == [event[0] for event in EVENTS]
+    assert capture.values == [event[1] for event in EVENTS]
+    assert capture.types == [event[2] for event in EVENTS]
+    assert capture.indices == [event[3] for event in EVENTS]
+    path = tmp_path / 'capture.bin'
+    path.write_bytes(data)
+    assert load_capture(str(path)).timestamps == capture.timestamps
+
+def test_groups_skip_init_events():
+    groups = load_capture(pack(EVENTS)).groups()
+    assert groups == {(EVENT_CODE_BUTTON, 0) : [2, 3, 4, 5], (EVENT_CODE_AXIS, 0) : [6, 7, 8, 9]}
+
+def test_duration_and_rates():
+    capture = load_capture(pack(EVENTS))
+    assert duration(capture) == pytest.approx(1.0)
+    assert event_rates(capture) == {(EVENT_CODE_BUTTON, 0) : 4.0, (EVENT_CODE_AXIS, 0) : 4.0}
+    assert duration(load_capture(pack(INIT))) == 0.0
+    assert event_rates(load_capture(pack(INIT))) == {}
+
+def test_duration_across_timestamp_wrap():
+    capture = load_capture(pack([(0xFFFFFF00, 1, EVENT_CODE_BUTTON, 0), (0x100, 0, EVENT_CODE_BUTTON, 0)]))
+    assert duration(capture) == pytest.approx(0.512)
+
+def test_axis_noise_ignores_deflection():
+    capture = load_capture(pack(EVENTS))
+    noise = axis_noise(capture)[0]
+    assert noise.samples == 3
+    assert noise.mean == pytest.approx(100 / 3 / 32767.0)
+    assert noise.jitter == pytest.approx((600 + 400) / 2 / 32767.0)
+    assert noise.peak == pytest.approx(300 / 32767.0)
+    deadzones = suggest_deadzones(capture)
+    assert deadzones[0] == pytest.approx(300 / 32767.0 * 1.25)
+
+def test_button_timing():
+    timing = button_timing(load_capture(pack(EVENTS)))[0]
+    assert timing.presses == 2
+    assert timing.durations == [50, 100]
+    assert timing.doublePressIntervals == [200]
+    assert button_timing(load_capture(pack(EVENTS)), doublePressWindow = 100)[0].doublePressIntervals == []
+
+def test_find_gaps_reports_resyncs_and_silences():
+    events = EVENTS + [(2150, 0, EVENT_CODE_AXIS | EVENT_CODE_INIT, 0), (2160, 0, EVENT_CODE_AXIS, 0)]
+    gaps = find_gaps(load_capture(pack(events)), minGap = 500)
+    assert gaps == [Gap(1520, 580, False), Gap(2100, 50, True)]
+
+def test_analyse_names_controls():
+    report = analyse(pack(EVENTS), buttonNames = {0 : 'CROSS'}, axisNames = {0 : 'LEFT-X'})
+    assert report['events'] == len(EVENTS)
+    assert report['buttonRates'] == {'CROSS' : 4.0}
+    assert set(report['axisNoise']) == {'LEFT-X'}
+    assert report['buttonTiming']['CROSS'].presses == 2
+    assert report['gaps'] == find_gaps(load_capture(pack(EVENTS)))
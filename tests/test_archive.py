@@ -0,0 +1,102 @@
+import struct
+
+import pytest
+
+from linux_joystick_battisti456.archive import ArchiveReader, ArchiveWriter
+from linux_joystick_battisti456.Controllers import PS4
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+from conftest import settle
+
+EVENT_STRUCT = struct.Struct('IhBB')
+
+def session() -> list[tuple[int,int,int,int]]:
+    """Init events then random events, several of them in each ms so chunks split events sharing a timestamp."""
+    joystick = VirtualJoystick(None, buttons = 13, axes = 8)
+    events = joystick.init_events()
+    for step in range(300):
+        events += joystick.random_events(1, interval = step % 3, buttonShare = 0.3, seed = step)
+    return events
+
+def archive(path:str, events:list, chunkEvents:int = 16) -> str:
+    with ArchiveWriter(path, chunkEvents = chunkEvents) as writer:
+        writer.write_events(events)
+    return path
+
+def test_round_trip_across_chunks(tmp_path):
+    events = session()
+    with ArchiveReader(archive(str(tmp_path / 'session.ljsa'), events)) as reader:
+        assert len(reader.index) > 10
+        assert len(reader) == len(events)
+        assert list(reader.events()) == events
+
+def test_raw_bytes_written_in_pieces(tmp_path):
+    events = session()
+    data = b''.join(EVENT_STRUCT.pack(*event) for event in events)
+    path = str(tmp_path / 'pieces.ljsa')
+    with ArchiveWriter(path, chunkEvents = 16) as writer:
+        for start in range(0, len(data), 13):
+            writer.write(data[start:start + 13])
+    with ArchiveReader(path) as reader:
+        assert list(reader.events()) == events
+
+def test_range_starting_inside_a_repeated_timestamp(tmp_path):
+    events = [(5, 1, 0x01, 0), (5, 0, 0x01, 0), (5, 1, 0x01, 0), (5, 0, 0x01, 0), (9, 100, 0x02, 1)]
+    with ArchiveReader(archive(str(tmp_path / 'repeat.ljsa'), events, 2)) as reader:
+        assert list(reader.events(5, 5)) == events[:4]
+        assert list(reader.events(6, 9)) == events[4:]
+        assert list(reader.events(9)) == events[4:]
+
+def test_state_at_matches_a_gamepad_fed_the_same_events(tmp_path):
+    events = session()
+    middle = events[len(events) // 2][0]
+    gamepad = PS4(source = b''.join(EVENT_STRUCT.pack(*event) for event in events if event[0] <= middle))
+    # A bytes source reads as disconnected once it is used up
+    with pytest.raises(IOError):
+        while True:
+            gamepad.updateState(0.0, 256)
+    with ArchiveReader(archive(str(tmp_path / 'state.ljsa'), events)) as reader:
+        state = reader.state_at(middle)
+    assert state.buttons == gamepad.pressedMap
+    assert state.axes == gamepad.axisMap
+    gamepad.disconnect()
+
+def test_replay_starts_with_the_state_at_start(tmp_path):
+    events = session()
+    start = events[len(events) // 3][0]
+    with ArchiveReader(archive(str(tmp_path / 'replay.ljsa'), events)) as reader:
+        replayed = list(EVENT_STRUCT.iter_unpack(reader.replay(start)))
+        before = reader.state_at(start - 1)
+    init = [event for event in replayed if event[2] & 0x80]
+    assert len(init) == len(before.buttons) + len(before.axes)
+    assert replayed[len(init):] == [event for event in events if event[0] >= start]
+
+def test_unclosed_archive_keeps_its_flushed_chunks(tmp_path):
+    events = session()
+    path = str(tmp_path / 'crash.ljsa')
+    writer = ArchiveWriter(path, chunkEvents = 16)
+    writer.write_events(events[:100])
+    writer.flush()
+    with ArchiveReader(path) as reader:
+        assert list(reader.events()) == events[:100]
+    writer.close()
+
+def test_capture_a_live_gamepad(pad, tmp_path):
+    joystick, gamepad = pad
+    path = str(tmp_path / 'live.ljsa')
+    writer = ArchiveWriter(path, chunkEvents = 8, chunkMs = 50)
+    gamepad.startCapture(writer)
+    for step in range(40):
+        joystick.advance(7)
+        joystick.axis(step % 8, (step % 5 - 2) / 2)
+        joystick.button(step % 13, step % 3 == 0)
+    settle(gamepad)
+    gamepad.stopCapture()
+    writer.close()
+    with ArchiveReader(path) as reader:
+        assert len(reader) == 80
+        # Chunks end after 8 events or 50 ms, whichever comes first
+        assert all(info.count <= 8 and info.last - info.first < 50 for info in reader.index)
+        state = reader.state_at(reader.end)
+    assert state.buttons == gamepad.pressedMap
+    assert state.axes == gamepad.axisMap
@@ -0,0 +1,114 @@
+import os
+import struct
+
+import pytest
+
+from linux_joystick_battisti456.calibration import (
+    CORR_FORMAT, JS_CORR_BROKEN, JS_CORR_NONE, JSIOCGAXES, JSIOCGCORR, JSIOCSCORR, AxisCorrection
+)
+from linux_joystick_battisti456.Controllers import PS4
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+class FakeJoydev:
+    """Stands in for fcntl.ioctl on a joystick with the given corrections."""
+    def __init__(self, corrections:list[AxisCorrection]):
+        self.corrections = corrections
+        self.sets = 0
+
+    def __call__(self, device, request:int, buf):
+        if request == JSIOCGAXES:
+            buf[0] = len(self.corrections)
+        elif request == JSIOCGCORR:
+            buf[:] = b''.join(correction.pack() for correction in self.corrections)
+        elif request == JSIOCSCORR:
+            self.corrections = [AxisCorrection.unpack(fields) for fields in struct.iter_unpack(CORR_FORMAT, bytes(buf))]
+            self.sets += 1
+        else:
+            raise OSError('Unexpected ioctl %#x' % request)
+
+def joydev_default(absmin:int, absmax:int, absflat:int) -> AxisCorrection:
+    """The correction joydev sets up when a device is connected."""
+    # C division truncates towards zero
+    center = int((absmax + absmin) / 2)
+    span = int((absmax - absmin) / 2) - 2 * absflat
+    scale = int((1 << 29) / span)
+    return AxisCorrection(JS_CORR_BROKEN, 0, [center - absflat, center + absflat, scale, scale, 0, 0, 0, 0])
+
+@pytest.fixture
+def fake(pad):
+    joystick, gamepad = pad
+    fake = FakeJoydev([joydev_default(-32768, 32767, 128)] * 6 + [joydev_default(-1, 1, 0)] * 2)
+    gamepad.joystickIoctl.ioctl = fake
+    return fake
+
+def test_broken_line_matches_the_driver_defaults():
+    default = joydev_default(-32768, 32767, 128)
+    assert AxisCorrection.broken_line(0, 128, 32767) == default
+    center, flat, halfRange = default.raw_range()
+    assert (center, flat) == (0, 128)
+    assert halfRange == pytest.approx(32767, abs = 2)
+
+def test_apply_matches_joydev_correct():
+    correction = AxisCorrection.broken_line(0, 1000, 32767)
+    assert correction.apply(0) == 0
+    assert correction.apply(999) == 0
+    assert correction.apply(-999) == 0
+    assert correction.apply(1001) > 0
+    assert correction.apply(-1001) < 0
+    # Full scale is reached flat raw units early, like the driver
+    assert correction.apply(32767 - 1000) >= 32766
+    assert correction.apply(32767) == 32767
+    assert correction.apply(-32768) == -32767
+    assert AxisCorrection(JS_CORR_NONE).apply(1234) == 1234
+
+def test_with_deadzone_round_trips():
+    correction = AxisCorrection.broken_line(0, 128, 32767).with_deadzone(0.1)
+    assert correction.deadzone() == pytest.approx(0.1, abs = 1e-4)
+    assert correction.with_deadzone(0.1).coef[:2] == correction.coef[:2]
+    assert correction.with_deadzone(0.1).deadzone() == pytest.approx(0.1, abs = 1e-4)
+    with pytest.raises(ValueError):
+        correction.with_deadzone(1.0)
+
+def test_set_deadzones_through_the_ioctl(pad, fake):
+    joystick, gamepad = pad
+    original = list(fake.corrections)
+    gamepad.setDeadzones({'LEFT-X' : 0.2, 4 : 0.1})
+    assert fake.sets == 1
+    corrections = gamepad.getCorrection()
+    assert corrections[0].deadzone() == pytest.approx(0.2, abs = 1e-4)
+    assert corrections[4].deadzone() == pytest.approx(0.1, abs = 1e-4)
+    assert corrections[1] == original[1]
+    gamepad.restoreCorrection()
+    assert fake.corrections == original
+
+def test_default_deadzones(pad, fake):
+    joystick, gamepad = pad
+    gamepad.applyDefaultDeadzones()
+    for name in ('LEFT-X', 'LEFT-Y', 'RIGHT-X', 'RIGHT-Y'):
+        assert fake.corrections[gamepad.getAxisIndex(name)].deadzone() == pytest.approx(0.05, abs = 1e-4)
+    assert fake.corrections[2].deadzone() == pytest.approx(128 / 32767, abs = 1e-4)
+
+def test_save_and_restore_a_file(pad, fake, tmp_path):
+    joystick, gamepad = pad
+    path = str(tmp_path / 'correction.json')
+    gamepad.setDeadzones({'RIGHT-Y' : 0.3})
+    gamepad.saveCorrection(path)
+    saved = list(fake.corrections)
+    gamepad.restoreCorrection()
+    assert fake.corrections != saved
+    gamepad.restoreCorrection(path)
+    assert fake.corrections == saved
+
+def test_set_correction_needs_every_axis(pad, fake):
+    joystick, gamepad = pad
+    with pytest.raises(ValueError):
+        gamepad.setCorrection(fake.corrections[:3])
+
+def test_disconnect_closes_the_device():
+    joystick, readFd = VirtualJoystick.pipe(buttons = 13, axes = 8)
+    gamepad = PS4(source = readFd)
+    assert gamepad.joystickIoctl.device is gamepad.joystickFile
+    gamepad.disconnect()
+    with pytest.raises(OSError):
+        os.fstat(readFd)
+    joystick.disconnect()
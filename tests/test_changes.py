@@ -0,0 +1,108 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import settle
+
+def test_changed_since_returns_only_newer_changes(pad):
+    joystick, gamepad = pad
+    generation, buttons, axes = gamepad.changed_since(0)
+    joystick.button(0, True)
+    joystick.axis(2, 1.0)
+    settle(gamepad)
+    newer, buttons, axes = gamepad.changed_since(generation)
+    assert newer > generation
+    assert buttons == {0: True}
+    assert list(axes) == [2]
+    assert gamepad.changed_since(newer) == (newer, {}, {})
+
+def test_changed_since_filters_controls(pad):
+    joystick, gamepad = pad
+    generation, _, _ = gamepad.changed_since(0, ['CROSS', 'CIRCLE'])
+    joystick.button(0, True)
+    joystick.button(3, True)
+    settle(gamepad)
+    _, buttons, axes = gamepad.changed_since(generation, ['CROSS', 'CIRCLE'])
+    assert buttons == {0: True}
+    assert axes == {}
+
+def test_version_moves_with_each_change(pad):
+    joystick, gamepad = pad
+    first = gamepad.version('R1')
+    joystick.button(5, True)
+    settle(gamepad)
+    second = gamepad.version('R1')
+    assert second > first
+    joystick.axis(0, 0.3)
+    settle(gamepad)
+    assert gamepad.version('R1') == second
+    joystick.button(5, False)
+    settle(gamepad)
+    assert gamepad.version('R1') > second
+
+def test_wait_for_change_async_reads_on_the_loop(pad):
+    joystick, gamepad = pad
+    async def main():
+        waiter = asyncio.create_task(gamepad.wait_for_change_async(['SQUARE'], 2.0))
+        await asyncio.sleep(0.01)
+        joystick.button(3, True)
+        return await waiter
+    assert asyncio.run(main()) == {'SQUARE'}
+
+def test_wait_for_change_async_times_out(pad):
+    joystick, gamepad = pad
+    assert asyncio.run(gamepad.wait_for_change_async(['SQUARE'], 0.05)) == set()
+    assert gamepad.asyncWaiters == []
+
+def test_changed_since_zero_returns_every_control(pad):
+    joystick, gamepad = pad
+    generation, buttons, axes = gamepad.changed_since(0)
+    assert (len(buttons), len(axes)) == (13, 8)
+    assert gamepad.changed_since(generation) == (generation, {}, {})
+
+def test_changed_since_takes_handles(pad):
+    joystick, gamepad = pad
+    handle = gamepad.axis_handle('RIGHT-X')
+    generation, _, _ = gamepad.changed_since(0, [handle, gamepad.button('PS')])
+    joystick.axis(3, -1.0)
+    joystick.axis(0, 1.0)
+    settle(gamepad)
+    assert gamepad.changed_since(generation, [handle, gamepad.button('PS')])[1:] == ({}, {3: -1.0})
+    assert gamepad.version(handle) > generation
+
+def test_version_of_an_unknown_control(pad):
+    joystick, gamepad = pad
+    with pytest.raises(ValueError):
+        gamepad.version('NOPE')
+
+def test_wait_for_change_reads_while_waiting(pad):
+    joystick, gamepad = pad
+    timer = threading.Timer(0.05, joystick.button, (7, True))
+    timer.start()
+    assert gamepad.wait_for_change(['R2', 'L2'], 2.0) == {'R2'}
+    timer.join()
+    assert gamepad.wait_for_change(['R2'], 0.05) == set()
+    assert gamepad.watchCounts == {}
+
+def test_wait_for_change_in_background(pad):
+    joystick, gamepad = pad
+    gamepad.startBackgroundUpdates(waitForReady = False)
+    timer = threading.Timer(0.05, joystick.axis, (4, 0.5))
+    timer.start()
+    assert gamepad.wait_for_change(['RIGHT-Y'], 2.0) == {'RIGHT-Y'}
+    timer.join()
+
+def test_cancelled_async_wait_cleans_up(pad):
+    joystick, gamepad = pad
+    async def main():
+        waiter = asyncio.create_task(gamepad.wait_for_change_async(['SQUARE']))
+        await asyncio.sleep(0.02)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # remove_reader returns False when nothing was left watching the device
+        assert not asyncio.get_running_loop().remove_reader(gamepad.joystickFile.fileno())
+    asyncio.run(main())
+    assert gamepad.asyncWaiters == []
+    assert gamepad.watchCounts == {}
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from linux_joystick_battisti456.clock import HALF_WRAP, WRAP, EventClock
+
+from conftest import settle
+
+def test_unwrap_across_a_wrap():
+    clock = EventClock()
+    assert clock.unwrap(WRAP - 10) == WRAP - 10
+    assert clock.unwrap(5) == WRAP + 5
+    # Slightly out of order, from before the wrap
+    assert clock.unwrap(WRAP - 3) == WRAP - 3
+    assert clock.unwrap(20) == WRAP + 20
+
+def test_host_time_follows_the_fastest_read():
+    clock = EventClock()
+    clock.observe_batch(1000, 1000, 50.0)
+    clock.observe_batch(2000, 2000, 50.9)
+    assert clock.offset == pytest.approx(48900.0)
+    assert clock.host_time(1500) == pytest.approx(50.4)
+    assert clock.kernel_time(51.0) == pytest.approx(2100.0)
+
+@pytest.mark.parametrize('idleDays', [1, 25, 40, 60, 100])
+def test_long_idle_moves_forwards(idleDays):
+    clock = EventClock()
+    clock.observe_batch(1000, 1000, 10.0)
+    assert clock.unwrap(1000) == 1000
+    idle = idleDays * 86400 * 1000
+    raw = (1000 + idle) % WRAP
+    clock.observe_batch(raw, raw, 10.0 + idle / 1000.0)
+    assert clock.unwrap(raw) == 1000 + idle
+    assert clock.unwrap((raw + 5) % WRAP) == 1000 + idle + 5
+
+def test_quick_batches_keep_the_wrap_heuristic():
+    clock = EventClock()
+    # Replayed captures arrive far faster than they were recorded
+    for step, hostTime in zip(range(0, 4 * WRAP, HALF_WRAP - 1), range(100)):
+        raw = step % WRAP
+        clock.observe_batch(raw, raw, float(hostTime) / 1000.0)
+        assert clock.unwrap(raw) == step
+
+def test_gamepad_after_a_month_without_events(pad, monkeypatch):
+    joystick, gamepad = pad
+    joystick.advance(1000)
+    joystick.button(0, True)
+    settle(gamepad)
+    month = 30 * 86400
+    realMonotonic = time.monotonic
+    monkeypatch.setattr(time, 'monotonic', lambda: realMonotonic() + month)
+    joystick.advance(month * 1000)
+    joystick.button(0, False)
+    settle(gamepad)
+    assert gamepad.lastTimestamp == 1000 + month * 1000
+    assert gamepad.lastEdge('CROSS')[2] == 1000 + month * 1000
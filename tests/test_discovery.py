@@ -0,0 +1,74 @@
+import os
+import pathlib
+
+import pytest
+
+from linux_joystick_battisti456.Controllers import PS4, BaseGamepad, Xbox360
+from linux_joystick_battisti456.discovery import describe, discover
+from linux_joystick_battisti456.known_controller_names import get_device_type
+from linux_joystick_battisti456.pool import ControllerPool
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+def add_device(root, number:int, name:str, vendor:str = '', product:str = '', phys:str = '', uniq:str = ''):
+    """Lays out sysfs the way the kernel does: jsN links to the parent input device."""
+    device = root / 'devices' / ('input%i' % number)
+    (device / 'id').mkdir(parents = True)
+    (device / 'name').write_text(name + '\n')
+    (device / 'phys').write_text(phys + '\n')
+    (device / 'uniq').write_text(uniq + '\n')
+    if vendor:
+        (device / 'id' / 'vendor').write_text(vendor + '\n')
+        (device / 'id' / 'product').write_text(product + '\n')
+        (device / 'id' / 'bustype').write_text('0003\n')
+        (device / 'id' / 'version').write_text('8111\n')
+    (root / 'class' / ('js%i' % number)).mkdir(parents = True)
+    os.symlink(device, root / 'class' / ('js%i' % number) / 'device')
+
+@pytest.fixture
+def sysfs(tmp_path):
+    add_device(tmp_path, 0, 'Sony Interactive Entertainment Wireless Controller', '054c', '09cc', 'usb-0000:00:14.0-2/input3')
+    add_device(tmp_path, 3, 'Microsoft X-Box 360 pad', uniq = '00:11:22:33:44:55')
+    add_device(tmp_path, 4, 'Unheard of Stick', '1234', 'abcd')
+    (tmp_path / 'class' / 'event7').mkdir()
+    (tmp_path / 'class' / 'js9').mkdir()
+    return str(tmp_path / 'class')
+
+def test_describe(sysfs):
+    info = describe(0, sysfs)
+    assert (info.number, info.name, info.id, info.bustype, info.version) == (0, 'Sony Interactive Entertainment Wireless Controller', (0x054c, 0x09cc), 3, 0x8111)
+    assert info.phys == 'usb-0000:00:14.0-2/input3'
+    assert info.path == '/dev/input/js0'
+    assert describe(3, sysfs).uniq == '00:11:22:33:44:55'
+    assert describe(3, sysfs).id == (0, 0)
+    assert describe(1, sysfs) is None
+
+def test_discover_lists_joysticks_only(sysfs, tmp_path):
+    assert [info.number for info in discover(sysfs)] == [0, 3, 4]
+    assert discover(str(tmp_path / 'missing')) == []
+
+def test_device_type_by_id_then_name(sysfs, capsys):
+    assert get_device_type(describe(0, sysfs)) is PS4
+    assert get_device_type(describe(3, sysfs)) is Xbox360
+    assert get_device_type(describe(4, sysfs)) is BaseGamepad
+    assert 'Unheard of Stick' in capsys.readouterr().out
+
+def test_pool_enumerates_through_its_sysfs_root(sysfs):
+    loaded = []
+    joysticks = []
+    def loader(device:int, sysfsRoot:str):
+        loaded.append((device, sysfsRoot))
+        joystick, readFd = VirtualJoystick.pipe()
+        joysticks.append(joystick)
+        return get_device_type(describe(device, sysfsRoot))(device, readFd)
+    pool = ControllerPool(None, loader, sysfs)
+    try:
+        assert loaded == [(0, sysfs), (3, sysfs), (4, sysfs)]
+        assert isinstance(pool[0], PS4)
+        assert pool.deviceInfo[3].uniq == '00:11:22:33:44:55'
+        assert pool.refresh() == []
+        add_device(pathlib.Path(sysfs).parent, 5, 'Microsoft X-Box 360 pad')
+        assert pool.refresh() == [5]
+    finally:
+        pool.close()
+        for joystick in joysticks:
+            joystick.disconnect()
@@ -0,0 +1,72 @@
+from conftest import settle
+
+def test_press_counts_survive_between_polls(pad):
+    joystick, gamepad = pad
+    for _ in range(3):
+        joystick.advance(5)
+        joystick.button(0, True)
+        joystick.advance(5)
+        joystick.button(0, False)
+    settle(gamepad)
+    presses, pressCursor = gamepad.pressCountSince('CROSS')
+    releases, releaseCursor = gamepad.releaseCountSince('CROSS')
+    assert (presses, releases) == (3, 3)
+    assert not gamepad.isPressed('CROSS')
+
+    joystick.advance(5)
+    joystick.button(0, True)
+    settle(gamepad)
+    assert gamepad.pressCountSince('CROSS', pressCursor) == (1, 4)
+    assert gamepad.releaseCountSince('CROSS', releaseCursor) == (0, 3)
+    assert gamepad.lastEdge('CROSS') == (4, 3, 35)
+
+def test_been_pressed_reports_each_press_once(pad):
+    joystick, gamepad = pad
+    assert not gamepad.beenPressed('CIRCLE')
+    joystick.button(1, True)
+    joystick.button(1, False)
+    settle(gamepad)
+    assert gamepad.beenPressed('CIRCLE')
+    assert not gamepad.beenPressed('CIRCLE')
+    assert gamepad.beenReleased('CIRCLE')
+    assert not gamepad.beenReleased('CIRCLE')
+
+def test_resync_counts_hidden_edges(pad):
+    joystick, gamepad = pad
+    assert gamepad.pressCountSince('TRIANGLE') == (0, 0)
+    # The press was lost in a driver buffer overflow, only the init events re-sent after it arrive
+    joystick.buttons[2] = True
+    joystick.init_burst()
+    settle(gamepad)
+    assert gamepad.isPressed('TRIANGLE')
+    assert gamepad.pressCountSince('TRIANGLE') == (1, 1)
+    joystick.init_burst()
+    settle(gamepad)
+    assert gamepad.pressCountSince('TRIANGLE') == (1, 1)
+
+def test_handles_count_independently(pad):
+    joystick, gamepad = pad
+    first = gamepad.button('L1')
+    joystick.button(4, True)
+    joystick.button(4, False)
+    settle(gamepad)
+    second = gamepad.button('L1')
+    joystick.button(4, True)
+    settle(gamepad)
+    assert first.pressCount() == 2
+    assert first.pressCount() == 0
+    assert second.pressCount() == 1
+    assert second.beenReleased() is False
+    assert first.releaseCount() == 1
+    assert gamepad.pressCountSince(first, 1) == (1, 2)
+    assert first.isPressed()
+
+def test_edges_on_the_fast_path_are_counted(pad):
+    joystick, gamepad = pad
+    # No handlers or watchers, so these events take the fast path
+    for _ in range(100):
+        joystick.button(5, True)
+        joystick.button(5, False)
+    settle(gamepad)
+    assert gamepad.pressCountSince('R1') == (100, 100)
+    assert gamepad.releaseCountSince('R1') == (100, 100)
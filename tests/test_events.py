@@ -0,0 +1,46 @@
+from linux_joystick_battisti456.events import AXIS, BUTTON, Event
+
+def test_name_is_looked_up_lazily():
+    names = {3 : 'SQUARE'}
+    event = Event(5, BUTTON, 3, None, True, 0.0, names)
+    names[3] = 'RENAMED'
+    assert event.name == 'RENAMED'
+    names[3] = 'SQUARE'
+    assert event.name == 'RENAMED'
+    assert Event(5, BUTTON, 9, None, True, 0.0, names).name == 9
+    event.name = 'CROSS'
+    assert event.name == 'CROSS'
+
+def test_copy_is_independent():
+    event = Event(7, AXIS, 1, None, 0.5, 1.25, {1 : 'LEFT-Y'})
+    copy = event.copy()
+    event.value = -0.5
+    assert (copy.timestamp, copy.kind, copy.index, copy.name, copy.value, copy.hostTime) == (7, AXIS, 1, 'LEFT-Y', 0.5, 1.25)
+    assert not hasattr(copy, '__dict__')
+
+def test_events_refilled_in_place(pad):
+    joystick, gamepad = pad
+    mine = Event()
+    joystick.button(0, True)
+    assert gamepad.getNextEventObject(event = mine) is mine
+    assert (mine.kind, mine.name, mine.value) == (BUTTON, 'CROSS', True)
+    gamepad.reuseEvents = True
+    joystick.axis(0, 1.0)
+    joystick.button(0, False)
+    first = gamepad.getNextEventObject()
+    kept = first.copy()
+    second = gamepad.getNextEventObject()
+    assert first is second is gamepad.reusableEvent
+    assert (kept.kind, kept.name, kept.value) == (AXIS, 'LEFT-X', 1.0)
+    assert (second.kind, second.name, second.value) == (BUTTON, 'CROSS', False)
+
+def test_snapshot_is_a_copy(pad):
+    joystick, gamepad = pad
+    joystick.button(1, True)
+    joystick.axis(3, -1.0)
+    gamepad.updateState(0.05)
+    snapshot = gamepad.snapshot()
+    joystick.button(1, False)
+    gamepad.updateState(0.05)
+    assert snapshot.isPressed('CIRCLE') and not gamepad.isPressed('CIRCLE')
+    assert snapshot.axis('RIGHT-X') == snapshot.axis(3) == -1.0
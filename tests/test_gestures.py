@@ -0,0 +1,75 @@
+import threading
+import time
+
+def run_for(gamepad, seconds:float):
+    """Reads the gamepad for seconds, which is what drives gesture timers without a background thread."""
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        gamepad.updateState(remaining)
+
+def test_long_press_fires_once_while_held(pad):
+    joystick, gamepad = pad
+    calls = []
+    gamepad.addLongPressHandler('CROSS', lambda: calls.append(time.monotonic()), 0.05)
+    joystick.button(0, True)
+    start = time.monotonic()
+    run_for(gamepad, 0.15)
+    assert len(calls) == 1
+    assert 0.045 <= calls[0] - start < 0.1
+    joystick.button(0, False)
+    # Released early, nothing fires
+    joystick.button(0, True)
+    run_for(gamepad, 0.02)
+    joystick.button(0, False)
+    run_for(gamepad, 0.08)
+    assert len(calls) == 1
+
+def test_double_tap_needs_both_presses_in_the_window(pad):
+    joystick, gamepad = pad
+    taps = []
+    gamepad.addDoubleTapHandler('CIRCLE', lambda: taps.append(1), 0.1)
+    for _ in range(2):
+        joystick.button(1, True)
+        joystick.button(1, False)
+        run_for(gamepad, 0.02)
+    assert taps == [1]
+    joystick.button(1, True)
+    joystick.button(1, False)
+    run_for(gamepad, 0.15)
+    joystick.button(1, True)
+    joystick.button(1, False)
+    run_for(gamepad, 0.02)
+    assert taps == [1]
+
+def test_repeat_while_held(pad):
+    joystick, gamepad = pad
+    repeats = []
+    gamepad.addRepeatHandler('TRIANGLE', lambda: repeats.append(1), 0.05, 0.02)
+    joystick.button(2, True)
+    run_for(gamepad, 0.16)
+    joystick.button(2, False)
+    run_for(gamepad, 0.06)
+    # At 50, 70, 90, 110, 130 and 150 ms
+    assert 4 <= len(repeats) <= 6
+
+def test_removed_gesture_does_not_fire(pad):
+    joystick, gamepad = pad
+    calls = []
+    callback = lambda: calls.append(1)
+    gamepad.addLongPressHandler('SQUARE', callback, 0.03)
+    joystick.button(3, True)
+    run_for(gamepad, 0.01)
+    gamepad.removeGestureHandler('SQUARE', callback)
+    run_for(gamepad, 0.05)
+    assert calls == []
+    assert not gamepad.gestureButtons
+
+def test_long_press_in_background(pad):
+    joystick, gamepad = pad
+    fired = threading.Event()
+    gamepad.addLongPressHandler('L1', fired.set, 0.05)
+    gamepad.startBackgroundUpdates(waitForReady = False)
+    start = time.monotonic()
+    joystick.button(4, True)
+    assert fired.wait(1.0)
+    assert time.monotonic() - start >= 0.045
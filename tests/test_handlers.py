@@ -0,0 +1,73 @@
+import threading
+
+from conftest import settle
+
+def test_handlers_run_in_order_and_ignore_duplicates(pad):
+    joystick, gamepad = pad
+    calls = []
+    first, second = lambda: calls.append('first'), lambda: calls.append('second')
+    gamepad.addButtonPressedHandler('CROSS', first)
+    gamepad.addButtonPressedHandler('CROSS', second)
+    gamepad.addButtonPressedHandler('CROSS', first)
+    joystick.button(0, True)
+    settle(gamepad)
+    assert calls == ['first', 'second']
+    gamepad.removeButtonPressedHandler('CROSS', first)
+    gamepad.removeButtonPressedHandler('CROSS', second)
+    assert 0 not in gamepad.pressedEventMap
+
+def test_changes_from_a_handler_apply_from_the_next_event(pad):
+    joystick, gamepad = pad
+    calls = []
+    def once():
+        calls.append('once')
+        gamepad.removeButtonPressedHandler('CROSS', once)
+        gamepad.addButtonPressedHandler('CROSS', later)
+    def later():
+        calls.append('later')
+    gamepad.addButtonPressedHandler('CROSS', once)
+    for pressed in (True, False, True):
+        joystick.button(0, pressed)
+    settle(gamepad)
+    assert calls == ['once', 'later']
+
+def test_registering_while_dispatching(pad):
+    joystick, gamepad = pad
+    moves = []
+    gamepad.addAxisMovedHandler('LEFT-X', moves.append)
+    gamepad.startBackgroundUpdates()
+    stop = threading.Event()
+    def churn():
+        callback = lambda value: None
+        while not stop.is_set():
+            gamepad.addAxisMovedHandler('LEFT-X', callback)
+            gamepad.removeAxisMovedHandler('LEFT-X', callback)
+    thread = threading.Thread(target = churn)
+    thread.start()
+    try:
+        for step in range(1, 201):
+            joystick.axis(0, step / 200)
+        while len(moves) < 200 and thread.is_alive():
+            stop.wait(0.01)
+    finally:
+        stop.set()
+        thread.join()
+    assert moves[-1] == 1.0 and len(moves) == 200
+
+def test_only_controls_with_handlers_are_hot(pad):
+    joystick, gamepad = pad
+    assert gamepad.hotButtons == frozenset() and gamepad.hotAxes == frozenset()
+    callback = lambda value: None
+    gamepad.addAxisMovedHandler('RIGHT-Y', callback)
+    gamepad.addButtonChangedHandler('SQUARE', callback)
+    assert gamepad.hotAxes == {4} and gamepad.hotButtons == {3}
+    # Cold controls still update their state
+    joystick.axis(0, 1.0)
+    joystick.button(1, True)
+    settle(gamepad)
+    assert gamepad.axis('LEFT-X') == 1.0 and gamepad.isPressed('CIRCLE')
+    gamepad.watch()
+    assert gamepad.hotAxes is None
+    gamepad.unwatch()
+    gamepad.removeAllEventHandlers()
+    assert gamepad.hotButtons == frozenset() and gamepad.hotAxes == frozenset()
@@ -0,0 +1,52 @@
+import pytest
+
+from linux_joystick_battisti456.history import ControlHistory
+
+from conftest import settle
+
+def filled(capacity:int, events:list[tuple[int,float]]) -> ControlHistory:
+    history = ControlHistory(capacity)
+    for timestamp, value in events:
+        history.append(timestamp, value)
+    return history
+
+def test_window_queries():
+    history = filled(8, [(0, 0.0), (10, 1.0), (20, -0.5), (40, 0.25)])
+    assert history.value_at(-1) is None
+    assert history.value_at(15) == 1.0
+    assert history.min(5, 25) == -0.5
+    assert history.max(12, 18) == 1.0
+    # 10 ms at 1.0 and 20 ms at -0.5
+    assert history.integral(10, 40) == pytest.approx(0.0)
+    assert history.mean(0, 20) == pytest.approx(0.5)
+    assert history.rate(10, 20) == pytest.approx(-150.0)
+
+def test_oldest_events_are_overwritten():
+    history = filled(4, [(timestamp, timestamp / 10) for timestamp in range(10)])
+    assert len(history) == 4
+    assert (history.oldest(), history.newest()) == (6, 9)
+    assert history.value_at(5) is None
+    # The window wraps around the end of the arrays
+    assert history.min(6, 9) == pytest.approx(0.6)
+    assert history.max(0, 9) == pytest.approx(0.9)
+    assert history.min(0, 5) is None
+    assert history.integral(0, 9) == pytest.approx(0.0021)
+    assert history.rate(0, 9) is None
+
+def test_gamepad_records_enabled_controls(pad):
+    joystick, gamepad = pad
+    stick = gamepad.enableHistory('LEFT-X', 16)
+    button = gamepad.enableHistory('CROSS', 16)
+    for step in range(5):
+        joystick.advance(10)
+        joystick.axis(0, step / 4)
+        joystick.button(0, step % 2 == 0)
+    settle(gamepad)
+    assert len(stick) == 5
+    assert stick.value_at(30) == pytest.approx(0.5, abs = 1e-4)
+    assert stick.max(0, 50) == pytest.approx(1.0)
+    assert button.value_at(40) == 0.0
+    assert gamepad.history('CROSS') is button
+    gamepad.disableHistory('CROSS')
+    with pytest.raises(ValueError):
+        gamepad.history('CROSS')
@@ -0,0 +1,96 @@
+import socket
+
+import pytest
+
+from linux_joystick_battisti456.metrics import METRICS, GamepadMetrics, MetricsServer, format_prometheus, write_prometheus
+
+from conftest import settle
+
+def scrape(path:str) -> str:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        chunks = []
+        while chunk := client.recv(4096):
+            chunks.append(chunk)
+    return b''.join(chunks).decode('utf-8')
+
+def test_counters(pad):
+    joystick, gamepad = pad
+    joystick.button(0, True)
+    joystick.axis(0, 0.5)
+    joystick.axis(1, 0.5)
+    settle(gamepad)
+    counters = gamepad.metricsDict()
+    assert (counters['initEvents'], counters['buttonEvents'], counters['axisEvents']) == (21, 1, 2)
+    assert counters['bytesRead'] == 24 * 8
+    assert counters['backlog'] == 0
+    text = gamepad.metricsText()
+    assert 'linux_joystick_events_total{device="0",controller="PlayStation 4 controller",type="axis"} 2' in text
+
+def test_backlog_counts_events_held_from_a_batch(pad):
+    joystick, gamepad = pad
+    for index in range(4):
+        joystick.button(index, True)
+    assert gamepad.backlog() == 4
+    gamepad.updateState()
+    assert gamepad.backlog() == 3
+    joystick.button(5, True)
+    assert gamepad.backlog() == 4
+
+def test_metrics_after_disconnect(pad, tmp_path):
+    joystick, gamepad = pad
+    gamepad.disconnect()
+    assert gamepad.metricsDict()['backlog'] == -1
+    gamepad.writeMetrics(str(tmp_path / 'gamepad.prom'))
+    assert 'linux_joystick_backlog_events{device="0",controller="PlayStation 4 controller"} -1' in (tmp_path / 'gamepad.prom').read_text()
+
+def test_write_prometheus_sums_sources(tmp_path):
+    first, second = GamepadMetrics(), GamepadMetrics()
+    first.readCalls, second.readCalls = 3, 4
+    total = GamepadMetrics()
+    total.add(first)
+    total.add(second)
+    path = str(tmp_path / 'total.prom')
+    write_prometheus(path, [({'device' : 'all'}, total)])
+    with open(path) as file:
+        assert 'linux_joystick_read_calls_total{device="all"} 7\n' in file.read()
+    assert format_prometheus([]).count('# TYPE') == len(METRICS)
+
+def test_server(tmp_path):
+    path = str(tmp_path / 'metrics.sock')
+    metrics = GamepadMetrics()
+    metrics.disconnects = 2
+    server = MetricsServer(path, lambda: [({'device' : '1'}, metrics)])
+    server.start()
+    try:
+        assert 'linux_joystick_disconnects_total{device="1"} 2' in scrape(path)
+        with pytest.raises(FileExistsError):
+            MetricsServer(path, lambda: [])
+    finally:
+        server.stop()
+        server.join()
+
+def test_server_survives_a_failing_source(tmp_path):
+    path = str(tmp_path / 'metrics.sock')
+    def source():
+        raise AttributeError('gone')
+    server = MetricsServer(path, source)
+    server.start()
+    try:
+        assert scrape(path).startswith('# Collecting metrics failed')
+        assert scrape(path).startswith('# Collecting metrics failed')
+    finally:
+        server.stop()
+        server.join()
+
+def test_server_only_replaces_stale_sockets(tmp_path):
+    path = str(tmp_path / 'metrics.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    server = MetricsServer(path, lambda: [])
+    server.stop()
+    (tmp_path / 'regular').write_text('keep')
+    with pytest.raises(FileExistsError):
+        MetricsServer(str(tmp_path / 'regular'), lambda: [])
+    assert (tmp_path / 'regular').read_text() == 'keep'
@@ -0,0 +1,79 @@
+import pytest
+
+from linux_joystick_battisti456.clock import WRAP
+from linux_joystick_battisti456.Controllers import PS4
+from linux_joystick_battisti456.pool import ControllerPool
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+@pytest.fixture
+def players(tmp_path):
+    """A pool of two virtual PS4 controllers, returned as (pool, joysticks by device number)."""
+    joysticks:dict[int,VirtualJoystick] = {}
+    def loader(device:int, sysfsRoot:str):
+        joystick, readFd = VirtualJoystick.pipe(buttons = 13, axes = 8)
+        joysticks[device] = joystick
+        return PS4(device, readFd)
+    pool = ControllerPool([0, 1], loader, str(tmp_path))
+    for joystick in joysticks.values():
+        joystick.init_burst()
+    pool.getEvents(timeout = 0.05, skipInit = False)
+    pool.getEvents(timeout = 0.05, skipInit = False)
+    yield pool, joysticks
+    pool.close()
+    for joystick in joysticks.values():
+        joystick.disconnect()
+
+def drain(pool:ControllerPool) -> list:
+    events = []
+    while batch := pool.getEvents(timeout = 0.05):
+        events.extend(batch)
+    return events
+
+def test_merged_in_kernel_time_order(players):
+    pool, joysticks = players
+    # Device 1's host time offset was estimated from a late read
+    pool[1].clock.offset += 10.0
+    for step in range(6):
+        joystick = joysticks[step % 2]
+        joystick.time = 1000 + step * 3
+        joystick.button(step, True)
+    events = drain(pool)
+    assert [(device, event.timestamp) for device, event in events] == [(step % 2, 1000 + step * 3) for step in range(6)]
+
+def test_merged_across_a_wrap(players):
+    pool, joysticks = players
+    joysticks[0].time = WRAP - 2
+    joysticks[0].button(0, True)
+    joysticks[1].time = WRAP - 1
+    joysticks[1].button(1, True)
+    drain(pool)
+    # Device 1 only sees the kernel clock after the wrap, device 0 on both sides of it
+    joysticks[0].time = 1
+    joysticks[0].button(0, False)
+    joysticks[1].time = 3
+    joysticks[1].button(1, False)
+    joysticks[0].time = 5
+    joysticks[0].button(2, True)
+    events = drain(pool)
+    assert [(device, event.timestamp % WRAP) for device, event in events] == [(0, 1), (1, 3), (0, 5)]
+
+def test_held_events_do_not_wait_for_new_input(players):
+    pool, joysticks = players
+    joysticks[0].button(0, True)
+    joysticks[0].button(1, True)
+    gamepad = pool[0]
+    gamepad.updateState()
+    assert gamepad.pendingRawEvents
+    events = pool.getEvents(timeout = None)
+    assert [(device, event.name) for device, event in events] == [(0, 'CIRCLE')]
+
+def test_disconnected_devices_are_dropped(players):
+    pool, joysticks = players
+    joysticks[1].disconnect()
+    joysticks[0].button(0, True)
+    drain(pool)
+    assert pool.disconnected == [1]
+    assert list(pool) == [0]
+    assert pool.pressed('CROSS') == {0: True}
+    # Already closed
+    joysticks[1].sink = None
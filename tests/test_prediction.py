@@ -0,0 +1,68 @@
+import struct
+
+import pytest
+
+from linux_joystick_battisti456.analysis import load_capture, prediction_error
+from linux_joystick_battisti456.prediction import AxisPredictor
+
+from conftest import settle
+
+def ramp(predictor:AxisPredictor, start:int, steps:int, interval:int = 10, speed:float = 0.001):
+    for step in range(steps):
+        timestamp = start + step * interval
+        predictor.update(timestamp, speed * (timestamp - start))
+
+def test_tracks_a_steady_ramp():
+    predictor = AxisPredictor()
+    ramp(predictor, 1000, 50)
+    assert predictor.velocity == pytest.approx(0.001)
+    prediction = predictor.predict(1490, 50)
+    assert prediction.value == pytest.approx(0.54)
+    assert prediction.velocity == pytest.approx(1.0)
+
+def test_prediction_is_clamped():
+    predictor = AxisPredictor()
+    ramp(predictor, 0, 50, speed = 0.002)
+    assert predictor.predict(490, 45).value == 1.0
+
+def test_stale_axis_is_at_rest():
+    predictor = AxisPredictor(stale = 50.0)
+    ramp(predictor, 0, 20)
+    assert predictor.predict(190 + 51) == (predictor.last, 0.0)
+    # An event after a pause restarts the filter instead of spreading the move over the pause
+    predictor.update(1000, 0.5)
+    assert (predictor.value, predictor.velocity) == (0.5, 0.0)
+
+def test_same_millisecond_takes_newest_position():
+    predictor = AxisPredictor()
+    ramp(predictor, 0, 10)
+    velocity = predictor.velocity
+    predictor.update(90, 0.2)
+    assert (predictor.value, predictor.velocity) == (0.2, velocity)
+
+def test_rejects_bad_gains():
+    with pytest.raises(ValueError):
+        AxisPredictor(alpha = 0.0)
+    with pytest.raises(ValueError):
+        AxisPredictor(beta = 2.5)
+
+def test_prediction_error_beats_holding_on_a_ramp():
+    data = b''.join(struct.pack('IhBB', step * 10, step * 300, 0x02, 0) for step in range(100))
+    error = prediction_error(load_capture(data))[0]
+    assert error.samples > 0
+    assert error.rms < error.holdRms / 4
+
+def test_gamepad_updates_enabled_predictors(pad):
+    joystick, gamepad = pad
+    with pytest.raises(ValueError):
+        gamepad.predict_axis('LEFT-X')
+    predictor = gamepad.enablePrediction('LEFT-X')
+    for step in range(20):
+        joystick.axis(0, step * 0.01)
+        joystick.advance(10)
+    settle(gamepad)
+    assert predictor.last == pytest.approx(0.19, abs = 1e-4)
+    assert predictor.velocity == pytest.approx(0.001, rel = 0.05)
+    gamepad.disablePrediction('LEFT-X')
+    with pytest.raises(ValueError):
+        gamepad.predict_axis('LEFT-X')
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from linux_joystick_battisti456.profiler import HISTOGRAM_BUCKETS, HandlerProfiler, bucket_bounds
+
+from conftest import settle
+
+def test_bucket_bounds():
+    assert bucket_bounds(0) == (0.0, 1e-6)
+    assert bucket_bounds(3) == (4e-6, 8e-6)
+    assert bucket_bounds(HISTOGRAM_BUCKETS - 1)[1] == float('inf')
+
+def test_record_fills_the_histogram():
+    profiler = HandlerProfiler(budget = 0.01, warn = False)
+    for elapsed in (0.5e-6, 5e-6, 5e-6, 0.02):
+        profiler.record('pressed', 0, print, elapsed)
+    stats = profiler.stats[('pressed', 0, print)]
+    assert (stats.calls, stats.slowCalls, stats.maxTime) == (4, 1, 0.02)
+    assert stats.meanTime() == pytest.approx(0.0200105 / 4)
+    assert stats.histogram[0] == 1 and stats.histogram[3] == 2
+    low, high = bucket_bounds(stats.histogram.index(1, 4))
+    assert low <= 0.02 < high
+
+def test_slow_handlers_are_reported(pad):
+    joystick, gamepad = pad
+    slow = []
+    def fast():
+        pass
+    def sluggish():
+        time.sleep(0.01)
+    gamepad.addButtonPressedHandler('CROSS', fast)
+    gamepad.addButtonPressedHandler('CROSS', sluggish)
+    gamepad.enableProfiler(budget = 0.005, onSlow = lambda event, index, callback, elapsed: slow.append((event, index, callback)))
+    joystick.button(0, True)
+    with pytest.warns(RuntimeWarning, match = 'sluggish'):
+        settle(gamepad)
+    assert slow == [('pressed', 0, sluggish)]
+    report = gamepad.handler_stats()
+    assert [(entry['handler'].rsplit('.', 1)[-1], entry['control'], entry['calls'], entry['slow']) for entry in report] == [
+        ('sluggish', 'CROSS', 1, 1), ('fast', 'CROSS', 1, 0)
+    ]
+    gamepad.disableProfiler()
+    assert gamepad.handler_stats() == []
+
+def test_failing_handlers_are_timed_and_counted(pad):
+    joystick, gamepad = pad
+    def broken(position):
+        raise KeyError(position)
+    gamepad.addAxisMovedHandler('L2', broken)
+    profiler = gamepad.enableProfiler(warn = False)
+    joystick.axis(2, 1.0)
+    with pytest.raises(KeyError):
+        settle(gamepad)
+    assert profiler.stats[('moved', 2, broken)].calls == 1
+    assert gamepad.metrics.handlerErrors == 1
@@ -0,0 +1,67 @@
+import threading
+import time
+
+def test_timeout_zero_only_returns_waiting_events(pad):
+    joystick, gamepad = pad
+    start = time.monotonic()
+    assert gamepad.getEvents(timeout = 0.0) == []
+    assert time.monotonic() - start < 0.05
+    joystick.button(0, True)
+    assert [event.name for event in gamepad.getEvents(timeout = 0.0)] == ['CROSS']
+
+def test_events_arriving_before_the_deadline_are_gathered(pad):
+    joystick, gamepad = pad
+    def later():
+        for index in range(3):
+            time.sleep(0.02)
+            joystick.button(index, True)
+    writer = threading.Thread(target = later)
+    writer.start()
+    start = time.monotonic()
+    events = gamepad.getEvents(timeout = 0.3)
+    elapsed = time.monotonic() - start
+    writer.join()
+    assert [event.name for event in events] == ['CROSS', 'CIRCLE', 'TRIANGLE']
+    assert 0.25 <= elapsed < 1.0
+
+def test_max_events_returns_early(pad):
+    joystick, gamepad = pad
+    for index in range(5):
+        joystick.button(index, True)
+    start = time.monotonic()
+    assert len(gamepad.getEvents(3, timeout = 1.0)) == 3
+    assert time.monotonic() - start < 0.5
+    assert len(gamepad.getEvents(10, timeout = 0.0)) == 2
+
+def test_timeout_none_waits_for_the_first_event(pad):
+    joystick, gamepad = pad
+    timer = threading.Timer(0.05, joystick.button, (4, True))
+    timer.start()
+    events = gamepad.getEvents(timeout = None)
+    timer.join()
+    assert [(event.name, event.value) for event in events] == [('L1', True)]
+
+def test_init_events_update_state_but_are_skipped(pad):
+    joystick, gamepad = pad
+    joystick.buttons[1] = True
+    joystick.init_burst()
+    assert gamepad.getEvents(64, timeout = 0.05) == []
+    assert gamepad.isPressed('CIRCLE')
+    joystick.init_burst()
+    assert len(gamepad.getEvents(64, timeout = 0.05, skipInit = False)) == 21
+
+def test_long_init_burst_does_not_recurse(pad):
+    joystick, gamepad = pad
+    joystick.write_events([(0, 0, 0x81, 0)] * 3000 + [(1, 1, 0x01, 2)])
+    assert gamepad.getNextEvent() == (gamepad.EVENT_BUTTON, 'TRIANGLE', True)
+    joystick.write_events([(2, 0, 0x81, 0)] * 3000 + [(3, 0, 0x01, 2)])
+    event = gamepad.getNextEventObject()
+    assert (event.name, event.value, event.timestamp) == ('TRIANGLE', False, 3)
+
+def test_update_state_with_a_timeout(pad):
+    joystick, gamepad = pad
+    assert gamepad.updateState(0.01) == 0
+    joystick.axis(0, -1.0)
+    joystick.axis(1, 1.0)
+    assert gamepad.updateState(0.01) == 2
+    assert (gamepad.axis('LEFT-X'), gamepad.axis('LEFT-Y')) == (-1.0, 1.0)
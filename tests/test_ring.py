@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from linux_joystick_battisti456.ring import EventRing
+
+from conftest import settle
+
+def test_each_cursor_sees_every_event(pad):
+    joystick, gamepad = pad
+    gamepad.startEventRing(16)
+    first = gamepad.eventCursor()
+    second = gamepad.eventCursor()
+    joystick.button(0, True)
+    joystick.advance(4)
+    joystick.axis(0, 0.5)
+    settle(gamepad)
+    events = gamepad.drain(first)
+    assert [(event.name, event.value) for event in events] == [('CROSS', True), ('LEFT-X', pytest.approx(0.5, abs = 1e-4))]
+    assert [event.timestamp for event in events] == [0, 4]
+    assert gamepad.drain(first) == []
+    assert len(gamepad.drain(second)) == 2
+    assert first.overruns == second.overruns == 0
+
+def test_overrun_skips_to_the_oldest_event_kept():
+    ring = EventRing(8)
+    cursor = ring.cursor()
+    for timestamp in range(20):
+        ring.append(timestamp, 1, 0, 1.0)
+    assert len(ring) == 8
+    drained = ring.drainRaw(cursor)
+    assert [event[0] for event in drained] == list(range(12, 20))
+    assert cursor.overruns == 12
+    assert ring.drainRaw(cursor) == []
+
+def test_drain_limits():
+    ring = EventRing(8)
+    cursor = ring.cursor()
+    for timestamp in range(6):
+        ring.append(timestamp, 2, 1, timestamp / 10)
+    assert [event[0] for event in ring.drainRaw(cursor, maxEvents = 2)] == [0, 1]
+    assert [event[0] for event in ring.drainRaw(cursor, until = 4)] == [2, 3]
+    assert [event[0] for event in ring.drainRaw(cursor)] == [4, 5]
+    assert [event[0] for event in ring.drainRaw(ring.cursor(fromStart = True))] == list(range(6))
+
+def test_gamepad_ring_overruns(pad):
+    joystick, gamepad = pad
+    ring = gamepad.startEventRing(4)
+    assert gamepad.startEventRing(64) is ring
+    cursor = gamepad.eventCursor()
+    for step in range(10):
+        joystick.advance(1)
+        joystick.button(step % 3, step % 2 == 0)
+    settle(gamepad)
+    events = gamepad.drain(cursor)
+    assert [event.timestamp for event in events] == [7, 8, 9, 10]
+    assert cursor.overruns == 6
+    assert gamepad.snapshot().sequence == ring.sequence
+
+def test_concurrent_drain_never_sees_torn_events():
+    ring = EventRing(64)
+    cursor = ring.cursor()
+    count = 200000
+    def write():
+        for sequence in range(count):
+            # Every field carries the sequence, so a torn copy shows up as a mismatch
+            ring.append(sequence, 1, sequence & 0xFFFF, float(sequence))
+    writer = threading.Thread(target = write)
+    writer.start()
+    seen = 0
+    while writer.is_alive() or ring.sequence > cursor.position:
+        for timestamp, kind, index, value in ring.drainRaw(cursor):
+            assert (index, value) == (timestamp & 0xFFFF, float(timestamp))
+            assert timestamp >= seen
+            seen = timestamp + 1
+    writer.join()
+    assert seen == count
+    assert cursor.position == count
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from linux_joystick_battisti456.sampler import Sampler
+
+@pytest.mark.parametrize('useTimerfd', [True, False])
+def test_every_event_reaches_exactly_one_tick(pad, useTimerfd):
+    joystick, gamepad = pad
+    ticks = []
+    sampler = Sampler(gamepad, 200.0, lambda snapshot, events: ticks.append((snapshot, events)), useTimerfd)
+    sampler.start()
+    for step in range(10):
+        joystick.button(step % 4, step < 4)
+        time.sleep(0.01)
+    time.sleep(0.05)
+    sampler.stop()
+    sampler.join()
+    events = [event for _, tickEvents in ticks for event in tickEvents]
+    assert [(event.index, event.value) for event in events] == [(step % 4, step < 4) for step in range(10)]
+    snapshot = ticks[-1][0]
+    assert snapshot.buttons[0] is False and snapshot.buttons[1] is False
+    assert sampler.stats.ticks == len(ticks) >= 10
+    assert sampler.stats.meanJitter() >= 0.0
+
+@pytest.mark.parametrize('useTimerfd', [True, False])
+def test_overrunning_ticks_count_missed_deadlines(pad, useTimerfd):
+    joystick, gamepad = pad
+    sampler = Sampler(gamepad, 100.0, lambda snapshot, events: time.sleep(0.035), useTimerfd)
+    sampler.start()
+    time.sleep(0.2)
+    sampler.stop()
+    sampler.join()
+    assert sampler.stats.ticks >= 3
+    assert sampler.stats.missed >= 2 * (sampler.stats.ticks - 1)
+
+def test_start_sampler(pad):
+    joystick, gamepad = pad
+    snapshots = []
+    sampler = gamepad.startSampler(100.0, lambda snapshot, events: snapshots.append(snapshot))
+    joystick.axis(0, 1.0)
+    time.sleep(0.05)
+    sampler.stop()
+    sampler.join()
+    assert snapshots[-1].axes[0] == 1.0
+    with pytest.raises(ValueError):
+        Sampler(gamepad, 0.0, lambda snapshot, events: None)
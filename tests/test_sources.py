@@ -0,0 +1,49 @@
+import os
+import struct
+import socket
+
+import pytest
+
+from linux_joystick_battisti456.Controllers import PS4
+from linux_joystick_battisti456.virtual_joystick import VirtualJoystick
+
+from conftest import settle
+
+def test_buffered_file_object_returns_what_is_available():
+    joystick, readFd = VirtualJoystick.pipe(buttons = 13, axes = 8)
+    gamepad = PS4(source = os.fdopen(readFd, 'rb'))
+    joystick.init_burst()
+    assert gamepad.updateState(0.05) == 21
+    joystick.button(0, True)
+    settle(gamepad)
+    assert gamepad.isPressed('CROSS')
+    gamepad.disconnect()
+    joystick.disconnect()
+
+def test_socket_both_ends():
+    writeEnd, readEnd = socket.socketpair()
+    joystick = VirtualJoystick(writeEnd, buttons = 13, axes = 8)
+    gamepad = PS4(source = readEnd)
+    joystick.init_burst()
+    joystick.axis(1, -1.0)
+    settle(gamepad)
+    assert gamepad.axis('LEFT-Y') == -1.0
+    joystick.disconnect()
+    with pytest.raises(IOError):
+        gamepad.updateState(1.0)
+    assert not gamepad.isConnected()
+    gamepad.disconnect()
+
+def test_events_split_across_reads(pad):
+    joystick, gamepad = pad
+    joystick.write_events([(1, 1, 0x01, 0), (2, 1, 0x01, 1), (3, 1, 0x01, 2)], chunkSize = 5)
+    settle(gamepad)
+    assert [gamepad.isPressed(index) for index in range(3)] == [True, True, True]
+
+def test_memory_source_ends_as_a_disconnect():
+    capture = VirtualJoystick(None, buttons = 13, axes = 8).init_events()
+    gamepad = PS4(source = b''.join(struct.pack('IhBB', *event) for event in capture))
+    assert gamepad.getEvents(256, skipInit = False)[-1].index == 7
+    assert gamepad.isPressed('CROSS') is False
+    with pytest.raises(IOError):
+        gamepad.getEvents()
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from conftest import settle
+
+def test_diagonal_move_is_one_callback(pad):
+    joystick, gamepad = pad
+    moves = []
+    gamepad.addStickMovedHandler('LEFT', lambda x, y, magnitude, angle: moves.append((x, y)))
+    joystick.write_events([(10, 32767, 0x02, 0), (10, 32767, 0x02, 1)])
+    settle(gamepad)
+    assert len(moves) == 1
+    # Clamped to the unit circle
+    assert moves[0] == (pytest.approx(0.5 ** 0.5), pytest.approx(0.5 ** 0.5))
+
+def test_unchanged_stick_is_not_reported(pad):
+    joystick, gamepad = pad
+    moves = []
+    gamepad.addStickMovedHandler('LEFT', lambda *state: moves.append(state))
+    joystick.axis(0, 0.5)
+    settle(gamepad)
+    joystick.axis(0, 0.5)
+    joystick.axis(3, 0.5)
+    settle(gamepad)
+    assert len(moves) == 1
+
+def test_one_callback_per_batch_in_background(pad):
+    joystick, gamepad = pad
+    moved = threading.Event()
+    moves = []
+    def onMove(x, y, magnitude, angle):
+        moves.append((x, y))
+        moved.set()
+    gamepad.addStickMovedHandler('RIGHT', onMove)
+    gamepad.startBackgroundUpdates(waitForReady = False)
+    joystick.write_events([(10, -32767, 0x02, 3), (10, 32767, 0x02, 4)])
+    assert moved.wait(2.0)
+    assert moves == [(pytest.approx(-0.5 ** 0.5), pytest.approx(0.5 ** 0.5))]
+
+def test_fewest_callbacks_when_handlers_pull_events(pad):
+    joystick, gamepad = pad
+    moves = []
+    gamepad.addStickMovedHandler('LEFT', lambda *state: moves.append(state))
+    joystick.write_events([(10, 1000, 0x02, 0), (10, 2000, 0x02, 1), (12, 3000, 0x02, 0)])
+    for _ in range(3):
+        gamepad.updateState()
+    assert len(moves) == 1
+
+def test_is_next_event_sees_the_rest_of_a_batch(pad):
+    joystick, gamepad = pad
+    joystick.button(0, True)
+    joystick.button(1, True)
+    assert gamepad.isNextEvent()
+    while gamepad.isNextEvent():
+        gamepad.updateState()
+    assert gamepad.isPressed('CROSS') and gamepad.isPressed('CIRCLE')
+    assert gamepad.pendingRawEvents == []
@@ -0,0 +1,50 @@
+import random
+
+from linux_joystick_battisti456.triggers import Threshold, TriggerIndex, Zones
+
+from conftest import settle
+
+def test_index_matches_checking_every_trigger():
+    generator = random.Random(3)
+    triggers = [Threshold(round(generator.uniform(-1, 1), 2)) for _ in range(20)]
+    triggers += [Zones.even(count, lambda zone, previous: None) for count in (2, 3, 7)]
+    index = TriggerIndex(tuple(triggers))
+    previous = 0.0
+    for _ in range(2000):
+        value = round(generator.uniform(-1, 1), 2)
+        expected = {id(trigger) for trigger in triggers if (
+            trigger.zone(previous) != trigger.zone(value) if isinstance(trigger, Zones) else trigger.inside(previous) != trigger.inside(value)
+        )}
+        assert {id(trigger) for trigger in index.crossed(previous, value)} == expected
+        previous = value
+
+def test_boundary_counts_as_above():
+    threshold = Threshold(0.5)
+    index = TriggerIndex((threshold,))
+    assert index.crossed(0.0, 0.5) == [threshold]
+    assert index.crossed(0.5, 0.7) == []
+    assert index.crossed(0.7, 0.49) == [threshold]
+
+def test_threshold_through_a_gamepad(pad):
+    joystick, gamepad = pad
+    calls = []
+    threshold = Threshold(0.5, lambda: calls.append('enter'), lambda: calls.append('leave'))
+    gamepad.addAxisTrigger('R2', threshold)
+    for position in (0.2, 0.6, 0.9, 0.4, 0.3, 0.5):
+        joystick.axis(5, position)
+    settle(gamepad)
+    assert calls == ['enter', 'leave', 'enter']
+    gamepad.removeAxisTrigger('R2', threshold)
+    joystick.axis(5, 0.0)
+    settle(gamepad)
+    assert calls == ['enter', 'leave', 'enter']
+
+def test_zones_report_skipped_zones_once(pad):
+    joystick, gamepad = pad
+    changes = []
+    gamepad.addAxisTrigger('LEFT-X', Zones.even(4, lambda zone, previous: changes.append((zone, previous))))
+    gamepad.addAxisTrigger('LEFT-X', Threshold(-0.25, lambda: changes.append('below'), above = False))
+    for position in (0.1, 0.9, -0.9, -0.2):
+        joystick.axis(0, position)
+    settle(gamepad)
+    assert changes == [(3, 2), (0, 3), 'below', (1, 0)]
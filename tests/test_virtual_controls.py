@@ -0,0 +1,76 @@
+import pytest
+
+from linux_joystick_battisti456.virtual_controls import (
+    VIRTUAL_BASE, HysteresisButton, VirtualAxis, axis, axis_buttons, button, difference, magnitude
+)
+
+from conftest import settle
+
+def test_difference_axis(pad):
+    joystick, gamepad = pad
+    index = gamepad.addVirtualControl(difference('THROTTLE', axis('R2'), axis('L2')))
+    assert index >= VIRTUAL_BASE
+    moved = []
+    gamepad.addAxisMovedHandler('THROTTLE', moved.append)
+    joystick.axis(5, 1.0)
+    joystick.axis(2, 0.5)
+    settle(gamepad)
+    assert gamepad.axis('THROTTLE') == pytest.approx(0.5, abs = 1e-4)
+    assert moved == [pytest.approx(1.0), pytest.approx(0.5, abs = 1e-4)]
+    assert gamepad.snapshot().axes[index] == gamepad.axis('THROTTLE')
+
+def test_hysteresis_button_does_not_chatter(pad):
+    joystick, gamepad = pad
+    gamepad.addVirtualControl(HysteresisButton('FIRE', axis('R2'), 0.6, 0.4))
+    for position in (0.5, 0.61, 0.5, 0.45, 0.55, 0.39, 0.5):
+        joystick.axis(5, position)
+    settle(gamepad)
+    assert gamepad.pressCountSince('FIRE') == (1, 1)
+    assert gamepad.releaseCountSince('FIRE') == (1, 1)
+    assert not gamepad.isPressed('FIRE')
+    with pytest.raises(ValueError):
+        HysteresisButton('BAD', 'R2', 0.4, 0.6)
+
+def test_virtual_controls_chain_and_ring(pad):
+    joystick, gamepad = pad
+    gamepad.addVirtualControl(magnitude('LEFT-MAGNITUDE', 'LEFT-X', 'LEFT-Y'))
+    gamepad.addVirtualControl(VirtualAxis('HALF', ['LEFT-MAGNITUDE'], lambda value: value / 2))
+    for control in axis_buttons('DPAD-X', 'DPAD-LEFT', 'DPAD-RIGHT'):
+        gamepad.addVirtualControl(control)
+    cursor = gamepad.eventCursor()
+    joystick.axis(0, 0.6)
+    joystick.axis(1, 0.8)
+    joystick.axis(6, -1.0)
+    settle(gamepad)
+    assert gamepad.axis('HALF') == pytest.approx(0.5, abs = 1e-4)
+    assert gamepad.isPressed('DPAD-LEFT') and not gamepad.isPressed('DPAD-RIGHT')
+    names = [event.name for event in gamepad.drain(cursor)]
+    assert 'DPAD-LEFT' in names and 'HALF' in names
+    generation, buttons, axes = gamepad.changed_since(0, ['DPAD-LEFT'])
+    assert list(buttons.values()) == [True]
+
+def test_ambiguous_and_duplicate_names(pad):
+    joystick, gamepad = pad
+    # PS4 has both an L2 button and an L2 axis
+    with pytest.raises(ValueError):
+        gamepad.addVirtualControl(VirtualAxis('EITHER', ['L2'], float))
+    gamepad.addVirtualControl(VirtualAxis('BOTH', [button('L2'), axis('L2')], lambda pressed, position: position if pressed else 0.0))
+    joystick.axis(2, 1.0)
+    settle(gamepad)
+    assert gamepad.axis('BOTH') == 0.0
+    joystick.button(6, True)
+    settle(gamepad)
+    assert gamepad.axis('BOTH') == 1.0
+    with pytest.raises(ValueError):
+        gamepad.addVirtualControl(VirtualAxis('BOTH', ['LEFT-X'], float))
+
+def test_removed_controls_stop_updating(pad):
+    joystick, gamepad = pad
+    gamepad.addVirtualControl(VirtualAxis('COPY', ['LEFT-X'], float))
+    gamepad.removeVirtualControl('COPY')
+    joystick.axis(0, 1.0)
+    settle(gamepad)
+    with pytest.raises(ValueError):
+        gamepad.axis('COPY')
+    with pytest.raises(ValueError):
+        gamepad.removeVirtualControl('COPY')